@@ -13,3 +13,8 @@ delete from team_offense_conference;
 delete from team_offense_overall;
 delete from team_pitching_conference;
 delete from team_pitching_overall;
+delete from etl_watermarks;
+delete from batters_leaderboard_conference;
+delete from batters_leaderboard_overall;
+delete from pitchers_leaderboard_conference;
+delete from pitchers_leaderboard_overall;
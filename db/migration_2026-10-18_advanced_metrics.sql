@@ -0,0 +1,45 @@
+-- Season-relative offensive metrics materialized by the cleaning ETLs
+
+ALTER TABLE public.batters_overall
+ADD COLUMN IF NOT EXISTS sbr numeric,
+ADD COLUMN IF NOT EXISTS wsb numeric,
+ADD COLUMN IF NOT EXISTS woba numeric,
+ADD COLUMN IF NOT EXISTS wraa numeric,
+ADD COLUMN IF NOT EXISTS off numeric,
+ADD COLUMN IF NOT EXISTS wrc numeric,
+ADD COLUMN IF NOT EXISTS wrc_p numeric,
+ADD COLUMN IF NOT EXISTS off_p numeric,
+ADD COLUMN IF NOT EXISTS rar numeric;
+
+ALTER TABLE public.batters_conference
+ADD COLUMN IF NOT EXISTS sbr numeric,
+ADD COLUMN IF NOT EXISTS wsb numeric,
+ADD COLUMN IF NOT EXISTS woba numeric,
+ADD COLUMN IF NOT EXISTS wraa numeric,
+ADD COLUMN IF NOT EXISTS off numeric,
+ADD COLUMN IF NOT EXISTS wrc numeric,
+ADD COLUMN IF NOT EXISTS wrc_p numeric,
+ADD COLUMN IF NOT EXISTS off_p numeric,
+ADD COLUMN IF NOT EXISTS rar numeric;
+
+ALTER TABLE public.team_offense_overall
+ADD COLUMN IF NOT EXISTS sbr numeric,
+ADD COLUMN IF NOT EXISTS wsb numeric,
+ADD COLUMN IF NOT EXISTS woba numeric,
+ADD COLUMN IF NOT EXISTS wraa numeric,
+ADD COLUMN IF NOT EXISTS off numeric,
+ADD COLUMN IF NOT EXISTS wrc numeric,
+ADD COLUMN IF NOT EXISTS wrc_p numeric,
+ADD COLUMN IF NOT EXISTS off_p numeric,
+ADD COLUMN IF NOT EXISTS rar numeric;
+
+ALTER TABLE public.team_offense_conference
+ADD COLUMN IF NOT EXISTS sbr numeric,
+ADD COLUMN IF NOT EXISTS wsb numeric,
+ADD COLUMN IF NOT EXISTS woba numeric,
+ADD COLUMN IF NOT EXISTS wraa numeric,
+ADD COLUMN IF NOT EXISTS off numeric,
+ADD COLUMN IF NOT EXISTS wrc numeric,
+ADD COLUMN IF NOT EXISTS wrc_p numeric,
+ADD COLUMN IF NOT EXISTS off_p numeric,
+ADD COLUMN IF NOT EXISTS rar numeric;
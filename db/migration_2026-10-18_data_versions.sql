@@ -0,0 +1,9 @@
+-- Data version of each season, bumped by the cleaning controller so the API
+-- can tell when its cached responses are stale
+
+CREATE TABLE IF NOT EXISTS public.data_versions (
+  season integer,
+  version integer not null,
+  updated_at timestamp not null default now(),
+  primary key(season)
+);
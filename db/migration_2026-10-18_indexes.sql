@@ -0,0 +1,13 @@
+-- Secondary indexes for the filters and joins of the API queries
+
+CREATE INDEX IF NOT EXISTS batters_overall_season_pa_idx ON public.batters_overall (season, pa);
+CREATE INDEX IF NOT EXISTS batters_overall_team_season_idx ON public.batters_overall (team, season);
+CREATE INDEX IF NOT EXISTS batters_conference_season_pa_idx ON public.batters_conference (season, pa);
+CREATE INDEX IF NOT EXISTS batters_conference_team_season_idx ON public.batters_conference (team, season);
+CREATE INDEX IF NOT EXISTS pitchers_overall_season_ip_idx ON public.pitchers_overall (season, ip);
+CREATE INDEX IF NOT EXISTS pitchers_overall_team_season_idx ON public.pitchers_overall (team, season);
+CREATE INDEX IF NOT EXISTS pitchers_conference_season_ip_idx ON public.pitchers_conference (season, ip);
+CREATE INDEX IF NOT EXISTS pitchers_conference_team_season_idx ON public.pitchers_conference (team, season);
+CREATE INDEX IF NOT EXISTS player_id_player_id_idx ON public.player_id (player_id);
+CREATE INDEX IF NOT EXISTS game_log_team_season_date_idx ON public.game_log (team, season, date);
+CREATE INDEX IF NOT EXISTS game_log_season_date_idx ON public.game_log (season, date);
@@ -0,0 +1,14 @@
+-- State of the source tables when each ETL last loaded a season, used by the
+-- cleaning controller to skip ETLs whose inputs haven't changed
+
+CREATE TABLE IF NOT EXISTS public.etl_watermarks (
+  etl varchar(30),
+  split varchar(10),
+  season integer,
+  source varchar(50),
+  row_count integer not null,
+  checksum varchar(32) not null,
+  max_date date,
+  updated_at timestamp not null,
+  primary key(etl, split, season, source)
+);
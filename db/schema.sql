@@ -814,6 +814,15 @@ create table batters_overall (
   slg numeric,
   ops numeric,
   sar numeric,
+  sbr numeric,
+  wsb numeric,
+  woba numeric,
+  wraa numeric,
+  off numeric,
+  wrc numeric,
+  wrc_p numeric,
+  off_p numeric,
+  rar numeric,
   primary key (fname, lname, team, season)
 );
 
@@ -901,6 +910,15 @@ create table batters_conference (
   slg numeric,
   ops numeric,
   sar numeric,
+  sbr numeric,
+  wsb numeric,
+  woba numeric,
+  wraa numeric,
+  off numeric,
+  wrc numeric,
+  wrc_p numeric,
+  off_p numeric,
+  rar numeric,
   primary key (fname, lname, team, season)
 );
 
@@ -1145,6 +1163,15 @@ create table team_offense_overall (
   slg numeric,
   ops numeric,
   sar numeric,
+  sbr numeric,
+  wsb numeric,
+  woba numeric,
+  wraa numeric,
+  off numeric,
+  wrc numeric,
+  wrc_p numeric,
+  off_p numeric,
+  rar numeric,
   primary key (name, season)
 );
 
@@ -1222,6 +1249,15 @@ create table team_offense_conference (
   slg numeric,
   ops numeric,
   sar numeric,
+  sbr numeric,
+  wsb numeric,
+  woba numeric,
+  wraa numeric,
+  off numeric,
+  wrc numeric,
+  wrc_p numeric,
+  off_p numeric,
+  rar numeric,
   primary key (name, season)
 );
 
@@ -1695,3 +1731,35 @@ create table league_pitching_conference (
   era_minus numeric,
   primary key(season)
 );
+
+create table etl_watermarks (
+  etl varchar(30),
+  split varchar(10),
+  season integer,
+  source varchar(50),
+  row_count integer not null,
+  checksum varchar(32) not null,
+  max_date date,
+  updated_at timestamp not null,
+  primary key(etl, split, season, source)
+);
+
+create table data_versions (
+  season integer,
+  version integer not null,
+  updated_at timestamp not null default now(),
+  primary key(season)
+);
+
+-- secondary indexes for the filters and joins of the API queries
+create index batters_overall_season_pa_idx on batters_overall (season, pa);
+create index batters_overall_team_season_idx on batters_overall (team, season);
+create index batters_conference_season_pa_idx on batters_conference (season, pa);
+create index batters_conference_team_season_idx on batters_conference (team, season);
+create index pitchers_overall_season_ip_idx on pitchers_overall (season, ip);
+create index pitchers_overall_team_season_idx on pitchers_overall (team, season);
+create index pitchers_conference_season_ip_idx on pitchers_conference (season, ip);
+create index pitchers_conference_team_season_idx on pitchers_conference (team, season);
+create index player_id_player_id_idx on player_id (player_id);
+create index game_log_team_season_date_idx on game_log (team, season, date);
+create index game_log_season_date_idx on game_log (season, date);
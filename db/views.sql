@@ -3,3 +3,62 @@ CREATE VIEW guts AS
 SELECT season, lg_r_pa, bsr_bmult, lw_hbp, lw_bb, lw_x1b, lw_x2b, lw_x3b, lw_hr,
 lw_sb, lw_cs, lw_out, ww_hbp, ww_bb, ww_x1b, ww_x2b, ww_x3b, ww_hr, woba_scale, rep_level
 FROM league_offense_overall;
+
+-- Leaderboard tables: the clean player stats joined with their player ids.
+-- The columns match models.leaderboard_table, so the tables don't pick up
+-- columns added to the stats tables later on.
+-- The cleaning controller refreshes the seasons it loads.
+
+CREATE TABLE batters_leaderboard_overall AS
+SELECT s.no, s.fname, s.lname, s.team, s.season, s.yr, s.pos, s.g, s.pa, s.ab, s.r,
+s.h, s.x2b, s.x3b, s.hr, s.rbi, s.bb, s.so, s.hbp, s.tb, s.xbh, s.sf, s.sh,
+s.gdp, s.sb, s.cs, s.go, s.fo, s.go_fo, s.hbp_p, s.bb_p, s.so_p, s.babip, s.iso,
+s.avg, s.obp, s.slg, s.ops, s.sar, s.sbr, s.wsb, s.woba, s.wraa, s.off, s.wrc,
+s.wrc_p, s.off_p, s.rar, p.player_id
+FROM batters_overall AS s
+LEFT JOIN player_id AS p
+ON (p.fname, p.lname, p.team, p.season) = (s.fname, s.lname, s.team, s.season);
+
+ALTER TABLE batters_leaderboard_overall ADD PRIMARY KEY (fname, lname, team, season);
+CREATE INDEX batters_leaderboard_overall_season_pa_idx ON batters_leaderboard_overall (season, pa);
+CREATE INDEX batters_leaderboard_overall_team_season_idx ON batters_leaderboard_overall (team, season);
+
+CREATE TABLE batters_leaderboard_conference AS
+SELECT s.no, s.fname, s.lname, s.team, s.season, s.yr, s.pos, s.g, s.pa, s.ab, s.r,
+s.h, s.x2b, s.x3b, s.hr, s.rbi, s.bb, s.so, s.hbp, s.tb, s.xbh, s.sf, s.sh,
+s.gdp, s.sb, s.cs, s.go, s.fo, s.go_fo, s.hbp_p, s.bb_p, s.so_p, s.babip, s.iso,
+s.avg, s.obp, s.slg, s.ops, s.sar, s.sbr, s.wsb, s.woba, s.wraa, s.off, s.wrc,
+s.wrc_p, s.off_p, s.rar, p.player_id
+FROM batters_conference AS s
+LEFT JOIN player_id AS p
+ON (p.fname, p.lname, p.team, p.season) = (s.fname, s.lname, s.team, s.season);
+
+ALTER TABLE batters_leaderboard_conference ADD PRIMARY KEY (fname, lname, team, season);
+CREATE INDEX batters_leaderboard_conference_season_pa_idx ON batters_leaderboard_conference (season, pa);
+CREATE INDEX batters_leaderboard_conference_team_season_idx ON batters_leaderboard_conference (team, season);
+
+CREATE TABLE pitchers_leaderboard_overall AS
+SELECT s.no, s.fname, s.lname, s.team, s.season, s.yr, s.pos, s.g, s.gs, s.w, s.l,
+s.sv, s.cg, s.sho, s.ip, s.h, s.r, s.er, s.bb, s.so, s.x2b, s.x3b, s.hr, s.ab,
+s.wp, s.hbp, s.bk, s.sf, s.sh, s.pa, s.hbp_p, s.bb_p, s.so_p, s.iso, s.babip,
+s.avg, s.obp, s.slg, s.ops, s.lob_p, s.era, s.ra_9, s.so_9, s.bb_9, s.hr_9,
+s.whip, p.player_id
+FROM pitchers_overall AS s
+LEFT JOIN player_id AS p
+ON (p.fname, p.lname, p.team, p.season) = (s.fname, s.lname, s.team, s.season);
+
+ALTER TABLE pitchers_leaderboard_overall ADD PRIMARY KEY (fname, lname, team, season);
+CREATE INDEX pitchers_leaderboard_overall_season_ip_idx ON pitchers_leaderboard_overall (season, ip);
+CREATE INDEX pitchers_leaderboard_overall_team_season_idx ON pitchers_leaderboard_overall (team, season);
+
+CREATE TABLE pitchers_leaderboard_conference AS
+SELECT s.no, s.fname, s.lname, s.team, s.season, s.yr, s.pos, s.g, s.gs, s.w, s.l,
+s.sv, s.cg, s.ip, s.h, s.r, s.er, s.bb, s.so, s.hr, s.era, s.ra_9, s.so_9,
+s.bb_9, s.hr_9, s.whip, p.player_id
+FROM pitchers_conference AS s
+LEFT JOIN player_id AS p
+ON (p.fname, p.lname, p.team, p.season) = (s.fname, s.lname, s.team, s.season);
+
+ALTER TABLE pitchers_leaderboard_conference ADD PRIMARY KEY (fname, lname, team, season);
+CREATE INDEX pitchers_leaderboard_conference_season_ip_idx ON pitchers_leaderboard_conference (season, ip);
+CREATE INDEX pitchers_leaderboard_conference_team_season_idx ON pitchers_leaderboard_conference (team, season);
@@ -0,0 +1,259 @@
+""" This module provides an in-process cache and HTTP caching headers for API
+responses
+"""
+import functools
+import hashlib
+import inspect
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from pathlib import Path
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from naccbis import __version__
+from naccbis.common import metrics, utils
+
+from . import formats, queries
+from .formats import Page
+
+# an async endpoint function
+Endpoint = Callable[..., Awaitable[Any]]
+
+MISSING = object()
+
+
+def source_digest() -> str:
+    """Get a digest of the source of the modules that make the responses, the
+    API package and the metrics, which is the same in every API process
+    """
+    paths = sorted(Path(__file__).parent.glob("*.py")) + [Path(metrics.__file__)]
+    digest = hashlib.sha1()
+    for path in paths:
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+SOURCE_DIGEST = source_digest()
+
+
+class ResponseCache:
+    """LRU cache of endpoint responses.
+
+    Responses are keyed by the endpoint, its query parameters and the data
+    versions of the seasons they cover. The cleaning controller bumps the
+    version of a season when it loads it, so a response is never served after
+    its data changed. The versions are reloaded from the database at most every
+    version_interval seconds. Responses of completed seasons are kept until
+    they are evicted, any other response expires after ttl seconds.
+
+    This is the invalidation contract of the cached endpoints. A response may
+    only depend on the endpoint, its parameters and the data of the seasons it
+    covers. An endpoint with a season parameter covers that season, and is
+    keyed by its version. Any other response, e.g. of season=None or of
+    /player, covers all seasons and is keyed by the versions of all seasons.
+    Data that isn't versioned per season must not change the responses, so a
+    cleaning run that changes served tables has to bump the versions.
+
+    The same keys give the responses their ETag, so clients and proxies can
+    revalidate them with a conditional request, see etag.
+
+    The reflected leaderboard tables are forgotten along with the responses
+    when the cache is cleared or the versions change, see
+    queries.get_leaderboard.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        ttl: float = 60,
+        version_interval: float = 5,
+        max_age: int = 86400,
+        validate: bool = False,
+    ) -> None:
+        """Class constructor
+        :param maxsize: Maximum number of responses to keep
+        :param ttl: Number of seconds responses of the current season are fresh
+        :param version_interval: Number of seconds between data version checks
+        :param max_age: Number of seconds clients may reuse responses of
+            completed seasons without revalidating them
+        :param validate: Validate pages of rows with their response schema
+            instead of encoding them directly, e.g. to debug a schema
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version_interval = version_interval
+        self.max_age = max_age
+        self.validate = validate
+        self.entries: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self.versions: dict[int, int] = {}
+        self.versions_loaded = float("-inf")
+
+    def get(self, key: Hashable) -> Any:
+        """Get a cached response
+
+        :param key: The cache key
+        :returns: The response or MISSING if it isn't cached or expired
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return MISSING
+        value, expires = entry
+        if time.monotonic() >= expires:
+            del self.entries[key]
+            return MISSING
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float]) -> None:
+        """Add a response to the cache, evicting the least recently used
+
+        :param key: The cache key
+        :param value: The response
+        :param ttl: Number of seconds the response is fresh or None for no limit
+        """
+        if self.maxsize <= 0:
+            return
+        expires = float("inf") if ttl is None else time.monotonic() + ttl
+        self.entries[key] = (value, expires)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.versions = {}
+        self.versions_loaded = float("-inf")
+        queries.clear_leaderboards()
+
+    def versions_stale(self) -> bool:
+        return time.monotonic() - self.versions_loaded >= self.version_interval
+
+    def set_versions(self, versions: dict[int, int]) -> None:
+        # entries of older versions can't be hit anymore and age out of the LRU
+        if versions != self.versions:
+            queries.clear_leaderboards()
+        self.versions = versions
+        self.versions_loaded = time.monotonic()
+
+    def version(self, season: Optional[int]) -> Hashable:
+        """Get the data version of a season or the versions of all seasons"""
+        if season:
+            return self.versions.get(season, 0)
+        return tuple(sorted(self.versions.items()))
+
+    def season_ttl(self, season: Optional[int]) -> Optional[float]:
+        """Get the TTL of the responses of a season or of all seasons"""
+        if season and utils.season_completed(season):
+            return None
+        return self.ttl
+
+    def cache_control(self, season: Optional[int]) -> str:
+        """Get the Cache-Control header of the responses of a season or of all
+        seasons. Only completed seasons may be reused without revalidation.
+        """
+        if season and utils.season_completed(season):
+            return f"public, max-age={self.max_age}"
+        return "no-cache"
+
+
+def etag(key: Hashable) -> str:
+    """Get the ETag of a response. It's derived from the cache key rather than
+    the body, so that a conditional request doesn't have to render the body,
+    and it has to be the same in every API process. The key only covers the
+    data, so the digest of the source is added for the code that renders it,
+    and the caller adds the format and render path. The ETag is weak, because
+    the bodies of the same key may differ in encoding details.
+
+    :param key: The cache key and the way the body is rendered
+    :returns: The quoted ETag
+    """
+    key = (__version__, SOURCE_DIGEST, key)
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], tag: str) -> bool:
+    """Determine if the If-None-Match header of a request matches an ETag
+    using the weak comparison
+
+    :param if_none_match: The If-None-Match header
+    :param tag: The ETag
+    :returns: True if the client has the current response, False otherwise
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return tag.removeprefix("W/") in tags
+
+
+def cached(
+    cache: ResponseCache,
+) -> Callable[[Endpoint], Endpoint]:
+    """Cache the responses of an endpoint and set their ETag and Cache-Control
+    headers. A conditional request whose If-None-Match matches the ETag gets a
+    304 Not Modified without running the endpoint. The endpoint must take its
+    database session as db and may take a season.
+
+    Pages of rows are cached as they are and rendered in the format the request
+    accepts, see the formats module.
+
+    :param cache: The cache to use
+    :returns: A decorator
+    """
+
+    def decorator(func: Endpoint) -> Endpoint:
+        @functools.wraps(func)
+        async def wrapper(
+            *, request: Request, response: Response, **kwargs: Any
+        ) -> Any:
+            db: AsyncSession = kwargs["db"]
+            if cache.versions_stale():
+                cache.set_versions(
+                    await db.run_sync(lambda s: utils.get_data_versions(s.connection()))
+                )
+
+            season = kwargs.get("season")
+            params = tuple(sorted((k, v) for k, v in kwargs.items() if k != "db"))
+            key = (func.__name__, params, cache.version(season))
+            media_type = formats.negotiate(request.headers.get("accept"))
+            headers = {
+                "ETag": etag((key, media_type, cache.validate)),
+                "Cache-Control": cache.cache_control(season),
+                "Vary": "Accept",
+            }
+            if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+                return Response(status_code=304, headers=headers)
+
+            value = cache.get(key)
+            if value is MISSING:
+                value = await func(**kwargs)
+                cache.put(key, value, cache.season_ttl(season))
+            if isinstance(value, Page):
+                if value.next_cursor is not None:
+                    url = request.url.include_query_params(cursor=value.next_cursor)
+                    headers["Link"] = f'<{url}>; rel="next"'
+                value = await formats.render(value, media_type, cache.validate)
+            # FastAPI only adds the headers of response to the responses it makes
+            if isinstance(value, Response):
+                value.headers.update(headers)
+            else:
+                response.headers.update(headers)
+            return value
+
+        # let FastAPI pass the request and response along with the parameters
+        signature = inspect.signature(func)
+        extra = [
+            inspect.Parameter(name, inspect.Parameter.KEYWORD_ONLY, annotation=cls)
+            for name, cls in [("request", Request), ("response", Response)]
+        ]
+        wrapper.__signature__ = signature.replace(  # type: ignore[attr-defined]
+            parameters=[*signature.parameters.values(), *extra]
+        )
+        return wrapper
+
+    return decorator
@@ -1,4 +1,8 @@
+from typing import Any
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from naccbis.common.settings import Settings
@@ -12,4 +16,27 @@ def create_session(settings: Settings):
     return sessionmaker(engine, autocommit=False, autoflush=False)
 
 
+def create_async_session(settings: Settings, **kwargs: Any):
+    """Create an asyncpg based session factory
+
+    :param settings: The settings with the database URL
+    :param kwargs: Keyword arguments passed to create_async_engine
+    :returns: A sessionmaker of AsyncSession
+    """
+    database_url = make_url(settings.db_url).set(drivername="postgresql+asyncpg")
+    # asyncpg doesn't take libpq options in the URL
+    server_settings = {"application_name": settings.app_name}
+    engine = create_async_engine(
+        database_url, connect_args={"server_settings": server_settings}, **kwargs
+    )
+    return sessionmaker(
+        engine,
+        class_=AsyncSession,
+        autocommit=False,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
 SessionLocal = create_session(get_settings())
+AsyncSessionLocal = create_async_session(get_settings())
@@ -0,0 +1,184 @@
+""" This module renders the rows of the list endpoints in the format the client
+accepts. Every format is encoded straight from the DataFrame of the rows. The
+rows come from our own tables, so the per-row validation of the response model
+would only cost time. JSON is converted column by column to the types of the
+response schema, which keeps the payload the same as the response model's, and
+the routes keep their response models for the OpenAPI schema. Like the
+response model, JSON has every field of the schema, with null for the columns
+the table doesn't have. The schema of a page with selected fields only has
+those fields, see pagination.project. Arrow and CSV only have the columns of
+the rows.
+"""
+import io
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Optional
+
+import orjson
+import pandas as pd
+import pyarrow as pa
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+
+JSON = "application/json"
+ARROW = "application/vnd.apache.arrow.stream"
+CSV = "text/csv"
+MEDIA_TYPES = [JSON, ARROW, CSV]
+
+# rows per Arrow record batch or CSV chunk
+BATCH_SIZE = 10000
+
+
+@dataclass
+class Page:
+    """The rows a list endpoint responds with, a page of them if it's paged,
+    and the cursor of the next page. The rows are kept as a DataFrame so they
+    can be rendered in any response format.
+    """
+
+    frame: pd.DataFrame
+    schema: type[BaseModel]
+    next_cursor: Optional[str] = None
+    _json: Optional[bytes] = field(default=None, init=False, repr=False)
+
+    @property
+    def columns(self) -> list[str]:
+        """Get the columns of the frame that are in the response schema"""
+        return [name for name in self.schema.__fields__ if name in self.frame]
+
+    def validated(self) -> Response:
+        """Validate the rows with the response schema and encode them the way
+        FastAPI encodes response models, e.g. to check the encoded JSON
+        """
+        rows = self.frame[self.columns].to_dict("records")
+        models = [self.schema.parse_obj(row) for row in rows]
+        return JSONResponse(jsonable_encoder(models))
+
+    def json(self) -> bytes:
+        """Get the rows encoded as JSON. They are only encoded once."""
+        if self._json is None:
+            self._json = json_body(self.frame, self.schema)
+        return self._json
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Pick the response format from the Accept header of a request. Clients
+    that don't ask for Arrow or CSV get JSON.
+
+    :param accept: The Accept header
+    :returns: The media type of the response
+    """
+    ranges = []
+    for i, media_range in enumerate((accept or "").split(",")):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0
+        if quality > 0:
+            ranges.append((-quality, i, media_type.lower()))
+
+    for _, _, media_type in sorted(ranges):
+        if media_type in MEDIA_TYPES:
+            return media_type
+        if media_type in ("*/*", "application/*"):
+            return JSON
+    return JSON
+
+
+def json_values(column: pd.Series, type_: Any) -> list[Any]:
+    """Convert a column to the python values the response model would make of
+    it, with None for missing values
+
+    :param column: The column
+    :param type_: The type of the column in the response schema
+    :returns: List of values
+    """
+    missing = column.isna().to_numpy()
+    if type_ in (int, bool) and column.dtype.kind == "f":
+        # missing values turn int columns into floats, pydantic truncates them
+        column = column.fillna(0).astype(type_)
+    elif type_ is float and column.dtype.kind in "iub":
+        column = column.astype(float)
+    elif type_ is date and column.dtype.kind == "M":
+        column = column.dt.date
+    values = column.tolist()
+    if missing.any():
+        values = [None if m else value for value, m in zip(values, missing)]
+    return values
+
+
+def json_body(frame: pd.DataFrame, schema: type[BaseModel]) -> bytes:
+    """Encode the rows of a DataFrame as a JSON array of objects with the
+    fields of a schema
+
+    :param frame: The DataFrame
+    :param schema: The response schema of the rows
+    :returns: The JSON
+    """
+    names = list(schema.__fields__)
+    values = [
+        json_values(frame[name], schema.__fields__[name].type_)
+        if name in frame
+        else [None] * len(frame)
+        for name in names
+    ]
+    return orjson.dumps([dict(zip(names, row)) for row in zip(*values)])
+
+
+def arrow_stream(frame: pd.DataFrame) -> Iterator[bytes]:
+    """Write a DataFrame in the Arrow IPC streaming format
+
+    :param frame: The DataFrame
+    :returns: Iterator of the bytes of the schema and each record batch
+    """
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    buffer = io.BytesIO()
+    with pa.ipc.new_stream(buffer, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=BATCH_SIZE):
+            writer.write_batch(batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    # schema of an empty table and the end of stream marker
+    yield buffer.getvalue()
+
+
+def csv_stream(frame: pd.DataFrame) -> Iterator[str]:
+    """Write a DataFrame as CSV
+
+    :param frame: The DataFrame
+    :returns: Iterator of the header and chunks of rows
+    """
+    yield frame.head(0).to_csv(index=False)
+    for start in range(0, len(frame), BATCH_SIZE):
+        chunk = frame.iloc[start : start + BATCH_SIZE]
+        yield chunk.to_csv(index=False, header=False)
+
+
+async def render(page: Page, media_type: str, validate: bool = False) -> Response:
+    """Render a page of rows
+
+    :param page: The page
+    :param media_type: The media type picked by negotiate
+    :param validate: Validate the rows with the response schema instead of
+        encoding JSON directly
+    :returns: The response
+    """
+    if media_type == JSON:
+        if validate:
+            return await run_in_threadpool(page.validated)
+        body = await run_in_threadpool(page.json)
+        return Response(body, media_type=JSON)
+
+    frame = page.frame[page.columns]
+    stream = arrow_stream if media_type == ARROW else csv_stream
+    # starlette iterates the stream in the threadpool
+    return StreamingResponse(stream(frame), media_type=media_type)
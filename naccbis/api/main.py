@@ -1,119 +1,235 @@
 from datetime import date
-from typing import Iterator, Optional
+from typing import AsyncIterator, Optional
 
-from fastapi import Depends, FastAPI
-from sqlalchemy.orm import Session
+import pandas as pd
+from fastapi import Depends, FastAPI, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
 
 from naccbis import __version__
 from naccbis.common import metrics
 
-from . import queries, schemas
-from .database import SessionLocal
+from . import formats, pagination, queries, schemas
+from .cache import ResponseCache, cached
+from .config import get_settings
+from .database import AsyncSessionLocal
 
 app = FastAPI(version=__version__)
+settings = get_settings()
+cache = ResponseCache(
+    settings.api_cache_size,
+    settings.api_cache_ttl,
+    settings.api_cache_version_interval,
+    settings.api_max_age,
+    settings.api_validate_responses,
+)
 
 
 # Dependency
-def get_db() -> Iterator[Session]:
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+# The queries module builds the select statements, which are executed on the
+# event loop. The DataFrames are built from the rows in the threadpool, as are
+# the metrics. Only the reflection of the leaderboard tables runs synchronously
+# through AsyncSession.run_sync. The list endpoints return a Page of rows,
+# which the cached decorator renders in the format the client accepts.
+
+
+async def read_frame(db: AsyncSession, q: Select) -> pd.DataFrame:
+    """Execute a select statement and build a DataFrame of its rows the way
+    pd.read_sql_query does
+    """
+    result = await db.execute(q)
+    columns = list(result.keys())
+    rows = result.all()
+    return await run_in_threadpool(
+        pd.DataFrame.from_records, rows, columns=columns, coerce_float=True
+    )
+
+
+async def with_offensive_metrics(
+    db: AsyncSession, data: pd.DataFrame, season: Optional[int], split: str
+) -> pd.DataFrame:
+    """Add the season-relative offensive metrics to the rows that weren't
+    cleaned with them. The league totals are only queried if there are any.
+    """
+    if not data[metrics.SEASON_OFFENSIVE_METRICS].isna().all(axis=1).any():
+        return data
+    totals = await read_frame(db, queries.select_league_offense(season, split))
+    return await run_in_threadpool(metrics.fill_season_offensive_metrics, data, totals)
 
 
 @app.get("/ping")
-def ping():
+async def ping():
     return "pong"
 
 
-@app.get("/batters/", response_model=list[schemas.BattersSchema])
-def read_batters(
+@app.get(
+    "/batters/",
+    response_model=list[schemas.BattersSchema],
+)
+@cached(cache)
+async def read_batters(
     season: Optional[int] = None,
     team: Optional[str] = None,
     split: str = "overall",
     min_pa: int = 0,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description=pagination.FIELDS_DESCRIPTION),
+    limit: Optional[int] = Query(None, ge=1, le=pagination.MAX_LIMIT),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
 ):
-    batters = queries.get_batters(db, season, team, split, min_pa)
-    totals = queries.get_league_offense(db, season, split)
-    df = metrics.multi_season(batters, totals, metrics.season_offensive_metrics_rar)
-    return [row for row in df.itertuples(index=False)]
-
-
-@app.get("/pitchers/", response_model=list[schemas.PitchersSchema])
-def read_pitchers(
+    keys = queries.PLAYER_KEYS
+    columns = pagination.select_fields(fields, schemas.BattersSchema, keys)
+    after = pagination.decode_cursor(cursor, schemas.BattersSchema, keys)
+    # the metrics may have to be filled in from the other columns
+    fill = columns is None or any(
+        c in metrics.SEASON_OFFENSIVE_METRICS for c in columns
+    )
+    q = await db.run_sync(
+        queries.select_batters,
+        season,
+        team,
+        split,
+        min_pa,
+        None if fill else columns,
+        limit,
+        after,
+    )
+    batters = await read_frame(db, q)
+    if fill:
+        batters = await with_offensive_metrics(db, batters, season, split)
+    if columns:
+        batters = batters[columns]
+    next_cursor = pagination.next_cursor(batters, keys, limit)
+    schema = pagination.project(schemas.BattersSchema, columns)
+    return formats.Page(batters, schema, next_cursor)
+
+
+@app.get(
+    "/pitchers/",
+    response_model=list[schemas.PitchersSchema],
+)
+@cached(cache)
+async def read_pitchers(
     season: Optional[int] = None,
     team: Optional[str] = None,
     split: str = "overall",
     min_ip: int = 0,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description=pagination.FIELDS_DESCRIPTION),
+    limit: Optional[int] = Query(None, ge=1, le=pagination.MAX_LIMIT),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
 ):
-    return queries.get_pitchers(db, season, team, split, min_ip)
+    keys = queries.PLAYER_KEYS
+    columns = pagination.select_fields(fields, schemas.PitchersSchema, keys)
+    after = pagination.decode_cursor(cursor, schemas.PitchersSchema, keys)
+    q = await db.run_sync(
+        queries.select_pitchers, season, team, split, min_ip, columns, limit, after
+    )
+    df = await read_frame(db, q)
+    next_cursor = pagination.next_cursor(df, keys, limit)
+    schema = pagination.project(schemas.PitchersSchema, columns)
+    return formats.Page(df, schema, next_cursor)
 
 
 @app.get("/team_offense", response_model=list[schemas.TeamOffenseSchema])
-def read_team_offense(
+@cached(cache)
+async def read_team_offense(
     season: Optional[int] = None,
     team: Optional[str] = None,
     split: str = "overall",
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    teams = queries.get_team_offense(db, season, team, split)
-    totals = queries.get_league_offense(db, season, split)
-    df = metrics.multi_season(teams, totals, metrics.season_offensive_metrics_rar)
-    return [row for row in df.itertuples(index=False)]
+    teams = await read_frame(db, queries.select_team_offense(season, team, split))
+    df = await with_offensive_metrics(db, teams, season, split)
+    return formats.Page(df, schemas.TeamOffenseSchema)
 
 
 @app.get("/team_pitching", response_model=list[schemas.TeamPitchingSchema])
-def read_team_pitching(
+@cached(cache)
+async def read_team_pitching(
     season: Optional[int] = None,
     team: Optional[str] = None,
     split: str = "overall",
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    df = queries.get_team_pitching(db, season, team, split)
-    return [row for row in df.itertuples(index=False)]
+    df = await read_frame(db, queries.select_team_pitching(season, team, split))
+    return formats.Page(df, schemas.TeamPitchingSchema)
 
 
 @app.get("/league_offense", response_model=list[schemas.LeagueOffenseSchema])
-def read_league_offense(
-    season: Optional[int] = None, split: str = "overall", db: Session = Depends(get_db)
+@cached(cache)
+async def read_league_offense(
+    season: Optional[int] = None,
+    split: str = "overall",
+    db: AsyncSession = Depends(get_db),
 ):
-    df = queries.get_league_offense(db, season, split)
-    return [row for row in df.itertuples(index=False)]
+    df = await read_frame(db, queries.select_league_offense(season, split))
+    return formats.Page(df, schemas.LeagueOffenseSchema)
 
 
 @app.get("/league_pitching", response_model=list[schemas.LeaguePitchingSchema])
-def read_league_pitching(
-    season: Optional[int] = None, split: str = "overall", db: Session = Depends(get_db)
+@cached(cache)
+async def read_league_pitching(
+    season: Optional[int] = None,
+    split: str = "overall",
+    db: AsyncSession = Depends(get_db),
 ):
-    df = queries.get_league_pitching(db, season, split)
-    return [row for row in df.itertuples(index=False)]
+    df = await read_frame(db, queries.select_league_pitching(season, split))
+    return formats.Page(df, schemas.LeaguePitchingSchema)
 
 
 @app.get("/player/{player_id}", response_model=schemas.PlayerSchema)
-def read_player(player_id: str, db: Session = Depends(get_db)):
-    off = queries.get_player_offense(db, player_id)
-    off_totals = queries.get_player_career_offense(db, player_id)
-    pitch = queries.get_player_pitching(db, player_id)
-    pitch_totals = queries.get_player_career_pitching(db, player_id)
-
-    return {
-        "offense": [value for _, value in off.iterrows()],
-        "offense_career": [value for _, value in off_totals.iterrows()],
-        "pitching": [value for _, value in pitch.iterrows()],
-        "pitching_career": [value for _, value in pitch_totals.iterrows()],
+@cached(cache)
+async def read_player(player_id: str, db: AsyncSession = Depends(get_db)):
+    off = await read_frame(db, queries.select_player_offense(player_id))
+    off_totals = await read_frame(db, queries.select_player_career_offense(player_id))
+    pitch = await read_frame(db, queries.select_player_pitching(player_id))
+    pitch_totals = await read_frame(
+        db, queries.select_player_career_pitching(player_id)
+    )
+    off_totals = await run_in_threadpool(metrics.basic_offensive_metrics, off_totals)
+    pitch_totals = await run_in_threadpool(metrics.basic_pitching_metrics, pitch_totals)
+
+    frames = {
+        "offense": off,
+        "offense_career": off_totals,
+        "pitching": pitch,
+        "pitching_career": pitch_totals,
     }
+    return await run_in_threadpool(
+        lambda: {key: [row for _, row in df.iterrows()] for key, df in frames.items()}
+    )
 
 
-@app.get("/game_log/", response_model=list[schemas.GameLogSchema])
-def read_game_log(
+@app.get(
+    "/game_log/",
+    response_model=list[schemas.GameLogSchema],
+)
+@cached(cache)
+async def read_game_log(
     team: Optional[str] = None,
     season: Optional[int] = None,
     game_date: Optional[date] = None,
     home: Optional[bool] = None,
     split: str = "overall",
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description=pagination.FIELDS_DESCRIPTION),
+    limit: Optional[int] = Query(None, ge=1, le=pagination.MAX_LIMIT),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
 ):
-    return queries.get_game_log(db, team, season, game_date, home)
+    keys = queries.GAME_LOG_KEYS
+    columns = pagination.select_fields(fields, schemas.GameLogSchema, keys)
+    after = pagination.decode_cursor(cursor, schemas.GameLogSchema, keys)
+    q = queries.select_game_log(
+        team, season, game_date, home, split, columns, limit, after
+    )
+    df = await read_frame(db, q)
+    next_cursor = pagination.next_cursor(df, keys, limit)
+    schema = pagination.project(schemas.GameLogSchema, columns)
+    return formats.Page(df, schema, next_cursor)
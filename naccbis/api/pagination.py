@@ -0,0 +1,127 @@
+""" This module provides keyset pagination and field selection for the list
+endpoints
+
+A page ends with the row whose key the cursor of the next page encodes, so the
+next page is queried with an indexed (key) > (cursor) condition instead of an
+offset the database has to count past.
+"""
+import base64
+import json
+from collections.abc import Sequence
+from functools import lru_cache
+from typing import Any, Optional, get_type_hints
+
+import pandas as pd
+from fastapi import HTTPException
+from pydantic import BaseModel, create_model
+
+from . import schemas
+
+MAX_LIMIT = 1000
+
+FIELDS_DESCRIPTION = (
+    "Comma-separated columns to return, the key columns are always returned"
+)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the key of a row as an opaque cursor
+
+    :param values: The values of the key columns
+    :returns: The cursor
+    """
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode()).decode()
+
+
+def decode_cursor(
+    cursor: Optional[str], schema: type[BaseModel], keys: Sequence[str]
+) -> Optional[tuple]:
+    """Decode a cursor created by encode_cursor
+
+    :param cursor: The cursor or None for the first page
+    :param schema: The response schema of the rows, which has the key columns
+    :param keys: The key columns
+    :returns: The values of the key columns or None for the first page
+    :raises HTTPException: If the cursor is invalid
+    """
+    if cursor is None:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    for key, value in zip(keys, values):
+        # the database rejects values of the wrong type, bool is also an int
+        type_ = schema.__fields__[key].type_
+        if not isinstance(value, type_) or isinstance(value, bool):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return tuple(values)
+
+
+def next_cursor(
+    rows: pd.DataFrame, keys: list[str], limit: Optional[int]
+) -> Optional[str]:
+    """Get the cursor of the page after the rows
+
+    :param rows: The rows of the page
+    :param keys: The key columns
+    :param limit: The page size or None if the rows aren't paged
+    :returns: The cursor or None if this is the last page
+    """
+    if limit is None or len(rows) < limit:
+        return None
+    # to_dict converts the numpy scalars to python objects
+    [last] = rows[keys].tail(1).to_dict("records")
+    return encode_cursor(list(last.values()))
+
+
+def select_fields(
+    fields: Optional[str], schema: type[BaseModel], keys: Sequence[str]
+) -> Optional[list[str]]:
+    """Parse the fields query parameter
+
+    :param fields: Comma-separated field names or None for all fields
+    :param schema: The response schema of the rows
+    :param keys: The key columns, which are always selected
+    :returns: The columns in schema order or None for all columns
+    :raises HTTPException: If a field isn't in the schema
+    """
+    if fields is None:
+        return None
+    selected = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = selected - schema.__fields__.keys()
+    if unknown:
+        detail = f"Unknown fields: {', '.join(sorted(unknown))}"
+        raise HTTPException(status_code=422, detail=detail)
+    selected.update(keys)
+    return [name for name in schema.__fields__ if name in selected]
+
+
+def project(
+    schema: type[BaseModel], columns: Optional[Sequence[str]]
+) -> type[BaseModel]:
+    """Get the response schema of rows with the selected columns
+
+    :param schema: The response schema of the rows
+    :param columns: The columns selected by select_fields or None
+    :returns: A schema with only the fields of the columns, which keep their
+        types, or the schema itself if all columns are selected
+    """
+    if columns is None:
+        return schema
+    return _projection(schema, tuple(columns))
+
+
+@lru_cache(maxsize=None)
+def _projection(schema: type[BaseModel], columns: tuple[str, ...]) -> type[BaseModel]:
+    types = get_type_hints(schema)
+    fields: dict[str, Any] = {
+        name: (types[name], ... if field.required else field.default)
+        for name, field in schema.__fields__.items()
+        if name in columns
+    }
+    return create_model(
+        f"{schema.__name__}Fields", __base__=schemas.BaseModel, **fields
+    )
@@ -1,11 +1,10 @@
 from datetime import date
 from typing import Optional, Union
 
-import pandas as pd
-from sqlalchemy import func
+from sqlalchemy import MetaData, Table, func, inspect, select, tuple_
 from sqlalchemy.orm import Session, aliased
+from sqlalchemy.sql import Select
 
-from naccbis.common import metrics
 from naccbis.common.models import (
     BattersConference,
     BattersOverall,
@@ -23,67 +22,185 @@ from naccbis.common.models import (
     TeamPitchingOverall,
 )
 
+# keyset pagination order of the list endpoints
+PLAYER_KEYS = ["season", "team", "lname", "fname"]
+GAME_LOG_KEYS = ["season", "team", "game_num"]
+
+# leaderboard tables reflected by get_leaderboard
+_leaderboards: dict[str, Table] = {}
+
+
+def get_leaderboard(db: Session, name: str) -> Optional[Table]:
+    """Get a leaderboard table created by db/views.sql. The table is reflected
+    the first time it's found. A missing table is looked up again on the next
+    request, so the API uses the table as soon as it's created.
+
+    :param db: Database session
+    :param name: Table name
+    :returns: The table or None if it doesn't exist
+    """
+    if name not in _leaderboards:
+        conn = db.connection()
+        if not inspect(conn).has_table(name):
+            return None
+        _leaderboards[name] = Table(name, MetaData(), autoload_with=conn)
+    return _leaderboards[name]
+
+
+def clear_leaderboards() -> None:
+    """Forget the reflected leaderboard tables, e.g. after they were recreated"""
+    _leaderboards.clear()
+
+
+def select_page(
+    table: Table,
+    keys: list[str],
+    columns: Optional[list[str]],
+    limit: Optional[int],
+    after: Optional[tuple],
+) -> Select:
+    """Select a page of the rows of a table in key order
+
+    :param table: The table
+    :param keys: The key columns
+    :param columns: The columns to select or None for all columns
+    :param limit: The page size or None for all rows
+    :param after: The key of the last row of the previous page or None
+    :returns: The select statement
+    """
+    q = select(*[table.c[c] for c in columns]) if columns else select(table)
+    key_columns = [table.c[key] for key in keys]
+    if after is not None:
+        q = q.where(tuple_(*key_columns) > tuple_(*after))
+    return q.order_by(*key_columns).limit(limit)
+
+
+def select_players(
+    table: Table,
+    season: Optional[int],
+    team: Optional[str],
+    column: str,
+    minimum: int,
+    columns: Optional[list[str]],
+    limit: Optional[int],
+    after: Optional[tuple],
+) -> Select:
+    """Select the players of a batters or pitchers table
+
+    :param table: The table
+    :param season: The season or None for all seasons
+    :param team: The team or None for all teams
+    :param column: Column the players must have a minimum of, e.g. pa
+    :param minimum: The minimum value of the column
+    :param columns: The columns to select or None for all columns
+    :param limit: The page size or None for all players
+    :param after: The key of the last player of the previous page or None
+    :returns: The select statement
+    """
+    q = select_page(table, PLAYER_KEYS, columns, limit, after)
+    q = q.where(table.c[column] >= minimum)
+    if season:
+        q = q.where(table.c.season == season)
+    if team:
+        q = q.where(table.c.team == team)
+    return q
+
 
-def get_batters(
+def select_leaders(
+    db: Session,
+    kind: str,
+    season: Optional[int],
+    team: Optional[str],
+    split: str,
+    column: str,
+    minimum: int,
+    columns: Optional[list[str]] = None,
+    limit: Optional[int] = None,
+    after: Optional[tuple] = None,
+) -> Optional[Select]:
+    """Select the players of a leaderboard table
+
+    :param db: Database session
+    :param kind: batters or pitchers
+    :param season: The season or None for all seasons
+    :param team: The team or None for all teams
+    :param split: The split
+    :param column: Column the players must have a minimum of, e.g. pa
+    :param minimum: The minimum value of the column
+    :param columns: The columns to select or None for all columns
+    :param limit: The page size or None for all players
+    :param after: The key of the last player of the previous page or None
+    :returns: The select statement or None if the leaderboard doesn't exist
+    """
+    split = "overall" if split == "overall" else "conference"
+    table = get_leaderboard(db, f"{kind}_leaderboard_{split}")
+    if table is None:
+        return None
+
+    return select_players(table, season, team, column, minimum, columns, limit, after)
+
+
+def select_batters(
     db: Session,
     season: Optional[int] = None,
     team: Optional[str] = None,
     split: str = "overall",
     min_pa: int = 0,
-):
+    columns: Optional[list[str]] = None,
+    limit: Optional[int] = None,
+    after: Optional[tuple] = None,
+) -> Select:
     table: Union[type[BattersOverall], type[BattersConference]]
     if split == "overall":
         table = BattersOverall
     else:
         table = BattersConference
 
-    q = db.query(table)
-    if season:
-        q = q.filter(table.season == season)
-    if team:
-        q = q.filter(table.team == team)
-    q = q.filter(table.pa >= min_pa)
-    return pd.read_sql_query(q.statement, q.session.connection())
+    page = (columns, limit, after)
+    leaders = select_leaders(db, "batters", season, team, split, "pa", min_pa, *page)
+    if leaders is not None:
+        return leaders
+
+    return select_players(table.__table__, season, team, "pa", min_pa, *page)
 
 
-def get_pitchers(
+def select_pitchers(
     db: Session,
     season: Optional[int] = None,
     team: Optional[str] = None,
     split: str = "overall",
     min_ip: int = 0,
-):
+    columns: Optional[list[str]] = None,
+    limit: Optional[int] = None,
+    after: Optional[tuple] = None,
+) -> Select:
     table: Union[type[PitchersOverall], type[PitchersConference]]
     if split == "overall":
         table = PitchersOverall
     else:
         table = PitchersConference
 
-    q = db.query(table)
-    if season:
-        q = q.filter(table.season == season)
-    if team:
-        q = q.filter(table.team == team)
-    q = q.filter(table.ip >= min_ip)
-    return pd.read_sql_query(q.statement, q.session.connection())
+    page = (columns, limit, after)
+    leaders = select_leaders(db, "pitchers", season, team, split, "ip", min_ip, *page)
+    if leaders is not None:
+        return leaders
+
+    return select_players(table.__table__, season, team, "ip", min_ip, *page)
 
 
-def get_player_offense(db: Session, player_id: str):
-    q = (
-        db.query(BattersOverall)
-        .select_from(BattersOverall)
+def select_player_offense(player_id: str) -> Select:
+    return (
+        select(BattersOverall.__table__)
         .join(PlayerId)
-        .filter(PlayerId.player_id == player_id)
+        .where(PlayerId.player_id == player_id)
         .order_by(BattersOverall.season)
     )
 
-    return pd.read_sql_query(q.statement, q.session.connection())
-
 
-def get_player_career_offense(db: Session, player_id: str):
+def select_player_career_offense(player_id: str) -> Select:
     b = aliased(BattersOverall)
-    q = (
-        db.query(
+    return (
+        select(
             func.sum(b.g).label("g"),
             func.sum(b.pa).label("pa"),
             func.sum(b.ab).label("ab"),
@@ -108,29 +225,23 @@ def get_player_career_offense(db: Session, player_id: str):
         )
         .select_from(b)
         .join(PlayerId)
-        .filter(PlayerId.player_id == player_id)
+        .where(PlayerId.player_id == player_id)
     )
 
-    df = pd.read_sql_query(q.statement, q.session.connection())
-    return metrics.basic_offensive_metrics(df)
 
-
-def get_player_pitching(db: Session, player_id: str):
-    q = (
-        db.query(PitchersOverall)
-        .select_from(PitchersOverall)
+def select_player_pitching(player_id: str) -> Select:
+    return (
+        select(PitchersOverall.__table__)
         .join(PlayerId)
-        .filter(PlayerId.player_id == player_id)
+        .where(PlayerId.player_id == player_id)
         .order_by(PitchersOverall.season)
     )
 
-    return pd.read_sql_query(q.statement, q.session.connection())
-
 
-def get_player_career_pitching(db: Session, player_id: str):
+def select_player_career_pitching(player_id: str) -> Select:
     p = aliased(PitchersOverall)
-    q = (
-        db.query(
+    return (
+        select(
             func.sum(p.g).label("g"),
             func.sum(p.gs).label("gs"),
             func.sum(p.w).label("w"),
@@ -157,107 +268,98 @@ def get_player_career_pitching(db: Session, player_id: str):
         )
         .select_from(p)
         .join(PlayerId)
-        .filter(PlayerId.player_id == player_id)
+        .where(PlayerId.player_id == player_id)
     )
 
-    df = pd.read_sql_query(q.statement, q.session.connection())
-    return metrics.basic_pitching_metrics(df)
-
 
-def get_team_offense(
-    db: Session,
+def select_team_offense(
     season: Optional[int] = None,
     team: Optional[str] = None,
     split: str = "overall",
-):
+) -> Select:
     table: Union[type[TeamOffenseOverall], type[TeamOffenseConference]]
     if split == "overall":
         table = TeamOffenseOverall
     else:
         table = TeamOffenseConference
 
-    q = db.query(table)
+    q = select(table.__table__)
     if season:
-        q = q.filter(table.season == season)
+        q = q.where(table.season == season)
     if team:
-        q = q.filter(table.name == team)
-    q = q.order_by(table.season)
-    return pd.read_sql_query(q.statement, q.session.connection())
+        q = q.where(table.name == team)
+    return q.order_by(table.season)
 
 
-def get_team_pitching(
-    db: Session,
+def select_team_pitching(
     season: Optional[int] = None,
     team: Optional[str] = None,
     split: str = "overall",
-):
+) -> Select:
     table: Union[type[TeamPitchingOverall], type[TeamPitchingConference]]
     if split == "overall":
         table = TeamPitchingOverall
     else:
         table = TeamPitchingConference
 
-    q = db.query(table)
+    q = select(table.__table__)
     if season:
-        q = q.filter(table.season == season)
+        q = q.where(table.season == season)
     if team:
-        q = q.filter(table.name == team)
-    q = q.order_by(table.season)
-    return pd.read_sql_query(q.statement, q.session.connection())
+        q = q.where(table.name == team)
+    return q.order_by(table.season)
 
 
-def get_league_offense(
-    db: Session,
+def select_league_offense(
     season: Optional[int] = None,
     split: str = "overall",
-):
+) -> Select:
     table: Union[type[LeagueOffenseOverall], type[LeagueOffenseConference]]
     if split == "overall":
         table = LeagueOffenseOverall
     else:
         table = LeagueOffenseConference
 
-    q = db.query(table)
+    q = select(table.__table__)
     if season:
-        q = q.filter(table.season == season)
-    q = q.order_by(table.season)
-    return pd.read_sql_query(q.statement, q.session.connection())
+        q = q.where(table.season == season)
+    return q.order_by(table.season)
 
 
-def get_league_pitching(
-    db: Session,
+def select_league_pitching(
     season: Optional[int] = None,
     split: str = "overall",
-):
+) -> Select:
     table: Union[type[LeaguePitchingOverall], type[LeaguePitchingConference]]
     if split == "overall":
         table = LeaguePitchingOverall
     else:
         table = LeaguePitchingConference
 
-    q = db.query(table)
+    q = select(table.__table__)
     if season:
-        q = q.filter(table.season == season)
-    q = q.order_by(table.season)
-    return pd.read_sql_query(q.statement, q.session.connection())
+        q = q.where(table.season == season)
+    return q.order_by(table.season)
 
 
-def get_game_log(
-    db: Session,
+def select_game_log(
     team: Optional[str],
     season: Optional[int],
     game_date: Optional[date],
     home: Optional[bool],
     split: Optional[str] = "overall",
-):
-    q = db.query(GameLog)
+    columns: Optional[list[str]] = None,
+    limit: Optional[int] = None,
+    after: Optional[tuple] = None,
+) -> Select:
+    table = GameLog.__table__
+    q = select_page(table, GAME_LOG_KEYS, columns, limit, after)
     if team:
-        q = q.filter(GameLog.team == team)
+        q = q.where(table.c.team == team)
     if season:
-        q = q.filter(GameLog.season == season)
+        q = q.where(table.c.season == season)
     if game_date:
-        q = q.filter(GameLog.date == game_date)
+        q = q.where(table.c.date == game_date)
     if home:
-        q = q.filter(GameLog.home == home)
-    q = q.order_by(GameLog.season, GameLog.team, GameLog.game_num)
-    return q.all()
+        q = q.where(table.c.home == home)
+    return q
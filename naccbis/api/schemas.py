@@ -7,10 +7,10 @@ from pydantic import validator
 
 
 class BaseModel(PydanticBaseModel):
-    @validator("*")
+    @validator("*", pre=True)
     def change_nan_to_none(cls, v, values, field):  # noqa: N805
-        # pydantic doesn't like pandas NaN
-        if field.outer_type_ is float and isnan(v):
+        # pydantic doesn't like pandas NaN, which are also missing ints
+        if isinstance(v, float) and isnan(v):
             return None
         return v
 
@@ -48,7 +48,7 @@ class OffenseSchema(BaseModel):
     slg: Optional[float]
     ops: Optional[float]
     sar: Optional[float]
-    # advanced stats (not in db)
+    # advanced stats (in db if cleaned with --advanced)
     sbr: Optional[float]
     wsb: Optional[float]
     woba: Optional[float]
@@ -103,7 +103,7 @@ class BattersSchema(BaseModel):
     slg: Optional[float]
     ops: Optional[float]
     sar: Optional[float]
-    # advanced stats (not in db)
+    # advanced stats (in db if cleaned with --advanced)
     sbr: Optional[float]
     wsb: Optional[float]
     woba: Optional[float]
@@ -153,7 +153,7 @@ class TeamOffenseSchema(BaseModel):
     slg: Optional[float]
     ops: Optional[float]
     sar: Optional[float]
-    # advanced stats (not in db)
+    # advanced stats (in db if cleaned with --advanced)
     sbr: Optional[float]
     wsb: Optional[float]
     woba: Optional[float]
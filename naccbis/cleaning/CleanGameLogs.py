@@ -4,7 +4,6 @@ import logging
 import re
 from pathlib import Path
 
-import pandas as pd
 from sqlalchemy.engine import Connection
 
 from naccbis.common import utils
@@ -37,22 +36,31 @@ class GameLogETL:
         self.conn = conn
         self.inseason = inseason
 
-    def extract(self) -> None:
+    def source_tables(self) -> list[str]:
+        """Get the tables this ETL reads from
+
+        :returns: List of table names
+        """
         table = "raw_game_log_hitting"
         if self.inseason:
             table += "_inseason"
+        return [table]
 
-        logging.info("Reading data from %s", table)
-        self.data = pd.read_sql_table(table, self.conn)
-        logging.info("Read %s records from %s", len(self.data), table)
-        if self.year:
-            self.data = self.data[self.data["season"] == self.year]
+    def extract(self) -> None:
+        table = "raw_game_log_hitting"
+        if self.inseason:
+            table += "_inseason"
 
-    def transform(self) -> None:
         columns = ["game_num", "date", "season", "name", "opponent", "score"]
         if self.inseason:
             columns = ["scrape_date"] + columns
-        self.data = self.data[columns]
+
+        logging.info("Reading data from %s", table)
+        self.data = utils.db_read_data(
+            table, self.conn, columns, season=self.year or None
+        )
+
+    def transform(self) -> None:
         self.data["result"] = self.data["score"].apply(self.extract_result)
         # runs scored, runs against
 
@@ -96,8 +104,14 @@ class GameLogETL:
 
         if self.load_db:
             logging.info("Loading data into database")
+            partition = ["season", "scrape_date"] if self.inseason else ["season"]
             utils.db_load_data(
-                self.data, table, self.conn, if_exists="append", index=False
+                self.data,
+                table,
+                self.conn,
+                replace_partition=partition,
+                if_exists="append",
+                index=False,
             )
         else:
             filename = f"{table}.csv"
@@ -21,23 +21,42 @@ class TeamOffenseETL:
         load_db: bool,
         conn: Connection,
         inseason: bool = False,
+        advanced: bool = False,
     ) -> None:
+        if inseason and advanced:
+            raise ValueError("Advanced metrics are only available for final stats")
         self.year = year
         self.split = split
         self.load_db = load_db
         self.conn = conn
         self.inseason = inseason
+        self.advanced = advanced
         self.data: pd.DataFrame
+        self.totals: pd.DataFrame
+
+    def source_tables(self) -> list[str]:
+        """Get the tables this ETL reads from
+
+        :returns: List of table names
+        """
+        table = f"raw_team_offense_{self.split}"
+        if self.inseason:
+            table += "_inseason"
+        tables = [table]
+        if self.advanced:
+            tables.append(f"league_offense_{self.split}")
+        return tables
 
     def extract(self) -> None:
         table = f"raw_team_offense_{self.split}"
         if self.inseason:
             table += "_inseason"
         logging.info("Reading data from %s", table)
-        self.data = pd.read_sql_table(table, self.conn)
-        logging.info("Read %s records from %s", len(self.data), table)
-        if self.year:
-            self.data = self.data[self.data["season"] == self.year]
+        self.data = utils.db_read_data(table, self.conn, season=self.year or None)
+        if self.advanced:
+            self.totals = utils.db_read_data(
+                f"league_offense_{self.split}", self.conn, season=self.year or None
+            )
 
     def transform(self) -> None:
         self.data = metrics.basic_offensive_metrics(self.data)
@@ -80,6 +99,8 @@ class TeamOffenseETL:
         if self.inseason:
             columns.insert(2, "date")
         self.data = self.data[columns]
+        if self.advanced:
+            self.data = metrics.fill_season_offensive_metrics(self.data, self.totals)
 
     def load(self) -> None:
         table = f"team_offense_{self.split}"
@@ -88,8 +109,14 @@ class TeamOffenseETL:
 
         if self.load_db:
             logging.info("Loading data into database")
+            partition = ["season", "date"] if self.inseason else ["season"]
             utils.db_load_data(
-                self.data, table, self.conn, if_exists="append", index=False
+                self.data,
+                table,
+                self.conn,
+                replace_partition=partition,
+                if_exists="append",
+                index=False,
             )
         else:
             filename = f"{table}.csv"
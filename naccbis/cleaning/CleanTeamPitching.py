@@ -31,15 +31,22 @@ class TeamPitchingETL:
         self.inseason = inseason
         self.data: pd.DataFrame
 
+    def source_tables(self) -> list[str]:
+        """Get the tables this ETL reads from
+
+        :returns: List of table names
+        """
+        table = f"raw_team_pitching_{self.split}"
+        if self.inseason:
+            table += "_inseason"
+        return [table]
+
     def extract(self) -> None:
         table = f"raw_team_pitching_{self.split}"
         if self.inseason:
             table += "_inseason"
         logging.info("Reading data from %s", table)
-        self.data = pd.read_sql_table(table, self.conn)
-        logging.info("Read %s records from %s", len(self.data), table)
-        if self.year:
-            self.data = self.data[self.data["season"] == self.year]
+        self.data = utils.db_read_data(table, self.conn, season=self.year or None)
 
     def transform(self) -> None:
         self.data["ip"] = self.data["ip"].apply(CleanFunctions.convert_ip)
@@ -52,8 +59,14 @@ class TeamPitchingETL:
             table += "_inseason"
         if self.load_db:
             logging.info("Loading data into database")
+            partition = ["season", "date"] if self.inseason else ["season"]
             utils.db_load_data(
-                self.data, table, self.conn, if_exists="append", index=False
+                self.data,
+                table,
+                self.conn,
+                replace_partition=partition,
+                if_exists="append",
+                index=False,
             )
         else:
             filename = f"{table}.csv"
@@ -0,0 +1,121 @@
+""" Extract, Transform, Load the batting and pitching leaderboards
+
+The leaderboard tables hold the clean player stats of a split joined with the
+player ids, with the season-relative offensive metrics filled in, so the API
+can serve them with a single indexed query. They are created by db/views.sql
+with the columns of their definitions in the models module.
+"""
+import logging
+
+import pandas as pd
+from sqlalchemy import Table, inspect
+from sqlalchemy.engine import Connection
+
+from naccbis.common import metrics, models, utils
+from naccbis.common.splits import Split
+
+ID_COLUMNS = ["fname", "lname", "team", "season"]
+
+
+def table_names() -> list[str]:
+    """Get the names of the leaderboard tables
+
+    :returns: List of table names
+    """
+    return [
+        leaderboard(kind, split).name
+        for kind in ["batters", "pitchers"]
+        for split in Split
+    ]
+
+
+def leaderboard(kind: str, split: Split) -> Table:
+    """Get the definition of a leaderboard table
+
+    :param kind: batters or pitchers
+    :param split: The split
+    :returns: The table
+    """
+    return models.Base.metadata.tables[f"{kind}_leaderboard_{split}"]
+
+
+def tables_exist(conn: Connection) -> bool:
+    """Determine if the leaderboard tables were created
+
+    :param conn: Database connection
+    :returns: True if all the leaderboard tables exist, False otherwise
+    """
+    inspector = inspect(conn)
+    return all(inspector.has_table(table) for table in table_names())
+
+
+class LeaderboardETL:
+    """ETL class for the batting and pitching leaderboards"""
+
+    def __init__(
+        self, year: int, split: Split, load_db: bool, conn: Connection
+    ) -> None:
+        self.year = year
+        self.split = split
+        self.load_db = load_db
+        self.conn = conn
+        self.batters: pd.DataFrame
+        self.pitchers: pd.DataFrame
+        self.totals: pd.DataFrame
+        self.player_ids: pd.DataFrame
+
+    def source_tables(self) -> list[str]:
+        """Get the tables this ETL reads from
+
+        :returns: List of table names
+        """
+        return [
+            f"batters_{self.split}",
+            f"pitchers_{self.split}",
+            f"league_offense_{self.split}",
+            "player_id",
+        ]
+
+    def extract(self) -> None:
+        season = self.year or None
+        self.batters = utils.db_read_data(
+            f"batters_{self.split}", self.conn, season=season
+        )
+        self.pitchers = utils.db_read_data(
+            f"pitchers_{self.split}", self.conn, season=season
+        )
+        self.totals = utils.db_read_data(
+            f"league_offense_{self.split}", self.conn, season=season
+        )
+        self.player_ids = utils.db_read_data(
+            "player_id", self.conn, ID_COLUMNS + ["player_id"], season=season
+        )
+
+    def transform(self) -> None:
+        self.batters = metrics.fill_season_offensive_metrics(self.batters, self.totals)
+        self.batters = self.batters.merge(self.player_ids, how="left", on=ID_COLUMNS)
+        self.pitchers = self.pitchers.merge(self.player_ids, how="left", on=ID_COLUMNS)
+
+    def load(self) -> None:
+        if not self.load_db:
+            logging.info("Leaderboards are only loaded into the database")
+            return
+
+        logging.info("Loading data into database")
+        for kind, data in [("batters", self.batters), ("pitchers", self.pitchers)]:
+            table = leaderboard(kind, self.split)
+            utils.db_load_data(
+                data[[column.name for column in table.columns]],
+                table.name,
+                self.conn,
+                replace_partition=["season"],
+                if_exists="append",
+                index=False,
+            )
+
+    def run(self) -> None:
+        logging.info("Running %s", type(self).__name__)
+        logging.info("Year: %s Split: %s Load: %s", self.year, self.split, self.load_db)
+        self.extract()
+        self.transform()
+        self.load()
@@ -17,6 +17,30 @@ class LeagueOffenseETL:
     """ETL class for league offense"""
 
     CSV_DIR = Path("csv/")
+    TEAM_COLUMNS = [
+        "season",
+        "g",
+        "pa",
+        "ab",
+        "r",
+        "h",
+        "x2b",
+        "x3b",
+        "hr",
+        "rbi",
+        "bb",
+        "so",
+        "sb",
+        "cs",
+        "hbp",
+        "sf",
+        "sh",
+        "tb",
+        "xbh",
+        "gdp",
+        "go",
+        "fo",
+    ]
 
     def __init__(
         self, year: int, split: Split, load_db: bool, conn: Connection
@@ -28,47 +52,33 @@ class LeagueOffenseETL:
         self.team_data: pd.DataFrame
         self.batters: pd.DataFrame
 
+    def source_tables(self) -> list[str]:
+        """Get the tables this ETL reads from
+
+        :returns: List of table names
+        """
+        return [f"team_offense_{self.split}", f"batters_{self.split}"]
+
     def extract(self) -> None:
-        self.team_data = pd.read_sql_table(f"team_offense_{self.split}", self.conn)
-        if self.year:
-            self.team_data = self.team_data[self.team_data["season"] == self.year]
-        self.batters = pd.read_sql_table(f"batters_{self.split}", self.conn)
-        if self.year:
-            self.batters = self.batters[self.batters["season"] == self.year]
+        self.team_data = utils.db_read_data(
+            f"team_offense_{self.split}",
+            self.conn,
+            self.TEAM_COLUMNS,
+            season=self.year or None,
+        )
+        self.batters = utils.db_read_data(
+            f"batters_{self.split}", self.conn, season=self.year or None
+        )
 
     def transform(self) -> None:
-        cols = [
-            "season",
-            "g",
-            "pa",
-            "ab",
-            "r",
-            "h",
-            "x2b",
-            "x3b",
-            "hr",
-            "rbi",
-            "bb",
-            "so",
-            "sb",
-            "cs",
-            "hbp",
-            "sf",
-            "sh",
-            "tb",
-            "xbh",
-            "gdp",
-            "go",
-            "fo",
-        ]
-
-        totals = self.team_data[cols].groupby("season").sum()
+        totals = self.team_data.groupby("season").sum()
         totals = metrics.basic_offensive_metrics(totals)
 
         totals["lg_r_pa"] = totals["r"] / totals["pa"]
-        totals["bsr_bmult"] = metrics.bsr_bmult(totals)
-        totals["bsr"] = metrics.bsr(totals, bmult=totals["bsr_bmult"])
-        lw = totals.apply(metrics.linear_weights_incr, axis=1)
+        runs = metrics.base_runs(totals)
+        totals["bsr_bmult"] = runs.bmult
+        totals["bsr"] = runs.bsr
+        lw = metrics.linear_weights(totals)
         totals = totals.join(lw)
         ww = metrics.woba_weights(totals, totals["obp"])
         totals = totals.join(ww)
@@ -99,6 +109,7 @@ class LeagueOffenseETL:
                 self.replacement_totals,
                 repl_table_name,
                 self.conn,
+                replace_partition=["season"],
                 if_exists="append",
                 index=True,
             )
@@ -111,7 +122,12 @@ class LeagueOffenseETL:
         if self.load_db:
             logging.info("Loading data into database")
             utils.db_load_data(
-                self.totals, table_name, self.conn, if_exists="append", index=True
+                self.totals,
+                table_name,
+                self.conn,
+                replace_partition=["season"],
+                if_exists="append",
+                index=True,
             )
         else:
             logging.info("Dumping to csv")
@@ -158,6 +174,34 @@ class LeaguePitchingETL:
     """ETL class for league pitching"""
 
     CSV_DIR = Path("csv/")
+    TEAM_COLUMNS = {
+        "overall": [
+            "season",
+            "g",
+            "w",
+            "l",
+            "sv",
+            "cg",
+            "sho",
+            "ip",
+            "h",
+            "r",
+            "er",
+            "bb",
+            "so",
+            "x2b",
+            "x3b",
+            "hr",
+            "ab",
+            "wp",
+            "hbp",
+            "bk",
+            "sf",
+            "sh",
+            "pa",
+        ],
+        "conference": ["season", "g", "ip", "h", "r", "er", "bb", "so", "hr"],
+    }
 
     def __init__(
         self, year: int, split: Split, load_db: bool, conn: Connection
@@ -168,43 +212,29 @@ class LeaguePitchingETL:
         self.conn = conn
         self.team_data: pd.DataFrame
 
+    def source_tables(self) -> list[str]:
+        """Get the tables this ETL reads from
+
+        :returns: List of table names
+        """
+        return [f"team_pitching_{self.split}"]
+
     def extract(self) -> None:
-        self.team_data = pd.read_sql_table(f"team_pitching_{self.split}", self.conn)
-        if self.year:
-            self.team_data = self.team_data[self.team_data["season"] == self.year]
+        self.team_data = utils.db_read_data(
+            f"team_pitching_{self.split}",
+            self.conn,
+            self.TEAM_COLUMNS[str(self.split)],
+            season=self.year or None,
+        )
 
     def transform(self) -> None:
         if self.split == "overall":
-            cols = [
-                "season",
-                "g",
-                "w",
-                "l",
-                "sv",
-                "cg",
-                "sho",
-                "ip",
-                "h",
-                "r",
-                "er",
-                "bb",
-                "so",
-                "x2b",
-                "x3b",
-                "hr",
-                "ab",
-                "wp",
-                "hbp",
-                "bk",
-                "sf",
-                "sh",
-                "pa",
-            ]
-            totals = self.team_data[cols].groupby("season").sum()
+            totals = self.team_data.groupby("season").sum()
             totals = metrics.basic_pitching_metrics(totals)
             totals["lg_r_pa"] = totals["r"] / totals["pa"]
-            totals["bsr_bmult"] = metrics.bsr_pitch_bmult(totals)
-            totals["bsr"] = metrics.bsr_pitch(totals, totals["bsr_bmult"])
+            runs = metrics.base_runs(totals, pitching=True)
+            totals["bsr_bmult"] = runs.bmult
+            totals["bsr"] = runs.bsr
             totals["bsr_9"] = metrics.bsr_9(totals)
             # ra/bf-
             # bsr/bf-
@@ -218,8 +248,7 @@ class LeaguePitchingETL:
             totals["bsr_minus"] = metrics.bsr_minus(totals, totals["bsr_9"])
 
         if self.split == Split.CONFERENCE:
-            cols = ["season", "g", "ip", "h", "r", "er", "bb", "so", "hr"]
-            totals = self.team_data[cols].groupby("season").sum()
+            totals = self.team_data.groupby("season").sum()
             conference = self.split == Split.CONFERENCE
             totals = metrics.basic_pitching_metrics(totals, conference)
             # totals["fip_constant"] = metrics.fip_constant(totals)  # noqa: E800, ERA001
@@ -236,7 +265,12 @@ class LeaguePitchingETL:
         if self.load_db:
             logging.info("Loading data into database")
             utils.db_load_data(
-                self.totals, table_name, self.conn, if_exists="append", index=True
+                self.totals,
+                table_name,
+                self.conn,
+                replace_partition=["season"],
+                if_exists="append",
+                index=True,
             )
         else:
             logging.info("Dumping to csv")
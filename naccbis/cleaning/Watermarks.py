@@ -0,0 +1,136 @@
+""" This module tracks changes to the tables read by the ETLs
+
+A watermark records the row count, checksum and latest date of a source table
+for a season at the time an ETL last ran. If none of the watermarks of an ETL
+changed, the ETL doesn't need to run again.
+"""
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import and_, inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import sqltypes
+
+from naccbis.common.models import EtlWatermark
+
+WATERMARKS = EtlWatermark.__table__
+
+DATE_COLUMNS = ["scrape_date", "date"]
+
+
+@dataclass(frozen=True)
+class Watermark:
+    row_count: int
+    checksum: str
+    max_date: Optional[date] = None
+
+
+def compute_watermark(conn: Connection, table: str, season: int) -> Watermark:
+    """Compute the watermark of a season of a table. Tables without a season
+    column are considered as a whole.
+
+    :param conn: Database connection
+    :param table: Table name
+    :param season: The season
+    :returns: The current watermark
+    """
+    columns = {
+        column["name"]: column["type"] for column in inspect(conn).get_columns(table)
+    }
+    # game logs have a date column that isn't a date
+    date_column = next(
+        (c for c in DATE_COLUMNS if isinstance(columns.get(c), sqltypes.Date)), None
+    )
+    max_date = f'max(t."{date_column}")::date' if date_column else "NULL::date"
+    where = "WHERE t.season = :season" if "season" in columns else ""
+    query = text(
+        f"SELECT count(*), "
+        f"md5(coalesce(string_agg(md5(t::text), '' ORDER BY md5(t::text)), '')), "
+        f'{max_date} FROM "{table}" AS t {where}'
+    )
+    row_count, checksum, max_date_ = conn.execute(query, {"season": season}).one()
+    return Watermark(row_count, checksum, max_date_)
+
+
+def compute_watermarks(
+    conn: Connection, tables: list[str], season: int
+) -> dict[str, Watermark]:
+    """Compute the watermarks of a season of several tables
+
+    :param conn: Database connection
+    :param tables: Table names
+    :param season: The season
+    :returns: Dictionary of table names and watermarks
+    """
+    return {table: compute_watermark(conn, table, season) for table in tables}
+
+
+def stored_watermarks(
+    conn: Connection, etl: str, split: str, season: int
+) -> dict[str, Watermark]:
+    """Get the watermarks recorded the last time an ETL ran
+
+    :param conn: Database connection
+    :param etl: ETL name
+    :param split: The split or an empty string if the ETL isn't split
+    :param season: The season
+    :returns: Dictionary of table names and watermarks
+    """
+    WATERMARKS.create(conn, checkfirst=True)
+    query = WATERMARKS.select().where(
+        and_(
+            WATERMARKS.c.etl == etl,
+            WATERMARKS.c.split == split,
+            WATERMARKS.c.season == season,
+        )
+    )
+    return {
+        row.source: Watermark(row.row_count, row.checksum, row.max_date)
+        for row in conn.execute(query)
+    }
+
+
+def save_watermarks(
+    conn: Connection,
+    etl: str,
+    split: str,
+    season: int,
+    watermarks: dict[str, Watermark],
+) -> None:
+    """Record the watermarks of the tables an ETL read, replacing any previous
+
+    :param conn: Database connection
+    :param etl: ETL name
+    :param split: The split or an empty string if the ETL isn't split
+    :param season: The season
+    :param watermarks: Dictionary of table names and watermarks
+    """
+    WATERMARKS.create(conn, checkfirst=True)
+    now = datetime.now()
+    rows = [
+        {
+            "etl": etl,
+            "split": split,
+            "season": season,
+            "source": source,
+            "row_count": watermark.row_count,
+            "checksum": watermark.checksum,
+            "max_date": watermark.max_date,
+            "updated_at": now,
+        }
+        for source, watermark in watermarks.items()
+    ]
+    transaction = nullcontext() if conn.in_transaction() else conn.begin()
+    with transaction:
+        conn.execute(
+            WATERMARKS.delete().where(
+                and_(
+                    WATERMARKS.c.etl == etl,
+                    WATERMARKS.c.split == split,
+                    WATERMARKS.c.season == season,
+                )
+            )
+        )
+        conn.execute(WATERMARKS.insert(), rows)
@@ -3,4 +3,5 @@ from .CleanIndividualOffense import IndividualOffenseETL  # noqa
 from .CleanIndividualPitching import IndividualPitchingETL  # noqa
 from .CleanTeamOffense import TeamOffenseETL  # noqa
 from .CleanTeamPitching import TeamPitchingETL  # noqa
+from .Leaderboards import LeaderboardETL  # noqa
 from .LeagueTotals import LeagueOffenseETL, LeaguePitchingETL  # noqa
@@ -1,4 +1,6 @@
 """ This module provides metrics and related functions """
+from typing import NamedTuple
+
 import numpy as np
 import pandas as pd
 
@@ -157,62 +159,85 @@ def basic_pitching_metrics(data, conference=False, inplace=False):
 # *********************
 
 
-def bsr(data, bmult=1.0):
-    """Base Runs
-    BsR = A(B/(B+C)) + D
-    requires ab, h, 2b, 3b, hr, bb, hbp, sf, sh, gdp, sb, cs
-    """
+class BaseRuns(NamedTuple):
+    a: np.ndarray
+    b: np.ndarray
+    c: np.ndarray
+    d: np.ndarray
+    bmult: np.ndarray
+    bsr: np.ndarray
 
-    x1b = data["h"] - data["x2b"] - data["x3b"] - data["hr"]
 
-    a = data["h"] + data["bb"] + data["hbp"] - data["hr"] - data["cs"] - data["gdp"]
-    b = (
-        0.777 * x1b
-        + 2.61 * data["x2b"]
-        + 4.29 * data["x3b"]
-        + 2.43 * data["hr"]
-        + 0.03 * (data["bb"] + data["hbp"])
-        + 1.30 * data["sb"]
-        + 0.13 * data["cs"]
-        + 1.08 * data["sh"]
-        + 1.81 * data["sf"]
-        + 0.70 * data["gdp"]
-        - 0.04 * (data["ab"] - data["h"])
-    )
-    c = data["ab"] - data["h"] + data["sh"] + data["sf"]
-    d = data["hr"]
+def base_runs(data, bmult=None, pitching=False):
+    """Base Runs kernel. Computes the A, B, C and D components once and returns
+    them together with the B multiplier and BsR = A(B*bmult/(B*bmult+C)) + D
+
+    :param data: DataFrame or Series of player, team, or league totals
+    :param bmult: B multiplier. If None, the multiplier that makes BsR equal
+                  actual runs scored is used, which requires r.
+    :param pitching: Use the Base Runs formula for pitchers
+    :returns: BaseRuns of NumPy arrays
+    """
 
-    b = b * bmult
+    def col(name):
+        return np.asarray(data[name], dtype=float)
+
+    h, x2b, x3b, hr, ab = col("h"), col("x2b"), col("x3b"), col("hr"), col("ab")
+    x1b = h - x2b - x3b - hr
+    walks = col("bb") + col("hbp")
+
+    if pitching:
+        a = h + walks - hr
+        b = 0.78 * x1b + 2.34 * x2b + 3.9 * x3b + 2.34 * hr + 0.039 * walks
+        c = ab - h
+    else:
+        sb, cs, sh, sf, gdp = col("sb"), col("cs"), col("sh"), col("sf"), col("gdp")
+        a = h + walks - hr - cs - gdp
+        b = (
+            0.777 * x1b
+            + 2.61 * x2b
+            + 4.29 * x3b
+            + 2.43 * hr
+            + 0.03 * walks
+            + 1.30 * sb
+            + 0.13 * cs
+            + 1.08 * sh
+            + 1.81 * sf
+            + 0.70 * gdp
+            - 0.04 * (ab - h)
+        )
+        c = ab - h + sh + sf
+    d = hr
 
-    return a * (b / (b + c)) + d
+    if bmult is None:
+        r = col("r")
+        bmult = c * (d - r) / (r - d - a) / b
+    else:
+        bmult = np.asarray(bmult, dtype=float)
+    b_mult = b * bmult
+    return BaseRuns(a, b, c, d, bmult, a * (b_mult / (b_mult + c)) + d)
 
 
-def bsr_bmult(data):
-    """Base Runs B multiplier"""
+def _wrap(values, data):
+    """Return kernel output in the shape of the input: a Series for a DataFrame
+    and a scalar for a Series of a single row
+    """
+    if isinstance(data, pd.DataFrame):
+        return pd.Series(values, index=data.index)
+    return values[()]
 
-    x1b = data["h"] - data["x2b"] - data["x3b"] - data["hr"]
 
-    a = data["h"] + data["bb"] + data["hbp"] - data["hr"] - data["cs"] - data["gdp"]
-    a = data["h"] + data["bb"] + data["hbp"] - data["hr"] - data["cs"] - data["gdp"]
-    b = (
-        0.777 * x1b
-        + 2.61 * data["x2b"]
-        + 4.29 * data["x3b"]
-        + 2.43 * data["hr"]
-        + 0.03 * (data["bb"] + data["hbp"])
-        + 1.30 * data["sb"]
-        + 0.13 * data["cs"]
-        + 1.08 * data["sh"]
-        + 1.81 * data["sf"]
-        + 0.70 * data["gdp"]
-        - 0.04 * (data["ab"] - data["h"])
-    )
-    c = data["ab"] - data["h"] + data["sh"] + data["sf"]
-    d = data["hr"]
+def bsr(data, bmult=1.0):
+    """Base Runs
+    BsR = A(B/(B+C)) + D
+    requires ab, h, 2b, 3b, hr, bb, hbp, sf, sh, gdp, sb, cs
+    """
+    return _wrap(base_runs(data, bmult).bsr, data)
 
-    b_act = c * (d - data["r"]) / (data["r"] - d - a)
-    b_est = b
-    return b_act / b_est
+
+def bsr_bmult(data):
+    """Base Runs B multiplier"""
+    return _wrap(base_runs(data).bmult, data)
 
 
 def linear_weights_incr(data, incr=0.00000001):
@@ -261,30 +286,111 @@ def linear_weights_incr(data, incr=0.00000001):
     return m_input.apply(lambda row: (bsr(row, bmult) - baseruns) * (1 / incr), axis=1)
 
 
-def woba_weights(data, target):
-    """Calculate the woba weights for hbp, bb, 1b, 2b, 3b, hr
+LW_INPUTS = ["bb", "hbp", "ab", "h", "x2b", "x3b", "hr", "sb", "cs", "sf", "sh", "gdp"]
+
+# change in the inputs caused by each event
+LW_EVENTS = pd.DataFrame(
+    [
+        [0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],  # hbp
+        [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],  # bb
+        [0, 0, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0],  # 1b
+        [0, 0, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0],  # 2b
+        [0, 0, 1, 1, 0, 1, 0, 0, 0, 0, 0, 0],  # 3b
+        [0, 0, 1, 1, 0, 0, 1, 0, 0, 0, 0, 0],  # hr
+        [0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0],  # sb
+        [0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0],  # cs
+        [0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0],  # out
+    ],
+    index=[
+        "lw_hbp",
+        "lw_bb",
+        "lw_x1b",
+        "lw_x2b",
+        "lw_x3b",
+        "lw_hr",
+        "lw_sb",
+        "lw_cs",
+        "lw_out",
+    ],
+    columns=LW_INPUTS,
+)
+
+# partial derivatives of the Base Runs components A, B, C, D w.r.t. the inputs
+BSR_GRADIENT = pd.DataFrame(
+    {
+        "a": [1, 1, 0, 1, 0, 0, -1, 0, -1, 0, 0, -1],
+        "b": [
+            0.03,
+            0.03,
+            -0.04,
+            0.777 + 0.04,
+            2.61 - 0.777,
+            4.29 - 0.777,
+            2.43 - 0.777,
+            1.30,
+            0.13,
+            1.81,
+            1.08,
+            0.70,
+        ],
+        "c": [0, 0, 1, -1, 0, 0, 0, 0, 0, 1, 1, 0],
+        "d": [0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
+    },
+    index=LW_INPUTS,
+)
 
-    :param
-    :returns:
+
+def linear_weights(data):
+    """Calculate Linear Weights from the partial derivatives of Base Runs.
+    This is the limit of linear_weights_incr as incr approaches 0, computed
+    for all rows at once.
+
+    :param data: A DataFrame with league totals
+    :returns: A DataFrame with linear weights
     """
-    data = data.copy()
-    data["x1b"] = data["h"] - data["x2b"] - data["x3b"] - data["hr"]
-    lw = data.loc[:, "lw_hbp":"lw_out"]  # type: ignore
+    runs = base_runs(data)
+    bmult = runs.bmult[:, np.newaxis]
+    a = runs.a[:, np.newaxis]
+    b = runs.b[:, np.newaxis] * bmult
+    c = runs.c[:, np.newaxis]
+
+    # BsR = A * B / (B + C) + D, where B is scaled by bmult
+    grad_a, grad_b, grad_c, grad_d = BSR_GRADIENT.to_numpy().T
+    gradient = (
+        grad_a * b / (b + c)
+        + a * (bmult * grad_b * c - b * grad_c) / (b + c) ** 2
+        + grad_d
+    )
+    return pd.DataFrame(
+        gradient @ LW_EVENTS.to_numpy().T, index=data.index, columns=LW_EVENTS.index
+    )
 
-    # subtract the value of the out
-    lw = (lw.T - lw["lw_out"]).T
 
-    lw.drop(columns=["lw_sb", "lw_cs", "lw_out"], inplace=True)
-    lw.columns = ["hbp", "bb", "x1b", "x2b", "x3b", "hr"]
+WOBA_EVENTS = ["hbp", "bb", "x1b", "x2b", "x3b", "hr"]
 
-    totals = data[["hbp", "bb", "x1b", "x2b", "x3b", "hr"]]
 
-    # calculate the dot product
-    acc = totals.mul(lw).apply(np.sum, axis=1)
-    raw = acc / data["pa"]
-    scale = target / raw
-    ww = (lw.T * scale).T
-    ww.columns = ["ww_hbp", "ww_bb", "ww_x1b", "ww_x2b", "ww_x3b", "ww_hr"]
+def woba_weights(data, target):
+    """Calculate the woba weights for hbp, bb, 1b, 2b, 3b, hr
+
+    :param data: DataFrame of league totals with linear weights
+    :param target: Series of the values league wOBA is scaled to, usually OBP
+    :returns: DataFrame of wOBA weights and the wOBA scale
+    """
+    x1b = data["h"] - data["x2b"] - data["x3b"] - data["hr"]
+    counts = np.column_stack(
+        [data["hbp"], data["bb"], x1b, data["x2b"], data["x3b"], data["hr"]]
+    ).astype(float)
+    lw_cols = [f"lw_{event}" for event in WOBA_EVENTS]
+    # subtract the value of the out
+    lw = data[lw_cols].to_numpy(dtype=float) - data[["lw_out"]].to_numpy(dtype=float)
+
+    raw = np.einsum("ij,ij->i", counts, lw) / data["pa"].to_numpy(dtype=float)
+    scale = np.asarray(target, dtype=float) / raw
+    ww = pd.DataFrame(
+        lw * scale[:, np.newaxis],
+        index=data.index,
+        columns=[f"ww_{event}" for event in WOBA_EVENTS],
+    )
     ww["woba_scale"] = scale
     return ww
 
@@ -406,39 +512,43 @@ def rar(data, replacement_level):
 
 
 def multi_season(data, totals, func, inplace=False):
-    """Calculate metrics for multiple seasons
-
-    :param
-    :returns:
+    """Calculate metrics for multiple seasons. The league totals are aligned to
+    the rows of data by season and func is applied to all seasons at once.
+
+    :param data: A DataFrame with a season column or index level
+    :param totals: A DataFrame of league totals with a season column or index
+    :param func: Calculates the metrics given data and the aligned league totals
+    :param inplace: Kept for backwards compatibility. data is never modified.
+    :returns: A DataFrame sorted by season
     """
-    if not inplace:
-        data = data.copy()
-
-    new_totals = totals.copy()
-    if new_totals.index.name != "season":
-        new_totals = new_totals.set_index("season")
-
-    df = pd.DataFrame()
-    for name, group in data.groupby("season"):
-        temp = pd.DataFrame(group)
+    if totals.index.name != "season":
+        totals = totals.set_index("season")
 
-        # totals_season must be a Series
-        totals_season = new_totals.loc[name]
-        temp = func(temp, totals_season)
-        df = df.append(temp)
+    if "season" in data.columns:
+        seasons = data["season"].to_numpy()
+    else:
+        seasons = data.index.get_level_values("season").to_numpy()
+    order = np.argsort(seasons, kind="stable")
+    data = data.iloc[order].copy()
 
-    return df
+    # raises a KeyError if a season is missing, like indexing a single season
+    totals_season = totals.loc[seasons[order]]
+    totals_season.index = data.index
+    return func(data, totals_season)
 
 
 def season_offensive_metrics(data, totals_season):
     """Calculate offensive metrics for a single season
 
     :param data: A DataFrame of single season data
-    :param totals_season: A Series of league totals
+    :param totals_season: A Series of league totals or a DataFrame of league
+                          totals aligned to data
     :returns: A DataFrame
     """
-    if not isinstance(totals_season, pd.Series):
-        raise TypeError(f"Expected {pd.Series}. Got {type(totals_season)}.")
+    if not isinstance(totals_season, (pd.Series, pd.DataFrame)):
+        raise TypeError(
+            f"Expected {pd.Series} or {pd.DataFrame}. Got {type(totals_season)}."
+        )
     temp = data.copy()
     temp["sbr"] = sbr(temp, totals_season)
     temp["wsb"] = wsb(temp, totals_season["lg_wsb"])
@@ -460,7 +570,8 @@ def season_offensive_metrics_rar(data, totals_season):
     """Calculate offensive metrics for a single season including RAR
 
     :param data: A DataFrame of single season data
-    :param totals_season: A Series of league totals
+    :param totals_season: A Series of league totals or a DataFrame of league
+                          totals aligned to data
     :returns: A DataFrame
     """
     temp = season_offensive_metrics(data, totals_season)
@@ -468,6 +579,44 @@ def season_offensive_metrics_rar(data, totals_season):
     return temp
 
 
+SEASON_OFFENSIVE_METRICS = [
+    "sbr",
+    "wsb",
+    "woba",
+    "wraa",
+    "off",
+    "wrc",
+    "wrc_p",
+    "off_p",
+    "rar",
+]
+
+
+def fill_season_offensive_metrics(data, totals):
+    """Calculate the season-relative offensive metrics (including RAR) of the
+    rows that don't have them yet. Rows of seasons without league totals are
+    left empty.
+
+    :param data: A DataFrame of player or team totals
+    :param totals: A DataFrame of league totals
+    :returns: A DataFrame with the SEASON_OFFENSIVE_METRICS columns
+    """
+    data = data.copy()
+    for column in SEASON_OFFENSIVE_METRICS:
+        if column not in data.columns:
+            data[column] = np.nan
+
+    seasons = totals.index if totals.index.name == "season" else totals["season"]
+    missing = data[SEASON_OFFENSIVE_METRICS].isna().all(axis=1)
+    missing &= data["season"].isin(seasons)
+    if missing.any():
+        filled = multi_season(data[missing], totals, season_offensive_metrics_rar)
+        data.loc[filled.index, SEASON_OFFENSIVE_METRICS] = filled[
+            SEASON_OFFENSIVE_METRICS
+        ]
+    return data
+
+
 def advanced_offensive_metrics(data, totals, inplace=False):
     """Calculate advanced offensive metrics. These metrics do depend on league
     wide metrics.
@@ -477,35 +626,7 @@ def advanced_offensive_metrics(data, totals, inplace=False):
     :param inplace: modify the DataFrame inplace?
     :returns: A DataFrame
     """
-    if not inplace:
-        data = data.copy()
-
-    new_totals = totals.copy()
-    if new_totals.index.name != "season":
-        new_totals = new_totals.set_index("season")
-
-    df = pd.DataFrame()
-    for name, group in data.groupby("season"):
-        temp = pd.DataFrame(group)
-
-        # totals_season must be a Series
-        totals_season = new_totals.loc[name]
-        temp["sbr"] = sbr(group, totals_season)
-        temp["wsb"] = wsb(temp, totals_season["lg_wsb"])
-        temp["woba"] = woba(temp, totals_season)
-        temp["wraa"] = wraa(temp, totals_season["woba"], totals_season["woba_scale"])
-        temp["off"] = off(temp)
-        temp["wrc"] = wrc(
-            temp,
-            totals_season["woba"],
-            totals_season["woba_scale"],
-            totals_season["lg_r_pa"],
-        )
-        temp["wrc_p"] = wrc_p(temp, totals_season["lg_r_pa"])
-        temp["off_p"] = off_p(temp, totals_season["lg_r_pa"])
-        df = df.append(temp)
-
-    return df
+    return multi_season(data, totals, season_offensive_metrics, inplace)
 
 
 # *********************
@@ -553,38 +674,11 @@ def era_minus(data, lg_era):
 
 
 def bsr_pitch(data, bmult=1.0):
-    x1b = data["h"] - data["x2b"] - data["x3b"] - data["hr"]
-
-    a = data["h"] + data["bb"] + data["hbp"] - data["hr"]
-    b = (
-        0.78 * x1b
-        + 2.34 * data["x2b"]
-        + 3.9 * data["x3b"]
-        + 2.34 * data["hr"]
-        + 0.039 * (data["bb"] + data["hbp"])
-    )
-    c = data["ab"] - data["h"]
-    d = data["hr"]
-    return a * (b * bmult / (b * bmult + c)) + d
+    return _wrap(base_runs(data, bmult, pitching=True).bsr, data)
 
 
 def bsr_pitch_bmult(data):
-    x1b = data["h"] - data["x2b"] - data["x3b"] - data["hr"]
-
-    a = data["h"] + data["bb"] + data["hbp"] - data["hr"]
-    b = (
-        0.78 * x1b
-        + 2.34 * data["x2b"]
-        + 3.9 * data["x3b"]
-        + 2.34 * data["hr"]
-        + 0.039 * (data["bb"] + data["hbp"])
-    )
-    c = data["ab"] - data["h"]
-    d = data["hr"]
-
-    b_act = c * (d - data["r"]) / (data["r"] - d - a)
-    b_est = b
-    return b_act / b_est
+    return _wrap(base_runs(data, pitching=True).bmult, data)
 
 
 def bsr_9(data):
@@ -10,6 +10,7 @@ from sqlalchemy import (
     Integer,
     Numeric,
     String,
+    Table,
 )
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.sql import func
@@ -78,6 +79,15 @@ class BattersOverall(Base):
     slg = Column(Numeric)
     ops = Column(Numeric)
     sar = Column(Numeric)
+    sbr = Column(Numeric)
+    wsb = Column(Numeric)
+    woba = Column(Numeric)
+    wraa = Column(Numeric)
+    off = Column(Numeric)
+    wrc = Column(Numeric)
+    wrc_p = Column(Numeric)
+    off_p = Column(Numeric)
+    rar = Column(Numeric)
 
     __table_args__ = (
         ForeignKeyConstraint(
@@ -136,6 +146,15 @@ class BattersConference(Base):
     slg = Column(Numeric)
     ops = Column(Numeric)
     sar = Column(Numeric)
+    sbr = Column(Numeric)
+    wsb = Column(Numeric)
+    woba = Column(Numeric)
+    wraa = Column(Numeric)
+    off = Column(Numeric)
+    wrc = Column(Numeric)
+    wrc_p = Column(Numeric)
+    off_p = Column(Numeric)
+    rar = Column(Numeric)
 
     __table_args__ = (
         ForeignKeyConstraint(
@@ -299,6 +318,15 @@ class TeamOffenseOverall(Base):
     slg = Column(Numeric)
     ops = Column(Numeric)
     sar = Column(Numeric)
+    sbr = Column(Numeric)
+    wsb = Column(Numeric)
+    woba = Column(Numeric)
+    wraa = Column(Numeric)
+    off = Column(Numeric)
+    wrc = Column(Numeric)
+    wrc_p = Column(Numeric)
+    off_p = Column(Numeric)
+    rar = Column(Numeric)
 
 
 class TeamOffenseConference(Base):
@@ -338,6 +366,15 @@ class TeamOffenseConference(Base):
     slg = Column(Numeric)
     ops = Column(Numeric)
     sar = Column(Numeric)
+    sbr = Column(Numeric)
+    wsb = Column(Numeric)
+    woba = Column(Numeric)
+    wraa = Column(Numeric)
+    off = Column(Numeric)
+    wrc = Column(Numeric)
+    wrc_p = Column(Numeric)
+    off_p = Column(Numeric)
+    rar = Column(Numeric)
 
 
 class TeamPitchingOverall(Base):
@@ -873,3 +910,58 @@ class RawGameLogPitching(Base):
     bb = Column(Integer)
     so = Column(Integer)
     hr = Column(Integer)
+
+
+class EtlWatermark(Base):
+    """The state of a source table when an ETL last loaded a season"""
+
+    __tablename__ = "etl_watermarks"
+
+    etl = Column(String(30), primary_key=True)
+    split = Column(String(10), primary_key=True)
+    season = Column(Integer, primary_key=True)
+    source = Column(String(50), primary_key=True)
+    row_count = Column(Integer, nullable=False)
+    checksum = Column(String(32), nullable=False)
+    max_date = Column(Date)
+    updated_at = Column(DateTime, nullable=False)
+
+
+class DataVersion(Base):
+    """Bumped by the cleaning controller whenever it loads a season"""
+
+    __tablename__ = "data_versions"
+
+    season = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
+
+
+def leaderboard_table(name: str, stats: Any) -> Table:
+    """Define a leaderboard table: the columns of a clean player stats table
+    followed by the player id. db/views.sql creates the tables with the same
+    columns.
+
+    :param name: Table name
+    :param stats: The model of the clean player stats
+    :returns: The table
+    """
+    columns = [
+        Column(column.name, column.type, primary_key=column.primary_key)
+        for column in stats.__table__.columns
+    ]
+    return Table(name, Base.metadata, *columns, Column("player_id", String(10)))
+
+
+BATTERS_LEADERBOARD_OVERALL = leaderboard_table(
+    "batters_leaderboard_overall", BattersOverall
+)
+BATTERS_LEADERBOARD_CONFERENCE = leaderboard_table(
+    "batters_leaderboard_conference", BattersConference
+)
+PITCHERS_LEADERBOARD_OVERALL = leaderboard_table(
+    "pitchers_leaderboard_overall", PitchersOverall
+)
+PITCHERS_LEADERBOARD_CONFERENCE = leaderboard_table(
+    "pitchers_leaderboard_conference", PitchersConference
+)
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseSettings
 
 
@@ -5,6 +7,20 @@ class Settings(BaseSettings):
     app_name: str = "naccbis"
     db_url: str = "postgresql://localhost/naccbisdb"
     log_level: str = "INFO"
+    scrape_workers: int = 4
+    scrape_backoff: float = 1.0
+    scrape_pool_size: int = 10
+    scrape_retries: int = 3
+    scrape_retry_backoff: float = 0.5
+    scrape_parser: str = "html.parser"
+    scrape_cache_dir: Optional[str] = None
+    scrape_cache_ttl: float = 3600
+    scrape_offline: bool = False
+    api_cache_size: int = 256
+    api_cache_ttl: float = 60
+    api_cache_version_interval: float = 5
+    api_max_age: int = 86400
+    api_validate_responses: bool = False
 
     def get_db_url(self) -> str:
         return f"{self.db_url}?application_name={self.app_name}"
@@ -1,18 +1,39 @@
 """ This module provides utility functions """
+import io
 import logging
-from typing import Any, Union
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from datetime import date
+from functools import partial
+from typing import Any, Callable, Iterable, Optional, Sequence, Union
 
 import pandas as pd
-from sqlalchemy import create_engine, event
+from pandas.io.sql import SQLTable
+from sqlalchemy import (
+    MetaData,
+    Table,
+    create_engine,
+    event,
+    func,
+    inspect,
+    select,
+    text,
+)
 from sqlalchemy.engine import Connection, Engine
 from sqlalchemy.engine.url import URL
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql import sqltypes
+
+from naccbis.common.models import DataVersion
+
+LOAD_CHUNKSIZE = 50000
 
 
 @event.listens_for(Engine, "engine_connect")
 def receive_engine_connect(conn, branch):
     logging.info("Successfully connected to database")
-    logging.debug("DSN: %s", conn.connection.dsn)
+    logging.debug("DSN: %s", getattr(conn.connection, "dsn", conn.engine.url))
 
 
 def connect_db(db_url: Union[str, URL]) -> Connection:
@@ -31,17 +52,150 @@ def connect_db(db_url: Union[str, URL]) -> Connection:
     return conn
 
 
+def _copy_field(value: Any) -> str:
+    """Format a value as a CSV field for COPY. NULLs are left unquoted so they
+    can be distinguished from empty strings
+    """
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        # allow integral floats (e.g. from a column with NaNs) in integer columns
+        value = int(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def psql_insert_copy(
+    table: SQLTable, conn: Connection, keys: list[str], data_iter: Iterable[tuple]
+) -> int:
+    """Insert rows with COPY FROM STDIN. Used as the to_sql method for PostgreSQL
+
+    :param table: The pandas table being loaded
+    :param conn: Database connection
+    :param keys: Column names
+    :param data_iter: Rows to insert
+    :returns: Number of rows inserted
+    """
+    buffer = io.StringIO()
+    for row in data_iter:
+        buffer.write(",".join(_copy_field(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    columns = ", ".join(f'"{key}"' for key in keys)
+    name = f'"{table.schema}"."{table.name}"' if table.schema else f'"{table.name}"'
+    with conn.connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {name} ({columns}) FROM STDIN WITH CSV", buffer)
+        return cursor.rowcount
+
+
+def delete_partitions(
+    data: pd.DataFrame, table: str, conn: Connection, columns: Sequence[str]
+) -> int:
+    """Delete the rows of a table that share partition key values with the data,
+    e.g. every row of the seasons contained in the data
+
+    :param data: The data about to be loaded. May contain the keys in its index.
+    :param table: Table name
+    :param conn: Database connection
+    :param columns: Partition key columns
+    :returns: Number of rows deleted
+    """
+    if not inspect(conn).has_table(table):
+        return 0
+    keys = data.reset_index()[list(columns)].drop_duplicates()
+    if keys.empty:
+        return 0
+    condition = " AND ".join(f'"{column}" = :{column}' for column in columns)
+    statement = text(f'DELETE FROM "{table}" WHERE {condition}')
+    result = conn.execute(statement, keys.to_dict("records"))
+    return result.rowcount
+
+
 def db_load_data(
-    data: pd.DataFrame, table: str, conn: Connection, **kwargs: Any
+    data: pd.DataFrame,
+    table: str,
+    conn: Connection,
+    replace_partition: Optional[Sequence[str]] = None,
+    **kwargs: Any,
 ) -> None:
-    """Load DataFrame into database table"""
+    """Load DataFrame into database table. PostgreSQL tables are bulk loaded
+    with COPY, other databases fall back to executemany inserts. Large frames
+    are loaded in chunks of LOAD_CHUNKSIZE rows.
+
+    Loads are idempotent with replace_partition: the existing rows that match
+    the data on the given columns (e.g. ["season"]) are deleted and the data is
+    inserted in a single transaction, so re-running a season rewrites it.
+
+    :param data: The data to load
+    :param table: Table name
+    :param conn: Database connection
+    :param replace_partition: Columns identifying the partitions to replace
+    :param kwargs: Additional arguments for DataFrame.to_sql
+    """
+    if conn.dialect.driver == "psycopg2":
+        kwargs.setdefault("method", psql_insert_copy)
+    kwargs.setdefault("chunksize", LOAD_CHUNKSIZE)
+    if replace_partition:
+        kwargs.setdefault("if_exists", "append")
+    transaction = nullcontext() if conn.in_transaction() else conn.begin()
+    start = time.perf_counter()
     try:
-        data.to_sql(table, conn, **kwargs)
-    except Exception as e:  # pragma: no cover
+        with transaction:
+            if replace_partition:
+                deleted = delete_partitions(data, table, conn, replace_partition)
+                logging.info("Deleted %d existing records from %s", deleted, table)
+            data.to_sql(table, conn, **kwargs)
+    except Exception as e:
         logging.error("Unable to load data into %s table", table)
         logging.error(e)
+        raise
     else:
-        logging.info(f"Successfully loaded {len(data)} records into {table} table")
+        elapsed = time.perf_counter() - start
+        logging.info(
+            "Successfully loaded %d records into %s table in %.2fs (%.0f rows/s)",
+            len(data),
+            table,
+            elapsed,
+            len(data) / elapsed if elapsed else 0,
+        )
+
+
+def db_read_data(
+    table: str,
+    conn: Connection,
+    columns: Optional[Sequence[str]] = None,
+    **filters: Any,
+) -> pd.DataFrame:
+    """Read a database table into a DataFrame. Only the selected columns and the
+    rows matching the filters (e.g. season=2017) are read. Filters with a value
+    of None are ignored. The rows are read at once, since the ETLs transform
+    whole frames.
+
+    :param table: Table name
+    :param conn: Database connection
+    :param columns: Columns to read. Defaults to all columns.
+    :param filters: Column values the rows must match
+    :returns: DataFrame with the same column types as pd.read_sql_table
+    """
+    sql_table = Table(table, MetaData(), autoload_with=conn)
+    selected = [sql_table.c[column] for column in columns or sql_table.c.keys()]
+    query = select(*selected)
+    for column, value in filters.items():
+        if value is not None:
+            query = query.where(sql_table.c[column] == value)
+    parse_dates = [
+        column.name
+        for column in selected
+        if isinstance(column.type, (sqltypes.Date, sqltypes.DateTime))
+    ]
+    data = pd.read_sql(query, conn, parse_dates=parse_dates)
+    # a column of only NULLs can't infer a numeric type
+    for column in selected:
+        numeric = isinstance(column.type, (sqltypes.Integer, sqltypes.Numeric))
+        if numeric and data[column.name].dtype == object:
+            data[column.name] = pd.to_numeric(data[column.name])
+    logging.info("Read %s records from %s", len(data), table)
+    return data
 
 
 def init_logging(level: str) -> None:
@@ -89,3 +243,93 @@ def season_to_year(season: int) -> str:
     :returns: String
     """
     return f"{season - 1}-{season - 2000}"
+
+
+def season_completed(season: int, today: Optional[date] = None) -> bool:
+    """Determine if a season is over. The season is assumed to be over by July
+
+    :param season: The season, e.g. 2017
+    :param today: The current date. Defaults to today.
+    :returns: True if the season is over, False otherwise
+    """
+    today = today or date.today()
+    return today >= date(season, 7, 1)
+
+
+def get_data_versions(conn: Connection) -> dict[int, int]:
+    """Get the data version of each season
+
+    :param conn: Database connection
+    :returns: Dictionary of seasons and versions
+    """
+    if not inspect(conn).has_table(DataVersion.__tablename__):
+        return {}
+    query = select(DataVersion.season, DataVersion.version)
+    return {season: version for season, version in conn.execute(query)}
+
+
+def bump_data_version(conn: Connection, season: int) -> None:
+    """Record that the data of a season changed, e.g. so the API stops serving
+    cached responses of the season
+
+    :param conn: Database connection
+    :param season: The season
+    """
+    table = DataVersion.__table__
+    table.create(conn, checkfirst=True)
+    transaction = nullcontext() if conn.in_transaction() else conn.begin()
+    with transaction:
+        result = conn.execute(
+            table.update()
+            .where(table.c.season == season)
+            .values(version=table.c.version + 1, updated_at=func.now())
+        )
+        if result.rowcount == 0:
+            conn.execute(table.insert().values(season=season, version=1))
+
+
+def run_seasons(
+    func: Callable[[int], None], seasons: list[int], jobs: int = 1
+) -> dict[int, bool]:
+    """Run a function for each season, optionally in a pool of worker processes.
+    Progress is reported in season order and a failed season doesn't stop the
+    remaining seasons.
+
+    :param func: Processes a single season. Must be picklable if jobs > 1.
+    :param seasons: List of seasons
+    :param jobs: Number of seasons to process in parallel
+    :returns: Dictionary of seasons and whether they succeeded
+    """
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(func, season) for season in seasons]
+            return _collect_seasons(seasons, [f.result for f in futures])
+    return _collect_seasons(seasons, [partial(func, season) for season in seasons])
+
+
+def _collect_seasons(
+    seasons: list[int], results: list[Callable[[], None]]
+) -> dict[int, bool]:
+    summary = {}
+    for i, (season, result) in enumerate(zip(seasons, results), start=1):
+        try:
+            result()
+        except Exception:
+            logging.exception("[%d/%d] Season %d failed", i, len(seasons), season)
+            summary[season] = False
+        else:
+            logging.info("[%d/%d] Season %d finished", i, len(seasons), season)
+            summary[season] = True
+    return summary
+
+
+def print_summary(summary: dict[int, bool]) -> None:
+    """Print the outcome of each season to standard out
+
+    :param summary: Dictionary of seasons and whether they succeeded
+    """
+    print("\n--------------------------")
+    print("Summary")
+    for season, success in summary.items():
+        print(f"{season}: {'success' if success else 'FAILED'}")
+    print("--------------------------")
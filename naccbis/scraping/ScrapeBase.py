@@ -1,9 +1,10 @@
 """ This module provides the BaseScraper class """
 import logging
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 from pathlib import Path
-from typing import Optional, Union
+from typing import Callable, Optional, Union
 
 import pandas as pd
 from sqlalchemy.engine import Connection
@@ -11,6 +12,8 @@ from sqlalchemy.engine import Connection
 from naccbis.common import utils
 from naccbis.common.splits import GameLogSplit, Split
 
+from .ScrapeFunctions import TeamScrapeUrl
+
 
 class BaseScraper(ABC):
 
@@ -44,6 +47,8 @@ class BaseScraper(ABC):
         "Wisconsin Lutheran": "WLC",
     }
     TABLES: dict[str, str] = {}
+    PARTITION = ["season"]
+    INSEASON_PARTITION = ["season", "date"]
     VALID_OUTPUT = ["csv", "sql"]
 
     def __init__(
@@ -54,6 +59,7 @@ class BaseScraper(ABC):
         inseason: bool = False,
         verbose: bool = False,
         conn: Optional[Connection] = None,
+        max_workers: int = 1,
     ) -> None:
         """Class constructor
         :param year: The school year. A string.
@@ -61,6 +67,7 @@ class BaseScraper(ABC):
         :param output: Output format. Currently csv and sql.
         :param inseason: Is this scraping taking place in season?
         :param verbose: Print extra information to standard out?
+        :param max_workers: Maximum number of teams to scrape concurrently
         """
         self._name = "Base Scraper"
         self._year = year
@@ -73,12 +80,38 @@ class BaseScraper(ABC):
         self._data = pd.DataFrame()
         self._runnable = True
         self._conn = conn
+        self._max_workers = max_workers
         self._csv_path = Path("csv/")
 
     @abstractmethod
     def run(self) -> None:
         pass
 
+    def _scrape_teams(
+        self,
+        teams: list[TeamScrapeUrl],
+        func: Callable[[TeamScrapeUrl], Optional[pd.DataFrame]],
+    ) -> pd.DataFrame:
+        """Scrape each team with func and combine the results in team order.
+
+        Up to max_workers teams are in flight at once. Requests to the same
+        host are still spaced out by the rate limiter used by get_soup.
+
+        :param teams: The teams to scrape
+        :param func: Scrapes and cleans a single team. Returns None to skip a team.
+        :returns: A DataFrame of all the teams
+        """
+        if self._max_workers > 1:
+            with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                results = list(executor.map(func, teams))
+        else:
+            results = [func(team) for team in teams]
+
+        frames = [df for df in results if df is not None]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
     def info(self) -> None:
         """Print the scraper information to standard out
         :returns: None
@@ -90,6 +123,7 @@ class BaseScraper(ABC):
         if self._verbose:  # pragma: no cover
             print("In-Season:", self._inseason)
             print("Output format:", self._output)
+            print("Max workers:", self._max_workers)
         print("--------------------------")
 
     def export(self) -> None:
@@ -126,11 +160,18 @@ class BaseScraper(ABC):
         if not self._conn:
             raise RuntimeError("Not connected to database. Cannot export data!")
 
+        partition = self.PARTITION
         if self._inseason:
             table_name += "_inseason"
+            partition = self.INSEASON_PARTITION
 
         utils.db_load_data(
-            self._data, table_name, self._conn, if_exists="append", index=False
+            self._data,
+            table_name,
+            self._conn,
+            replace_partition=partition,
+            if_exists="append",
+            index=False,
         )
 
     def get_data(self) -> pd.DataFrame:  # pragma: no cover
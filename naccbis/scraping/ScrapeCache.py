@@ -0,0 +1,128 @@
+""" This module provides an on-disk cache for scraped web pages """
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import date
+from pathlib import Path
+from typing import Optional, Union
+
+import requests
+
+from naccbis.common import utils
+
+YEAR_PATTERN = re.compile(r"/(\d{4}-\d{2})(?:/|$)")
+
+
+@dataclass
+class CachedPage:
+    url: str
+    text: str
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @classmethod
+    def from_response(cls, url: str, response: requests.Response) -> "CachedPage":
+        return cls(
+            url=url,
+            text=response.text,
+            fetched_at=time.time(),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+
+    def validators(self) -> dict[str, str]:
+        """Get the headers for a conditional request that revalidates this page
+
+        :returns: A dictionary of request headers
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def url_season(url: str) -> Optional[int]:
+    """Get the season of a stats page from its URL
+    e.g. url_season(".../bsb/2016-17/leaders") returns 2017
+
+    :param url: The page URL
+    :returns: The season or None if the URL doesn't contain a school year
+    """
+    match = YEAR_PATTERN.search(url)
+    if match is None:
+        return None
+    return utils.year_to_season(match.group(1))
+
+
+class PageCache:
+    """On-disk cache of web pages keyed by URL.
+
+    Pages of a season that were fetched after the season ended never change, so
+    they are served from the cache indefinitely. Any other page is considered
+    fresh for ttl seconds and is then revalidated with a conditional request.
+    In offline mode every cached page is served as-is and nothing is fetched.
+    """
+
+    def __init__(
+        self, directory: Union[str, Path], ttl: float = 3600, offline: bool = False
+    ) -> None:
+        """Class constructor
+        :param directory: Directory to store the cached pages in
+        :param ttl: Number of seconds in-season pages are considered fresh
+        :param offline: Never fetch pages, only serve them from the cache
+        """
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.offline = offline
+
+    def _path(self, url: str) -> Path:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Get a cached page
+
+        :param url: The page URL
+        :returns: The cached page or None if the page isn't cached
+        """
+        path = self._path(url)
+        try:
+            with open(path) as f:
+                return CachedPage(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except (ValueError, TypeError) as e:
+            logging.warning("Ignoring corrupt cache entry %s: %s", path, e)
+            return None
+
+    def put(self, page: CachedPage) -> None:
+        """Add a page to the cache, replacing any previous version
+
+        :param page: The page to cache
+        """
+        path = self._path(page.url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(asdict(page), f)
+        tmp_path.replace(path)
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        """Determine if a cached page can be used without revalidating it
+
+        :param page: The cached page
+        :returns: True if the page is fresh, False otherwise
+        """
+        # only pages fetched after the end of the season are final
+        season = url_season(page.url)
+        fetched_on = date.fromtimestamp(page.fetched_at)
+        if season is not None and utils.season_completed(season, fetched_on):
+            return True
+        return time.time() - page.fetched_at < self.ttl
@@ -3,16 +3,32 @@ some utility functions used in the scraping process.
 """
 import logging
 import re
-from dataclasses import dataclass
-from time import sleep
-from typing import TypeVar
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from functools import cached_property
+from time import monotonic, sleep
+from typing import Callable, Iterator, Optional, TypeVar
+from urllib.parse import urlparse
 
 import pandas as pd
 import requests
 from bs4 import BeautifulSoup, element
+from bs4.builder import builder_registry
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .ScrapeCache import CachedPage, PageCache
 
 T = TypeVar("T", bound="TeamScrapeUrl")
 
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:72.0) Gecko/20100101 Firefox/72.0"
+}
+RETRY_STATUS_CODES = [500, 502, 503, 504]
+PARSER = "html.parser"
+
 
 @dataclass
 class TeamScrapeUrl:
@@ -29,26 +45,303 @@ class TeamScrapeUrl:
         )
 
 
-def get_soup(url: str, backoff: int = 1) -> BeautifulSoup:
-    """Create a BeautifulSoup object from a web page with the requested URL
+@dataclass
+class CatalogedTable:
+    node: element.Tag
+    headers: list[str]
+    signature: frozenset[str]
+
+
+class TableCatalogue:
+    """Index of the tables on a page by their header values.
+
+    The headers of every table are read in a single pass over the document.
+    Lookups by header values only compare the precomputed signatures and are
+    remembered, so asking for the same tables again is a dictionary lookup.
+    """
+
+    def __init__(self, soup: BeautifulSoup) -> None:
+        """Class constructor
+        :param soup: BeautifulSoup object to index
+        """
+        self.tables: list[CatalogedTable] = []
+        for table in soup.find_all("table"):
+            headers = [x.text.strip() for x in table.find_all("th")]
+            signature = frozenset(x.lower() for x in headers)
+            self.tables.append(CatalogedTable(table, headers, signature))
+        self._lookups: dict[frozenset[str], list[int]] = {}
+
+    def find(self, header_values: list[str]) -> list[int]:
+        """Find the tables that contain the specified header values.
+        Note that header value matching is case insensitive.
+
+        :param header_values: A list of header values to search for
+        :returns: A list of table indices. Returns an empty list if table not found.
+        """
+        key = frozenset(x.lower() for x in header_values)
+        if key not in self._lookups:
+            indices = []
+            for i, table in enumerate(self.tables):
+                if key <= table.signature:
+                    indices.append(i)
+                else:
+                    missing_values = key - table.signature
+                    logging.debug(f"Missing values in table {i}: {set(missing_values)}")
+            self._lookups[key] = indices
+        return self._lookups[key]
+
+
+class ParsedPage(BeautifulSoup):
+    """A parsed web page that remembers where its tables are.
+
+    Scrapers look up several tables on the same page. A ParsedPage catalogues
+    its tables only once and the table functions in this module reuse the
+    catalogue. It is otherwise an ordinary BeautifulSoup object.
+    """
+
+    @cached_property
+    def catalogue(self) -> TableCatalogue:
+        """Catalogue of the tables on the page"""
+        return TableCatalogue(self)
+
+    @property
+    def tables(self) -> list[element.Tag]:
+        """All the tables on the page in document order"""
+        return [table.node for table in self.catalogue.tables]
+
+
+class RateLimiter:
+    """Space out requests to the same host to prevent overloading the server.
+
+    A single instance is safe to share between threads. Each call to wait()
+    reserves the next free slot for the host of the URL and sleeps until it
+    arrives, so concurrent scrapers never exceed one request per interval.
+    """
+
+    def __init__(self, interval: float = 1.0) -> None:
+        """Class constructor
+        :param interval: Minimum number of seconds between requests to a host
+        """
+        self.interval = interval
+        self._next_slot: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str, interval: Optional[float] = None) -> None:
+        """Block until a request to the host of the URL is allowed
+
+        :param url: The URL about to be requested
+        :param interval: Override the default interval for this request
+        """
+        if interval is None:
+            interval = self.interval
+        host = urlparse(url).netloc
+        with self._lock:
+            now = monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + interval
+        delay = slot - now
+        if delay > 0:
+            logging.debug("Backing off for %f seconds", delay)
+            sleep(delay)
+
+
+RATE_LIMITER = RateLimiter()
+
+
+class PageStore:
+    """Pages fetched during a scraping run.
+
+    Several scrapers visit the same pages, e.g. every scraper starts with the
+    leaders page and most of them visit every team page. Sharing a PageStore
+    between them means each URL is fetched and parsed only once. Concurrent
+    requests for the same URL wait for the first one to finish.
+    """
+
+    def __init__(self) -> None:
+        self._pages: dict[str, BeautifulSoup] = {}
+        self._url_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.fetched = 0
+        self.reused = 0
+
+    def get(self, url: str, fetch: Callable[[str], BeautifulSoup]) -> BeautifulSoup:
+        """Get a page, fetching it if it isn't stored yet
+
+        :param url: The page URL
+        :param fetch: Fetches and parses the page if necessary
+        :returns: A BeautifulSoup object
+        """
+        with self._lock:
+            url_lock = self._url_locks.setdefault(url, threading.Lock())
+        with url_lock:
+            if url in self._pages:
+                self.reused += 1
+            else:
+                self._pages[url] = fetch(url)
+                self.fetched += 1
+            return self._pages[url]
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_cache: Optional[PageCache] = None
+_page_store: Optional[PageStore] = None
+
+
+def create_session(
+    pool_size: int = 10, retries: int = 3, retry_backoff: float = 0.5
+) -> requests.Session:
+    """Create an HTTP session that keeps connections alive between requests.
+
+    Failed connections and 5xx responses are retried with exponential backoff.
+
+    :param pool_size: Maximum number of pooled connections per host
+    :param retries: Maximum number of retries per request
+    :param retry_backoff: Backoff factor in seconds between retries
+    :returns: A requests Session
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=retry_backoff,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=["GET"],
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def configure_session(
+    pool_size: int = 10, retries: int = 3, retry_backoff: float = 0.5
+) -> None:
+    """Replace the shared session used by get_soup
+
+    :param pool_size: Maximum number of pooled connections per host
+    :param retries: Maximum number of retries per request
+    :param retry_backoff: Backoff factor in seconds between retries
+    """
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = create_session(pool_size, retries, retry_backoff)
+
+
+def get_session() -> requests.Session:
+    """Get the shared session used by get_soup, creating it if necessary"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def configure_parser(parser: str) -> None:
+    """Set the HTML parser used by get_soup, e.g. html.parser or lxml
+
+    :param parser: Name of a parser supported by BeautifulSoup
+    """
+    global PARSER
+    if builder_registry.lookup(parser) is None:
+        raise ValueError(f"HTML parser {parser} is not available. Is it installed?")
+    PARSER = parser
+
+
+def configure_cache(cache: Optional[PageCache]) -> None:
+    """Set the page cache used by get_soup
+
+    :param cache: A PageCache or None to disable caching
+    """
+    global _cache
+    _cache = cache
+
+
+def get_html(url: str, backoff: Optional[float] = None) -> str:
+    """Get the HTML of a web page, going through the page cache if configured
 
     :param url: A string with the requested URL
-    :param backoff: Number of seconds to sleep to prevent overloading the server
-    :returns: A BeautifulSoup object
+    :param backoff: Minimum number of seconds between requests to the same host.
+                    Defaults to the interval of RATE_LIMITER.
+    :returns: The HTML as a string
     """
-    logging.debug("Backing off for %f seconds", backoff)
-    sleep(backoff)  # to prevent overloading the server
+    cache = _cache
+    cached = cache.get(url) if cache is not None else None
+    if cache is not None and cached is not None:
+        if cache.offline or cache.is_fresh(cached):
+            logging.debug("Cache hit " + url)
+            return cached.text
+    if cache is not None and cache.offline:
+        raise RuntimeError(f"Page is not cached and offline mode is enabled: {url}")
+
+    RATE_LIMITER.wait(url, backoff)  # to prevent overloading the server
     logging.debug("GET " + url)
-    headers = {
-        "User-Agent": "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:72.0) Gecko/20100101 Firefox/72.0"
-    }
+    headers = cached.validators() if cached is not None else {}
     try:
-        request = requests.get(url, headers=headers)
+        request = get_session().get(url, headers=headers)
     except requests.exceptions.RequestException:  # pragma: no cover
-        logging.critical("Error: Unable to connect to", url)
+        logging.critical("Error: Unable to connect to %s", url)
         raise
-    text = request.text
-    return BeautifulSoup(text, "html.parser")
+
+    if cache is not None:
+        if cached is not None and request.status_code == 304:
+            logging.debug("Not modified " + url)
+            cache.put(replace(cached, fetched_at=time.time()))
+            return cached.text
+        if request.ok:
+            cache.put(CachedPage.from_response(url, request))
+    return request.text
+
+
+def get_soup(url: str, backoff: Optional[float] = None) -> BeautifulSoup:
+    """Create a BeautifulSoup object from a web page with the requested URL
+
+    :param url: A string with the requested URL
+    :param backoff: Minimum number of seconds between requests to the same host.
+                    Defaults to the interval of RATE_LIMITER.
+    :returns: A ParsedPage parsed with the configured PARSER
+    """
+
+    def fetch(url: str) -> BeautifulSoup:
+        return ParsedPage(get_html(url, backoff), PARSER)
+
+    store = _page_store
+    if store is not None:
+        return store.get(url, fetch)
+    return fetch(url)
+
+
+@contextmanager
+def shared_pages() -> Iterator[PageStore]:
+    """Share the pages fetched by get_soup until the context exits
+
+    :returns: The PageStore holding the pages
+    """
+    global _page_store
+    previous = _page_store
+    store = PageStore()
+    _page_store = store
+    try:
+        yield store
+    finally:
+        _page_store = previous
+        logging.info("Fetched %d pages, reused %d", store.fetched, store.reused)
+
+
+def get_catalogue(soup: BeautifulSoup) -> TableCatalogue:
+    """Get the catalogue of the tables in a BeautifulSoup object
+
+    :param soup: BeautifulSoup object to index
+    :returns: The catalogue of a ParsedPage, otherwise a new TableCatalogue
+    """
+    if isinstance(soup, ParsedPage):
+        return soup.catalogue
+    return TableCatalogue(soup)
 
 
 def get_text(html_tag: element.Tag) -> str:
@@ -77,20 +370,9 @@ def find_table(soup_obj: BeautifulSoup, header_values: list[str]) -> list[int]:
     :param header_values: A list of header values to search for
     :returns: A list of table indices. Returns an empty list if table not found.
     """
-    header_values = [x.lower() for x in header_values]
-
-    indices = []
-    tables = soup_obj.find_all("table")
-    for i, table in enumerate(tables):
-        header = table.find_all("th")
-        columns = [x.text.strip().lower() for x in header]
-        if set(header_values).issubset(set(columns)):
-            indices.append(i)
-        else:
-            missing_values = set(header_values) - set(columns)
-            logging.debug(f"Missing values in table {i}: {missing_values}")
+    indices = get_catalogue(soup_obj).find(header_values)
     logging.debug("Found %d tables with matching headers", len(indices))
-    return indices
+    return list(indices)
 
 
 def scrape_table(
@@ -105,17 +387,16 @@ def scrape_table(
     :param skip_rows: Number of rows to skip on the bottom of the table
     :returns: A DataFrame of the raw scraped table
     """
-    table = soup.find_all("table")[tbl_num - 1]
-    html_th = table.find_all("th")
-    headers = [x.text.strip() for x in html_th]
+    cataloged = get_catalogue(soup).tables[tbl_num - 1]
+    headers = cataloged.headers
 
-    html_rows = table.find_all("tr")
+    html_rows = cataloged.node.find_all("tr")
     rows = html_rows[first_row - 1 : len(html_rows) - skip_rows]
     logging.debug("Found %d table rows", len(rows))
 
-    # Empty DataFrame to add rows to
-    df = pd.DataFrame(columns=headers)
-
+    # Collect all the rows first and build the DataFrame once.
+    # Appending to a DataFrame row by row is quadratic in the number of rows.
+    data = []
     for row in rows:
 
         row_data = [x.text.strip() for x in row.find_all("td")]
@@ -126,11 +407,9 @@ def scrape_table(
             logging.warning("Row length doesn't match header length. Skipping row.")
             continue
 
-        s = pd.Series(row_data, index=headers)
-        d = pd.DataFrame(s).T
-        df = pd.concat([df, d], ignore_index=True)
+        data.append(row_data)
 
-    return df
+    return pd.DataFrame(data, columns=headers, dtype=object)
 
 
 def get_team_list(
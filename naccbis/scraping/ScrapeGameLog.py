@@ -13,6 +13,7 @@ from naccbis.common.splits import GameLogSplit
 
 from . import ScrapeFunctions
 from .ScrapeBase import BaseScraper
+from .ScrapeFunctions import TeamScrapeUrl
 
 
 class GameLogScraper(BaseScraper):
@@ -40,6 +41,7 @@ class GameLogScraper(BaseScraper):
         "pitching": "raw_game_log_pitching",
         "fielding": "raw_game_log_fielding",
     }
+    INSEASON_PARTITION = ["season", "scrape_date"]
 
     def __init__(
         self,
@@ -49,6 +51,7 @@ class GameLogScraper(BaseScraper):
         inseason: bool = False,
         verbose: bool = False,
         conn: Optional[Connection] = None,
+        max_workers: int = 1,
     ) -> None:
         """Class constructor
         :param year: The school year. A string.
@@ -56,8 +59,9 @@ class GameLogScraper(BaseScraper):
         :param output: Output format. Currently csv and sql.
         :param inseason: Is this scraping taking place in season?
         :param verbose: Print extra information to standard out?
+        :param max_workers: Maximum number of teams to scrape concurrently
         """
-        super().__init__(year, split, output, inseason, verbose, conn)
+        super().__init__(year, split, output, inseason, verbose, conn, max_workers)
         self._name = "Game Log Scraper"
         self._data = pd.DataFrame()
         self._runnable = True
@@ -70,20 +74,19 @@ class GameLogScraper(BaseScraper):
             self.BASE_URL, self._year, self.TEAM_IDS
         )
         logging.info("Found %d teams to scrape", len(team_urls))
+        self._data = self._scrape_teams(team_urls, self._scrape_team)
+        self._runnable = False
 
-        # iterate over the teams
-        for team in team_urls:
-            logging.info("Fetching %s", team.team)
-
-            url = f"{self.BASE_URL}{self._year}/{team.url}"
-            team_soup = ScrapeFunctions.get_soup(url)
-            logging.info("Looking for game log table")
-            df = self._scrape(team_soup)
-            logging.info("Cleaning scraped data")
-            df = self._clean(df, team.team)
+    def _scrape_team(self, team: TeamScrapeUrl) -> pd.DataFrame:
+        """Fetch, scrape and clean a single team"""
+        logging.info("Fetching %s", team.team)
 
-            self._data = pd.concat([self._data, df], ignore_index=True)
-        self._runnable = False
+        url = f"{self.BASE_URL}{self._year}/{team.url}"
+        team_soup = ScrapeFunctions.get_soup(url)
+        logging.info("Looking for game log table")
+        df = self._scrape(team_soup)
+        logging.info("Cleaning scraped data")
+        return self._clean(df, team.team)
 
     def _scrape(self, team_soup: BeautifulSoup) -> pd.DataFrame:
         """Scrape game logs for hitting, pitching, fielding"""
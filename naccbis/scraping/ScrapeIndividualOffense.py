@@ -13,6 +13,7 @@ from naccbis.common.splits import Split
 
 from . import ScrapeFunctions
 from .ScrapeBase import BaseScraper
+from .ScrapeFunctions import TeamScrapeUrl
 
 
 class IndividualOffenseScraper(BaseScraper):
@@ -45,6 +46,7 @@ class IndividualOffenseScraper(BaseScraper):
         inseason: bool = False,
         verbose: bool = False,
         conn: Optional[Connection] = None,
+        max_workers: int = 1,
     ) -> None:
         """Class constructor
         :param year: The school year. A string.
@@ -52,8 +54,9 @@ class IndividualOffenseScraper(BaseScraper):
         :param output: Output format. Currently csv and sql.
         :param inseason: Is this scraping taking place in season?
         :param verbose: Print extra information to standard out?
+        :param max_workers: Maximum number of teams to scrape concurrently
         """
-        super().__init__(year, split, output, inseason, verbose, conn)
+        super().__init__(year, split, output, inseason, verbose, conn, max_workers)
         self._name = "Individual Offense Scraper"
         self._data = pd.DataFrame()
         self._runnable = True
@@ -66,22 +69,22 @@ class IndividualOffenseScraper(BaseScraper):
             self.BASE_URL, self._year, self.TEAM_IDS
         )
         logging.info("Found %d teams to scrape", len(team_urls))
-
-        for team in team_urls:
-            logging.info("Fetching %s", team.team)
-
-            url = f"{self.BASE_URL}{self._year}/{team.url}"
-            team_soup = ScrapeFunctions.get_soup(url)
-            if ScrapeFunctions.skip_team(team_soup):
-                continue
-            logging.info("Looking for hitting tables")
-            df = self._scrape(team_soup)
-            logging.info("Cleaning scraped data")
-            df = self._clean(df, team.id)
-            self._data = pd.concat([self._data, df], ignore_index=True)
-
+        self._data = self._scrape_teams(team_urls, self._scrape_team)
         self._runnable = False
 
+    def _scrape_team(self, team: TeamScrapeUrl) -> Optional[pd.DataFrame]:
+        """Fetch, scrape and clean a single team"""
+        logging.info("Fetching %s", team.team)
+
+        url = f"{self.BASE_URL}{self._year}/{team.url}"
+        team_soup = ScrapeFunctions.get_soup(url)
+        if ScrapeFunctions.skip_team(team_soup):
+            return None
+        logging.info("Looking for hitting tables")
+        df = self._scrape(team_soup)
+        logging.info("Cleaning scraped data")
+        return self._clean(df, team.id)
+
     def _scrape(self, team_soup: BeautifulSoup) -> pd.DataFrame:
         """Scrape both the hitting table and extended hitting table and merge"""
 
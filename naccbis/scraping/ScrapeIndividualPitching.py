@@ -14,6 +14,7 @@ from naccbis.common.splits import Split
 
 from . import ScrapeFunctions
 from .ScrapeBase import BaseScraper
+from .ScrapeFunctions import TeamScrapeUrl
 
 
 class IndividualPitchingScraper(BaseScraper):
@@ -65,6 +66,7 @@ class IndividualPitchingScraper(BaseScraper):
         inseason: bool = False,
         verbose: bool = False,
         conn: Optional[Connection] = None,
+        max_workers: int = 1,
     ) -> None:
         """Class constructor
         :param year: The school year. A string.
@@ -72,8 +74,9 @@ class IndividualPitchingScraper(BaseScraper):
         :param output: Output format. Currently csv and sql.
         :param inseason: Is this scraping taking place in season?
         :param verbose: Print extra information to standard out?
+        :param max_workers: Maximum number of teams to scrape concurrently
         """
-        super().__init__(year, split, output, inseason, verbose, conn)
+        super().__init__(year, split, output, inseason, verbose, conn, max_workers)
         self._name = "Individual Pitching Scraper"
         self._data = pd.DataFrame()
         self._runnable = True
@@ -86,21 +89,21 @@ class IndividualPitchingScraper(BaseScraper):
             self.BASE_URL, self._year, self.TEAM_IDS
         )
         logging.info("Found %d teams to scrape", len(team_urls))
+        self._data = self._scrape_teams(team_urls, self._scrape_team)
+        self._runnable = False
 
-        for team in team_urls:
-            logging.info("Fetching %s", team.team)
-
-            url = f"{self.BASE_URL}{self._year}/{team.url}"
-            team_soup = ScrapeFunctions.get_soup(url)
-            if ScrapeFunctions.skip_team(team_soup):
-                continue
-            logging.info("Looking for pitching tables")
-            df = self._scrape(team_soup)
-            logging.info("Cleaning scraped data")
-            df = self._clean(df, team.id)
+    def _scrape_team(self, team: TeamScrapeUrl) -> Optional[pd.DataFrame]:
+        """Fetch, scrape and clean a single team"""
+        logging.info("Fetching %s", team.team)
 
-            self._data = pd.concat([self._data, df], ignore_index=True)
-        self._runnable = False
+        url = f"{self.BASE_URL}{self._year}/{team.url}"
+        team_soup = ScrapeFunctions.get_soup(url)
+        if ScrapeFunctions.skip_team(team_soup):
+            return None
+        logging.info("Looking for pitching tables")
+        df = self._scrape(team_soup)
+        logging.info("Cleaning scraped data")
+        return self._clean(df, team.id)
 
     def _scrape_overall(self, team_soup: BeautifulSoup) -> pd.DataFrame:
         index = 0
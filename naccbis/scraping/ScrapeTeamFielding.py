@@ -33,6 +33,7 @@ class TeamFieldingScraper(BaseScraper):
         inseason: bool = False,
         verbose: bool = False,
         conn: Optional[Connection] = None,
+        max_workers: int = 1,
     ) -> None:
         """Class constructor
         :param year: The school year. A string.
@@ -40,8 +41,9 @@ class TeamFieldingScraper(BaseScraper):
         :param output: Output format. Currently csv and sql.
         :param inseason: Is this scraping taking place in season?
         :param verbose: Print extra information to standard out?
+        :param max_workers: Maximum number of teams to scrape concurrently
         """
-        super().__init__(year, split, output, inseason, verbose, conn)
+        super().__init__(year, split, output, inseason, verbose, conn, max_workers)
         self._name = "Team Fielding Scraper"
         self._data = pd.DataFrame()
         self._runnable = True
@@ -14,6 +14,7 @@ from naccbis.common.splits import Split
 
 from . import ScrapeFunctions
 from .ScrapeBase import BaseScraper
+from .ScrapeFunctions import TeamScrapeUrl
 
 
 class TeamPitchingScraper(BaseScraper):
@@ -66,6 +67,7 @@ class TeamPitchingScraper(BaseScraper):
         inseason: bool = False,
         verbose: bool = False,
         conn: Optional[Connection] = None,
+        max_workers: int = 1,
     ) -> None:
         """Class constructor
         :param year: The school year. A string.
@@ -73,8 +75,9 @@ class TeamPitchingScraper(BaseScraper):
         :param output: Output format. Currently csv and sql.
         :param inseason: Is this scraping taking place in season?
         :param verbose: Print extra information to standard out?
+        :param max_workers: Maximum number of teams to scrape concurrently
         """
-        super().__init__(year, split, output, inseason, verbose, conn)
+        super().__init__(year, split, output, inseason, verbose, conn, max_workers)
         self._name = "Team Pitching Scraper"
         self._data = pd.DataFrame()
         self._runnable = True
@@ -88,16 +91,7 @@ class TeamPitchingScraper(BaseScraper):
                 self.BASE_URL, self._year, self.TEAM_IDS
             )
             logging.info("Found %d teams to scrape", len(team_urls))
-
-            for team in team_urls:
-                logging.info("Fetching %s", team.team)
-                url = f"{self.BASE_URL}{self._year}/{team.url}"
-                team_soup = ScrapeFunctions.get_soup(url)
-                logging.info("Looking for pitching table")
-                df = self._scrape(team_soup)
-                logging.info("Cleaning scraped data")
-                df = self._clean(df, team.team)
-                self._data = pd.concat([self._data, df], ignore_index=True)
+            self._data = self._scrape_teams(team_urls, self._scrape_team)
 
         elif self._split == Split.CONFERENCE:
             logging.info("Fetching teams")
@@ -110,6 +104,16 @@ class TeamPitchingScraper(BaseScraper):
 
         self._runnable = False
 
+    def _scrape_team(self, team: TeamScrapeUrl) -> pd.DataFrame:
+        """Fetch, scrape and clean a single team"""
+        logging.info("Fetching %s", team.team)
+        url = f"{self.BASE_URL}{self._year}/{team.url}"
+        team_soup = ScrapeFunctions.get_soup(url)
+        logging.info("Looking for pitching table")
+        df = self._scrape(team_soup)
+        logging.info("Cleaning scraped data")
+        return self._clean(df, team.team)
+
     def _scrape_overall(self, team_soup: BeautifulSoup) -> pd.DataFrame:
         # find index of pitching table
         table_num1 = ScrapeFunctions.find_table(team_soup, self.PITCHING_COLS)[0]
@@ -1,5 +1,7 @@
 """ This script is the data cleaning controller """
 import logging
+from functools import partial
+from typing import Any
 
 import click
 from sqlalchemy.engine import Connection
@@ -8,10 +10,13 @@ from naccbis.cleaning import (
     GameLogETL,
     IndividualOffenseETL,
     IndividualPitchingETL,
+    LeaderboardETL,
+    Leaderboards,
     LeagueOffenseETL,
     LeaguePitchingETL,
     TeamOffenseETL,
     TeamPitchingETL,
+    Watermarks,
 )
 from naccbis.common import utils
 from naccbis.common.settings import Settings
@@ -51,18 +56,44 @@ A column is added for the scrape date.
 """
 
 
+# ETLs that can materialize the season-relative offensive metrics
+ADVANCED_ETLS = [1, 3]
+# ETLs whose tables feed the leaderboards
+LEADERBOARD_ETLS = {1, 2, 6}
+# clean tables of each split the API serves, by the ETL that writes them
+SERVED_TABLES = {
+    1: "batters",
+    2: "pitchers",
+    3: "team_offense",
+    4: "team_pitching",
+    6: "league_offense",
+    7: "league_pitching",
+}
+
+
 @click.group(help=__doc__)
 def cli():
     pass
 
 
 def run_etls(
-    etl_nums: list[int], year: int, splits: list[Split], load_db: bool, conn: Connection
+    etl_nums: list[int],
+    year: int,
+    splits: list[Split],
+    load_db: bool,
+    conn: Connection,
+    force: bool = True,
+    advanced: bool = False,
 ) -> None:
     """Run ETL's for a given year
 
-    :param
-    :returns:
+    :param etl_nums: List of integers that correspond to the ETLs to be run
+    :param year: The season
+    :param splits: List of splits
+    :param load_db: Load data into database?
+    :param conn: Database connection
+    :param force: Run ETLs even if their source tables haven't changed
+    :param advanced: Materialize the season-relative offensive metrics
     """
     etls = {
         1: IndividualOffenseETL,
@@ -73,16 +104,88 @@ def run_etls(
         7: LeaguePitchingETL,
     }
 
+    refresh_leaderboards = (
+        load_db
+        and not LEADERBOARD_ETLS.isdisjoint(etl_nums)
+        and Leaderboards.tables_exist(conn)
+    )
+    advanced_etls = (
+        [num for num in ADVANCED_ETLS if num in etl_nums] if advanced else []
+    )
+
     for split in splits:
         for num in etl_nums:
             if num in etls.keys():
-                etl = etls[num](year, split, load_db, conn)
-                etl.run()
+                kwargs = {"advanced": True} if num in advanced_etls else {}
+                etl = etls[num](year, split, load_db, conn, **kwargs)
+                run_etl(etl, year, str(split), conn, force)
+
+        # The advanced metrics depend on the league totals, which are calculated
+        # from the clean batters and team tables. Rerun the ETLs if they changed.
+        if load_db and 6 in etl_nums:
+            for num in advanced_etls:
+                etl = etls[num](year, split, load_db, conn, advanced=True)
+                run_etl(etl, year, str(split), conn, force=False)
+
+        if refresh_leaderboards:
+            leaderboard_etl = LeaderboardETL(year, split, load_db, conn)
+            run_etl(leaderboard_etl, year, str(split), conn, force)
 
     # GameLogs don't have any splits
     if 5 in etl_nums:
         game_log_etl = GameLogETL(year, load_db, conn)
-        game_log_etl.run()
+        run_etl(game_log_etl, year, "", conn, force)
+
+
+def run_etl(etl: Any, season: int, split: str, conn: Connection, force: bool) -> None:
+    """Run an ETL unless its source tables haven't changed since it last loaded
+    the season into the database
+
+    :param etl: The ETL
+    :param season: The season
+    :param split: The split or an empty string if the ETL isn't split
+    :param conn: Database connection
+    :param force: Run the ETL even if its source tables haven't changed
+    """
+    if not etl.load_db:
+        etl.run()
+        return
+
+    name = type(etl).__name__
+    watermarks = Watermarks.compute_watermarks(conn, etl.source_tables(), season)
+    if not force:
+        if Watermarks.stored_watermarks(conn, name, split, season) == watermarks:
+            logging.info("Skipping %s %s, source tables haven't changed", name, split)
+            return
+    etl.run()
+    Watermarks.save_watermarks(conn, name, split, season, watermarks)
+
+
+def served_tables(
+    conn: Connection, etl_nums: list[int], splits: list[Split]
+) -> list[str]:
+    """Get the tables the API serves that the ETLs write
+
+    :param conn: Database connection
+    :param etl_nums: List of integers that correspond to the ETLs to be run
+    :param splits: List of splits
+    :returns: List of table names
+    """
+    tables = [
+        f"{SERVED_TABLES[num]}_{split}"
+        for num in etl_nums
+        if num in SERVED_TABLES
+        for split in splits
+    ]
+    if 5 in etl_nums:
+        tables.append("game_log")
+    if not LEADERBOARD_ETLS.isdisjoint(etl_nums) and Leaderboards.tables_exist(conn):
+        tables += [
+            Leaderboards.leaderboard(kind, split).name
+            for kind in ["batters", "pitchers"]
+            for split in splits
+        ]
+    return tables
 
 
 @cli.command(help=FINAL_PARSER_DESCRIPTION)
@@ -104,11 +207,36 @@ def run_etls(
     help="Split choices",
 )
 @click.option("--load", is_flag=True, help="Load data into database")
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Run ETLs even if their source tables haven't changed since the last load",
+)
+@click.option(
+    "--advanced",
+    is_flag=True,
+    help="Materialize wOBA, wRC+, RAR, etc. in the batters and team offense tables",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of seasons to clean in parallel",
+)
 @click.option(
     "-v", "--verbose", is_flag=True, help="Print extra information to standard out"
 )
 def final(
-    year: list[int], stat: tuple[int], split: str, load: bool, verbose: bool
+    year: list[int],
+    stat: tuple[int],
+    split: str,
+    load: bool,
+    force: bool,
+    advanced: bool,
+    jobs: int,
+    verbose: bool,
 ) -> None:
     """Run ETLs for the final subcommand
 
@@ -117,19 +245,58 @@ def final(
     config = Settings(app_name="clean")
     utils.init_logging(config.log_level)
     logging.info("Initializing cleaning controller script")
-    conn = utils.connect_db(config.get_db_url())
 
     if split == "all":
         splits = list(Split)
     else:
         splits = [Split(split)]
 
-    for year_ in year:
-        logging.info("Running ETLs for %s", year_)
-        run_etls(list(stat), year_, splits, load, conn)
-
-    conn.close()
+    clean_season = partial(
+        clean_final_season,
+        etl_nums=list(stat),
+        splits=splits,
+        load_db=load,
+        force=force,
+        advanced=advanced,
+    )
+    summary = utils.run_seasons(clean_season, year, jobs)
+    utils.print_summary(summary)
     logging.info("Cleaning completed")
+    failed = [season for season, success in summary.items() if not success]
+    if failed:
+        raise click.ClickException(f"Failed to clean {len(failed)} season(s)")
+
+
+def clean_final_season(
+    season: int,
+    etl_nums: list[int],
+    splits: list[Split],
+    load_db: bool,
+    force: bool = True,
+    advanced: bool = False,
+) -> None:
+    """Run ETLs for a season with its own database connection
+
+    :param season: The season to clean
+    :param etl_nums: List of integers that correspond to the ETLs to be run
+    :param splits: List of splits
+    :param load_db: Load data into database?
+    :param force: Run ETLs even if their source tables haven't changed
+    :param advanced: Materialize the season-relative offensive metrics
+    """
+    config = Settings(app_name="clean")
+    conn = utils.connect_db(config.get_db_url())
+    try:
+        logging.info("Running ETLs for %s", season)
+        tables = served_tables(conn, etl_nums, splits) if load_db else []
+        before = Watermarks.compute_watermarks(conn, tables, season)
+        run_etls(etl_nums, season, splits, load_db, conn, force, advanced)
+        # let the API know its cached responses of the season are stale, unless
+        # the ETLs reloaded the same rows
+        if Watermarks.compute_watermarks(conn, tables, season) != before:
+            utils.bump_data_version(conn, season)
+    finally:
+        conn.close()
 
 
 @cli.command(help=INSEASON_PARSER_DESCRIPTION)
@@ -1,6 +1,7 @@
 """ This script is the scraping controller """
 import logging
 from datetime import date
+from functools import partial
 from typing import Sequence, Union
 
 import click
@@ -14,10 +15,12 @@ from naccbis.scraping import (
     GameLogScraper,
     IndividualOffenseScraper,
     IndividualPitchingScraper,
+    ScrapeFunctions,
     TeamFieldingScraper,
     TeamOffenseScraper,
     TeamPitchingScraper,
 )
+from naccbis.scraping.ScrapeCache import PageCache
 
 PARSER_EPILOG = """\b
 Examples:
@@ -59,6 +62,27 @@ A column is added for the scrape date.
 """
 
 
+def configure_scraping(config: Settings) -> None:
+    """Configure the HTTP layer shared by all scrapers
+
+    :param config: Settings with the scraping options
+    """
+    ScrapeFunctions.RATE_LIMITER.interval = config.scrape_backoff
+    ScrapeFunctions.configure_session(
+        pool_size=config.scrape_pool_size,
+        retries=config.scrape_retries,
+        retry_backoff=config.scrape_retry_backoff,
+    )
+    ScrapeFunctions.configure_parser(config.scrape_parser)
+    if config.scrape_cache_dir:
+        cache = PageCache(
+            config.scrape_cache_dir,
+            ttl=config.scrape_cache_ttl,
+            offline=config.scrape_offline,
+        )
+        ScrapeFunctions.configure_cache(cache)
+
+
 @click.group(help=__doc__, epilog=PARSER_EPILOG)
 def cli():
     pass
@@ -72,6 +96,7 @@ def run_scrapers(
     inseason: bool,
     verbose: bool,
     conn: Connection,
+    max_workers: int = 1,
 ) -> None:
     """Run selected scrapers for a given year
 
@@ -81,6 +106,7 @@ def run_scrapers(
     :param output: Output type
     :param inseason: Scraping during the season?
     :param verbose: Print extra information to standard out?
+    :param max_workers: Maximum number of teams to scrape concurrently
     """
     scrapers: dict[int, type[BaseScraper]]
     scrapers = {
@@ -91,26 +117,40 @@ def run_scrapers(
         5: TeamFieldingScraper,
     }
 
-    for split in splits:
-        for num in scraper_nums:
-            if num in scrapers.keys():
-                run_scraper = scrapers[num](
-                    year, split, output, inseason, verbose, conn=conn
+    # All the scrapers visit the same pages, so share them
+    with ScrapeFunctions.shared_pages():
+        for split in splits:
+            for num in scraper_nums:
+                if num in scrapers.keys():
+                    run_scraper = scrapers[num](
+                        year,
+                        split,
+                        output,
+                        inseason,
+                        verbose,
+                        conn=conn,
+                        max_workers=max_workers,
+                    )
+                    run_scraper.info()
+                    run_scraper.run()
+                    run_scraper.export()
+
+        # Game logs have special splits
+        if 6 in scraper_nums:
+            for split in list(GameLogSplit):
+                run_scraper = GameLogScraper(
+                    year,
+                    split,
+                    output,
+                    inseason,
+                    verbose,
+                    conn=conn,
+                    max_workers=max_workers,
                 )
                 run_scraper.info()
                 run_scraper.run()
                 run_scraper.export()
 
-    # Game logs have special splits
-    if 6 in scraper_nums:
-        for split in list(GameLogSplit):
-            run_scraper = GameLogScraper(
-                year, split, output, inseason, verbose, conn=conn
-            )
-            run_scraper.info()
-            run_scraper.run()
-            run_scraper.export()
-
 
 @cli.command(help=FINAL_PARSER_DESCRIPTION)
 @click.argument("year", type=utils.parse_year)
@@ -138,11 +178,24 @@ def run_scrapers(
     show_default=True,
     help="Output choices",
 )
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of seasons to scrape in parallel",
+)
 @click.option(
     "-v", "--verbose", is_flag=True, help="Print extra information to standard out"
 )
 def final(
-    year: list[int], stat: tuple[int], split: str, output: str, verbose: bool
+    year: list[int],
+    stat: tuple[int],
+    split: str,
+    output: str,
+    jobs: int,
+    verbose: bool,
 ) -> None:
     """Scrape end of the year final stats
 
@@ -150,30 +203,68 @@ def final(
     """
     config = Settings(app_name="scrape")
     utils.init_logging(config.log_level)
-    conn = utils.connect_db(config.get_db_url())
 
     logging.info("Initializing scraping controller script")
-    years = [utils.season_to_year(x) for x in year]
 
     if split == "all":
         splits = list(Split)
     else:
         splits = [Split(split)]
 
-    for year_ in years:
-        print("\nScraping:", year_, "\n")
+    scrape_season = partial(
+        scrape_final_season,
+        stat=list(stat),
+        splits=splits,
+        output=output,
+        verbose=verbose,
+        jobs=jobs,
+    )
+    summary = utils.run_seasons(scrape_season, year, jobs)
+    utils.print_summary(summary)
+    logging.info("Scraping completed")
+    failed = [season for season, success in summary.items() if not success]
+    if failed:
+        raise click.ClickException(f"Failed to scrape {len(failed)} season(s)")
 
+
+def scrape_final_season(
+    season: int,
+    stat: list[int],
+    splits: list[Split],
+    output: str,
+    verbose: bool,
+    jobs: int = 1,
+) -> None:
+    """Scrape end of the year final stats for a season with its own connection
+
+    :param season: The season to scrape
+    :param stat: List of integers that correspond to the scrapers to be run
+    :param splits: List of splits
+    :param output: Output type
+    :param verbose: Print extra information to standard out?
+    :param jobs: Number of seasons being scraped in parallel
+    """
+    config = Settings(app_name="scrape")
+    configure_scraping(config)
+    # every worker process has its own rate limiter, so share the budget
+    ScrapeFunctions.RATE_LIMITER.interval = config.scrape_backoff * jobs
+
+    year = utils.season_to_year(season)
+    print("\nScraping:", year, "\n")
+    conn = utils.connect_db(config.get_db_url())
+    try:
         run_scrapers(
-            list(stat),
-            year_,
+            stat,
+            year,
             splits,
             output,
             inseason=False,
             verbose=verbose,
             conn=conn,
+            max_workers=config.scrape_workers,
         )
-    conn.close()
-    logging.info("Scraping completed")
+    finally:
+        conn.close()
 
 
 @cli.command(help=INSEASON_PARSER_DESCRIPTION)
@@ -212,6 +303,7 @@ def inseason(stat: tuple[int], split: str, output: str, verbose: bool) -> None:
     config = Settings(app_name="scrape")
     utils.init_logging(config.log_level)
     conn = utils.connect_db(config.get_db_url())
+    configure_scraping(config)
 
     logging.info("Initializing scraping controller script")
     season = date.today().year
@@ -223,7 +315,14 @@ def inseason(stat: tuple[int], split: str, output: str, verbose: bool) -> None:
         splits = [Split(split)]
 
     run_scrapers(
-        list(stat), year, splits, output, inseason=True, verbose=verbose, conn=conn
+        list(stat),
+        year,
+        splits,
+        output,
+        inseason=True,
+        verbose=verbose,
+        conn=conn,
+        max_workers=config.scrape_workers,
     )
     conn.close()
     logging.info("Scraping completed")
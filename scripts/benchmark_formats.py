@@ -0,0 +1,58 @@
+""" Benchmark the response formats of a list endpoint
+
+Start the API, e.g. with the gunicorn config of the Docker image
+
+    gunicorn -c docker/gunicorn_conf.py naccbis.api.main:app
+
+then time fetching a path as JSON, Arrow IPC and CSV and loading it into a
+DataFrame, the way an analytics notebook would:
+
+    python scripts/benchmark_formats.py http://localhost:8000 --path /batters/
+"""
+import io
+import statistics
+import time
+from typing import Callable
+
+import click
+import pandas as pd
+import pyarrow as pa
+import requests
+
+FORMATS: dict[str, tuple[str, Callable[[bytes], pd.DataFrame]]] = {
+    "json": ("application/json", lambda content: pd.read_json(io.BytesIO(content))),
+    "arrow": (
+        "application/vnd.apache.arrow.stream",
+        lambda content: pa.ipc.open_stream(content).read_pandas(),
+    ),
+    "csv": ("text/csv", lambda content: pd.read_csv(io.BytesIO(content))),
+}
+
+
+@click.command(help=__doc__)
+@click.argument("url")
+@click.option("-p", "--path", default="/batters/", show_default=True)
+@click.option("-n", "--repeat", default=10, show_default=True)
+def main(url: str, path: str, repeat: int) -> None:
+    url = url.rstrip("/") + path
+    print(f"{'format':<8}{'rows':>8}{'bytes':>12}{'median ms':>12}{'p90 ms':>10}")
+    with requests.Session() as session:
+        for name, (media_type, read) in FORMATS.items():
+            # the API caches the rows, time the rendering rather than the query
+            headers = {"Accept": media_type, "Accept-Encoding": "identity"}
+            session.get(url, headers=headers).raise_for_status()
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                response = session.get(url, headers=headers)
+                response.raise_for_status()
+                frame = read(response.content)
+                timings.append(time.perf_counter() - start)
+            median = statistics.median(timings) * 1000
+            p90 = statistics.quantiles(timings, n=10)[-1] * 1000
+            size = len(response.content)
+            print(f"{name:<8}{len(frame):>8}{size:>12}{median:>12.1f}{p90:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
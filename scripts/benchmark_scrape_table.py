@@ -0,0 +1,113 @@
+""" Benchmark scrape_table against the row by row implementation it replaced
+
+Scrape with a page cache to record the pages of a season, e.g.
+
+    NACCBIS_SCRAPE_CACHE_DIR=pages naccbis scrape final 2019
+
+then time both implementations on every table of each type in the recorded
+pages:
+
+    python scripts/benchmark_scrape_table.py pages
+"""
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import click
+import pandas as pd
+from bs4 import BeautifulSoup
+from pandas.testing import assert_frame_equal
+
+from naccbis.scraping import (
+    GameLogScraper,
+    IndividualOffenseScraper,
+    IndividualPitchingScraper,
+    ScrapeFunctions,
+)
+from naccbis.scraping.ScrapeCache import CachedPage
+
+# table type: header values, index among the matching tables, first row and
+# number of footer rows, as the scrapers scrape them
+TABLE_TYPES: dict[str, tuple[list[str], int, int, int]] = {
+    "team_hitting": (IndividualOffenseScraper.HITTING_COLS, 0, 2, 2),
+    "conference_hitting": (IndividualOffenseScraper.HITTING_COLS, 1, 2, 2),
+    "team_pitching": (IndividualPitchingScraper.PITCHING_COLS, 0, 2, 2),
+    "conference_pitching": (IndividualPitchingScraper.PITCHING_COLS, 1, 2, 2),
+    "coaches_view": (IndividualPitchingScraper.COACHES_VIEW_COLS, 0, 3, 3),
+    "game_log_hitting": (GameLogScraper.HITTING_COLS, 0, 2, 0),
+    "game_log_pitching": (GameLogScraper.PITCHING_COLS, 0, 2, 0),
+    "game_log_fielding": (GameLogScraper.FIELDING_COLS, 0, 2, 0),
+}
+
+
+def scrape_table_concat(
+    soup: BeautifulSoup, tbl_num: int, first_row: int = 2, skip_rows: int = 0
+) -> pd.DataFrame:
+    """The previous implementation of scrape_table, kept as a baseline"""
+    table = soup.find_all("table")[tbl_num - 1]
+    headers = [x.text.strip() for x in table.find_all("th")]
+    html_rows = table.find_all("tr")
+    rows = html_rows[first_row - 1 : len(html_rows) - skip_rows]
+    df = pd.DataFrame(columns=headers)
+    for row in rows:
+        row_data = [x.text.strip() for x in row.find_all("td")]
+        d = pd.DataFrame(pd.Series(row_data, index=headers)).T
+        df = pd.concat([df, d], ignore_index=True)
+    return df
+
+
+def best_time(
+    func: Callable[..., pd.DataFrame], args: tuple[Any, ...], repeat: int
+) -> float:
+    """Get the shortest of a number of runs of a function in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+@click.command(help=__doc__)
+@click.argument(
+    "directory", type=click.Path(exists=True, file_okay=False, path_type=Path)
+)
+@click.option("-n", "--repeat", default=5, show_default=True)
+def main(directory: Path, repeat: int) -> None:
+    results: dict[str, list[tuple[int, float, float]]] = {}
+    for path in sorted(directory.glob("*/*.json")):
+        with open(path) as f:
+            page = CachedPage(**json.load(f))
+        soup = BeautifulSoup(page.text, ScrapeFunctions.PARSER)
+        for name, (headers, index, first_row, skip_rows) in TABLE_TYPES.items():
+            indices = ScrapeFunctions.find_table(soup, headers)
+            if len(indices) <= index:
+                continue
+            args = (soup, indices[index] + 1, first_row, skip_rows)
+            new = ScrapeFunctions.scrape_table(*args)
+            assert_frame_equal(scrape_table_concat(*args), new)
+            old_time = best_time(scrape_table_concat, args, repeat)
+            new_time = best_time(ScrapeFunctions.scrape_table, args, repeat)
+            results.setdefault(name, []).append((len(new), old_time, new_time))
+
+    if not results:
+        raise click.ClickException(f"No stats tables in the pages in {directory}")
+    print(
+        f"{'table':<20}{'tables':>8}{'rows':>8}{'old ms':>10}{'new ms':>10}"
+        f"{'speedup':>10}"
+    )
+    for name, tables in results.items():
+        rows = sum(t[0] for t in tables)
+        old = sum(t[1] for t in tables) * 1000
+        new = sum(t[2] for t in tables) * 1000
+        speedup = statistics.median(t[1] / t[2] for t in tables)
+        print(
+            f"{name:<20}{len(tables):>8}{rows:>8}{old:>10.1f}{new:>10.1f}"
+            f"{speedup:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+""" Load test the API
+
+Start the API with the gunicorn config of the Docker image, e.g.
+
+    gunicorn -c docker/gunicorn_conf.py naccbis.api.main:app
+
+then measure the requests per second it serves:
+
+    python scripts/load_test.py http://localhost:8000 --concurrency 32
+"""
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+import requests
+
+DEFAULT_PATHS = [
+    "/batters/?season=2010",
+    "/team_offense?season=2010",
+    "/league_offense",
+    "/game_log/?season=2010&team=T1",
+]
+
+
+def worker(url: str, paths: list[str], deadline: float) -> list[float]:
+    """Request the paths in turn until the deadline
+
+    :param url: Base URL of the API
+    :param paths: Paths to request
+    :param deadline: perf_counter value to stop at
+    :returns: List of response times in seconds
+    """
+    latencies = []
+    with requests.Session() as session:
+        while time.perf_counter() < deadline:
+            path = paths[len(latencies) % len(paths)]
+            start = time.perf_counter()
+            response = session.get(url + path)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+@click.command(help=__doc__)
+@click.argument("url")
+@click.option("-c", "--concurrency", default=16, show_default=True)
+@click.option("-d", "--duration", default=20.0, show_default=True, help="Seconds")
+@click.option("-p", "--path", multiple=True, help="Path to request [default: mix]")
+def main(url: str, concurrency: int, duration: float, path: tuple[str]) -> None:
+    paths = list(path) or DEFAULT_PATHS
+    url = url.rstrip("/")
+    # warm up the workers and their connection pools
+    worker(url, paths, time.perf_counter() + 1)
+
+    deadline = time.perf_counter() + duration
+    with ThreadPoolExecutor(concurrency) as executor:
+        futures = [
+            executor.submit(worker, url, paths, deadline) for _ in range(concurrency)
+        ]
+        latencies = [latency for f in futures for latency in f.result()]
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"Requests: {len(latencies)}")
+    print(f"Requests/s: {len(latencies) / duration:.1f}")
+    print(f"Latency p50: {quantiles[49] * 1000:.1f} ms")
+    print(f"Latency p99: {quantiles[98] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,13 @@ from naccbis.common.settings import Settings
 
 NACCBIS_DB_URL = "postgresql:///naccbisdb_test"
 SCHEMA_FILE = "db/schema_dump_2021_09_14.sql"
+MIGRATION_FILES = [
+    "db/migration_2026-10-18_watermarks.sql",
+    "db/migration_2026-10-18_advanced_metrics.sql",
+    "db/migration_2026-10-18_leaderboards.sql",
+    "db/migration_2026-10-18_indexes.sql",
+    "db/migration_2026-10-18_data_versions.sql",
+]
 
 
 @pytest.fixture(scope="session")
@@ -38,6 +45,10 @@ def create_db(db_url: str) -> None:
     with engine.begin() as conn:
         with open(SCHEMA_FILE) as f:
             conn.execute(text(f.read()))
+        print("Applying migrations")
+        for migration in MIGRATION_FILES:
+            with open(migration) as f:
+                conn.execute(text(f.read()))
     conn.close()
 
 
@@ -1,4 +1,6 @@
+import pandas as pd
 import pytest
+from pandas.testing import assert_frame_equal
 from sqlalchemy import text
 
 from naccbis.common import utils
@@ -19,3 +21,100 @@ def test_engine(db_conn):
     assert not db_conn.closed
     result = db_conn.execute(text("select version()")).fetchone()
     assert len(result) == 1
+
+
+@pytest.mark.integration
+def test_db_load_data_copy(db_conn):
+    data = pd.DataFrame(
+        {
+            "name": ["Smith, Jr.", "", None, 'The "Kid"'],
+            "hr": [3.0, None, 12.0, 0.0],
+            "avg": [0.25, 0.333, None, 1.0],
+        }
+    )
+    with db_conn.begin():
+        db_conn.execute(
+            text("CREATE TABLE load_test (name text, hr integer, avg numeric);")
+        )
+    try:
+        with db_conn.begin():
+            utils.db_load_data(
+                data, "load_test", db_conn, if_exists="append", index=False
+            )
+        result = pd.read_sql(
+            text("SELECT name, hr::float, avg::float FROM load_test"), db_conn
+        )
+    finally:
+        with db_conn.begin():
+            db_conn.execute(text("DROP TABLE load_test;"))
+    assert_frame_equal(result, data)
+
+
+@pytest.mark.integration
+def test_db_load_data_replace_partition(db_conn):
+    data = pd.DataFrame(
+        {"season": [2016, 2017], "rs": [100, 120], "ra": [90, 80]}
+    ).set_index("season")
+    with db_conn.begin():
+        db_conn.execute(
+            text(
+                "CREATE TABLE partition_test "
+                "(season integer PRIMARY KEY, rs integer, ra integer);"
+            )
+        )
+    try:
+        # reloading a season must not violate the primary key
+        for _ in range(2):
+            utils.db_load_data(
+                data, "partition_test", db_conn, replace_partition=["season"]
+            )
+        result = pd.read_sql(
+            text("SELECT * FROM partition_test ORDER BY season"), db_conn
+        ).set_index("season")
+    finally:
+        with db_conn.begin():
+            db_conn.execute(text("DROP TABLE partition_test;"))
+    assert_frame_equal(result, data)
+
+
+@pytest.mark.integration
+def test_db_read_data(db_conn):
+    with db_conn.begin():
+        db_conn.execute(
+            text(
+                "CREATE TABLE read_test (name text, season integer, day date, "
+                "g integer, avg numeric);"
+                "INSERT INTO read_test VALUES "
+                "('Smith', 2016, '2016-04-01', 10, 0.25),"
+                "('Jones', 2017, '2017-04-01', NULL, 0.3),"
+                "('Brown', 2017, NULL, 12, NULL);"
+            )
+        )
+    try:
+        expected = pd.read_sql_table("read_test", db_conn)
+        result = utils.db_read_data("read_test", db_conn, season=2017)
+        columns = utils.db_read_data("read_test", db_conn, ["name", "g"], season=None)
+        nulls = utils.db_read_data("read_test", db_conn, ["avg"], name="Brown")
+    finally:
+        with db_conn.begin():
+            db_conn.execute(text("DROP TABLE read_test;"))
+    expected = expected[expected["season"] == 2017].reset_index(drop=True)
+    assert_frame_equal(result, expected)
+    assert columns.columns.tolist() == ["name", "g"]
+    assert len(columns) == 3
+    assert nulls["avg"].dtype == expected["avg"].dtype
+
+
+@pytest.mark.integration
+def test_data_versions(db_conn):
+    transaction = db_conn.begin()
+    try:
+        assert 2016 not in utils.get_data_versions(db_conn)
+        utils.bump_data_version(db_conn, 2016)
+        utils.bump_data_version(db_conn, 2016)
+        utils.bump_data_version(db_conn, 2017)
+        versions = utils.get_data_versions(db_conn)
+    finally:
+        transaction.rollback()
+    assert versions[2016] == 2
+    assert versions[2017] == 1
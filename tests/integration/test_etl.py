@@ -0,0 +1,153 @@
+from typing import Any
+
+import pytest
+from sqlalchemy import inspect, text
+
+from naccbis.cleaning import GameLogETL, LeaderboardETL, Leaderboards, Watermarks
+from naccbis.common import utils
+from naccbis.common.models import BattersOverall, PlayerId
+from naccbis.common.splits import Split
+from naccbis.scripts import clean
+
+
+@pytest.fixture
+def raw_game_logs(db_conn):
+    with db_conn.begin():
+        db_conn.execute(
+            text(
+                "INSERT INTO raw_game_log_hitting "
+                "(game_num, date, season, name, opponent, score) VALUES "
+                "(1, 'Mar 1', 2016, 'MSOE', 'at Aurora', 'W, 5-3'),"
+                "(1, 'Mar 2', 2017, 'MSOE', 'vs. Lakeland', 'L, 2-4'),"
+                "(2, 'Mar 3', 2017, 'MSOE', 'at Aurora', 'W, 7-1');"
+            )
+        )
+    yield
+    with db_conn.begin():
+        db_conn.execute(text("DELETE FROM raw_game_log_hitting;"))
+
+
+@pytest.mark.integration
+@pytest.mark.usefixtures("raw_game_logs")
+def test_game_log_extract_season(db_conn):
+    etl = GameLogETL(2017, False, db_conn)
+    etl.extract()
+    assert etl.data["season"].unique().tolist() == [2017]
+    assert etl.data.columns.tolist() == [
+        "game_num",
+        "date",
+        "season",
+        "name",
+        "opponent",
+        "score",
+    ]
+    etl.transform()
+    assert etl.data["rs"].tolist() == [2, 7]
+
+    etl = GameLogETL(None, False, db_conn)  # type: ignore
+    etl.extract()
+    assert len(etl.data) == 3
+
+
+@pytest.mark.integration
+@pytest.mark.usefixtures("raw_game_logs")
+def test_run_etl_incremental(db_conn, monkeypatch):
+    runs = []
+    monkeypatch.setattr(GameLogETL, "run", lambda self: runs.append(self.year))
+    try:
+        for force in [False, False, True]:
+            clean.run_etl(GameLogETL(2017, True, db_conn), 2017, "", db_conn, force)
+        assert runs == [2017, 2017]
+
+        # changing the season's raw data triggers a rerun, other seasons don't
+        with db_conn.begin():
+            db_conn.execute(
+                text(
+                    "UPDATE raw_game_log_hitting SET score = 'W, 3-2' WHERE game_num = 2"
+                )
+            )
+        clean.run_etl(GameLogETL(2017, True, db_conn), 2017, "", db_conn, False)
+        clean.run_etl(GameLogETL(2016, True, db_conn), 2016, "", db_conn, False)
+        clean.run_etl(GameLogETL(2016, True, db_conn), 2016, "", db_conn, False)
+        assert runs == [2017, 2017, 2017, 2016]
+
+        # ETLs that don't load into the database always run
+        clean.run_etl(GameLogETL(2016, False, db_conn), 2016, "", db_conn, False)
+        assert runs == [2017, 2017, 2017, 2016, 2016]
+    finally:
+        with db_conn.begin():
+            db_conn.execute(text("DELETE FROM etl_watermarks;"))
+
+
+@pytest.fixture
+def clean_players(db_conn):
+    batter: dict[str, Any] = {c.name: 1 for c in BattersOverall.__table__.columns}
+    batter.update(fname="Jon", lname="Doe", team="MSOE", season=2017, woba=0.4)
+    with db_conn.begin():
+        db_conn.execute(
+            PlayerId.__table__.insert(),
+            fname="Jon",
+            lname="Doe",
+            team="MSOE",
+            season=2017,
+            player_id="doejo01",
+        )
+        db_conn.execute(BattersOverall.__table__.insert(), batter)
+    yield
+    with db_conn.begin():
+        for table in ["batters_overall", "batters_leaderboard_overall", "player_id"]:
+            db_conn.execute(text(f"DELETE FROM {table};"))
+
+
+@pytest.mark.integration
+@pytest.mark.usefixtures("clean_players")
+def test_leaderboard_etl(db_conn):
+    assert Leaderboards.tables_exist(db_conn)
+    LeaderboardETL(2017, Split.OVERALL, True, db_conn).run()
+    leaders = utils.db_read_data("batters_leaderboard_overall", db_conn, season=2017)
+    assert leaders[["lname", "player_id", "woba"]].values.tolist() == [
+        ["Doe", "doejo01", 0.4]
+    ]
+
+    # refreshing a season replaces its rows
+    with db_conn.begin():
+        db_conn.execute(text("UPDATE batters_overall SET woba = 0.5;"))
+    LeaderboardETL(2017, Split.OVERALL, True, db_conn).run()
+    leaders = utils.db_read_data("batters_leaderboard_overall", db_conn, season=2017)
+    assert leaders["woba"].tolist() == [0.5]
+
+
+@pytest.mark.integration
+@pytest.mark.usefixtures("clean_players")
+def test_served_tables_watermarks(db_conn):
+    tables = clean.served_tables(db_conn, [1, 5], [Split.OVERALL])
+    assert tables == [
+        "batters_overall",
+        "game_log",
+        "batters_leaderboard_overall",
+        "pitchers_leaderboard_overall",
+    ]
+    tables = clean.served_tables(db_conn, [4, 7], list(Split))
+    assert "pitchers_leaderboard_overall" not in tables
+    assert "team_pitching_conference" in tables
+
+    tables = clean.served_tables(db_conn, [1], list(Split))
+
+    before = Watermarks.compute_watermarks(db_conn, tables, 2017)
+    with db_conn.begin():
+        # reloading the same rows doesn't change anything the API serves
+        db_conn.execute(text("UPDATE batters_overall SET woba = woba;"))
+    assert Watermarks.compute_watermarks(db_conn, tables, 2017) == before
+    with db_conn.begin():
+        db_conn.execute(text("UPDATE batters_overall SET woba = 0.5;"))
+    assert Watermarks.compute_watermarks(db_conn, tables, 2017) != before
+
+
+@pytest.mark.integration
+def test_leaderboard_columns(db_conn):
+    inspector = inspect(db_conn)
+    for kind in ["batters", "pitchers"]:
+        for split in Split:
+            table = Leaderboards.leaderboard(kind, split)
+            columns = [column["name"] for column in inspector.get_columns(table.name)]
+            assert columns == [column.name for column in table.columns]
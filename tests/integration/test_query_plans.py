@@ -0,0 +1,122 @@
+from datetime import date
+from typing import Callable, Iterator
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from naccbis.api import queries
+
+# tables that are too large to scan for a single season, team or player
+LARGE_TABLES = {
+    "batters_overall",
+    "pitchers_overall",
+    "batters_leaderboard_overall",
+    "pitchers_leaderboard_overall",
+    "player_id",
+    "game_log",
+}
+
+QUERIES: dict[str, Callable[[Session], Select]] = {
+    "batters_season": lambda db: queries.select_batters(db, season=2010),
+    "batters_team": lambda db: queries.select_batters(db, team="T7"),
+    "batters_min_pa": lambda db: queries.select_batters(db, season=2010, min_pa=150),
+    "pitchers_season": lambda db: queries.select_pitchers(db, season=2010),
+    "pitchers_team": lambda db: queries.select_pitchers(db, team="T7", min_ip=10),
+    "player_offense": lambda db: queries.select_player_offense("p77"),
+    "player_career_offense": lambda db: queries.select_player_career_offense("p77"),
+    "player_pitching": lambda db: queries.select_player_pitching("p77"),
+    "player_career_pitching": lambda db: queries.select_player_career_pitching("p77"),
+    "batters_page": lambda db: queries.select_batters(
+        db, limit=100, after=(2010, "T7", "L7", "F7")
+    ),
+    "batters_season_page": lambda db: queries.select_batters(
+        db, season=2010, columns=["fname", "lname", "team", "season", "pa"], limit=100
+    ),
+    "pitchers_page": lambda db: queries.select_pitchers(
+        db, limit=100, after=(2010, "T7", "L7", "F7")
+    ),
+    "game_log_team": lambda db: queries.select_game_log("T7", 2010, None, None),
+    "game_log_date": lambda db: queries.select_game_log(
+        None, 2010, date(2010, 4, 1), None
+    ),
+    "game_log_page": lambda db: queries.select_game_log(
+        None, None, None, None, limit=100, after=(2010, "T7", 5)
+    ),
+}
+
+
+@pytest.fixture(scope="module")
+def large_db(db_conn) -> Iterator[Session]:
+    """Fill the player tables with 20 seasons of 50 teams of 40 players"""
+    transaction = db_conn.begin()
+    db_conn.execute(
+        text(
+            """
+            INSERT INTO player_id (fname, lname, team, season, player_id)
+            SELECT 'F' || i, 'L' || i, 'T' || i % 50, 2000 + i % 20, 'p' || i
+            FROM generate_series(1, 40000) AS i;
+
+            INSERT INTO batters_overall (fname, lname, team, season, pa)
+            SELECT fname, lname, team, season, (random() * 200)::int FROM player_id;
+
+            INSERT INTO pitchers_overall (fname, lname, team, season, ip)
+            SELECT fname, lname, team, season, (random() * 50)::int FROM player_id;
+
+            INSERT INTO batters_leaderboard_overall
+            SELECT s.*, p.player_id
+            FROM batters_overall AS s JOIN player_id AS p
+            ON (p.fname, p.lname, p.team, p.season) = (s.fname, s.lname, s.team, s.season);
+
+            INSERT INTO pitchers_leaderboard_overall
+            SELECT s.*, p.player_id
+            FROM pitchers_overall AS s JOIN player_id AS p
+            ON (p.fname, p.lname, p.team, p.season) = (s.fname, s.lname, s.team, s.season);
+
+            INSERT INTO game_log (game_num, date, season, team)
+            SELECT i / 100, make_date(2000 + i % 20, 3 + i % 3, 1 + i % 28), 2000 + i % 20, 'T' || i % 50
+            FROM generate_series(1, 40000) AS i;
+            """  # noqa: E501
+        )
+    )
+    db_conn.execute(text("ANALYZE;"))
+    session = Session(bind=db_conn)
+    yield session
+    session.close()
+    transaction.rollback()
+
+
+def seq_scans(plan: dict) -> Iterator[str]:
+    """Find the large tables a query plan scans sequentially"""
+    if plan["Node Type"] == "Seq Scan" and plan["Relation Name"] in LARGE_TABLES:
+        yield plan["Relation Name"]
+    for subplan in plan.get("Plans", []):
+        yield from seq_scans(subplan)
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("leaderboards", [True, False])
+@pytest.mark.parametrize("name", QUERIES)
+def test_query_plan(large_db, monkeypatch, name, leaderboards):
+    if not leaderboards:
+        monkeypatch.setattr(queries, "get_leaderboard", lambda db, name: None)
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "pg_catalog" not in statement:
+            statements.append((statement, parameters))
+
+    conn = large_db.connection()
+    event.listen(conn, "before_cursor_execute", capture)
+    try:
+        large_db.execute(QUERIES[name](large_db))
+    finally:
+        event.remove(conn, "before_cursor_execute", capture)
+
+    assert statements
+    for statement, parameters in statements:
+        result = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        plan = result.scalar()[0]["Plan"]
+        assert list(seq_scans(plan)) == [], statement
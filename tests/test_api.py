@@ -1,42 +1,152 @@
-from typing import Iterator
+import io
+from datetime import date
+from typing import Any, Iterator
 
+import pandas as pd
+import pyarrow as pa
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.pool import NullPool
 
-from naccbis.api.database import create_session
-from naccbis.api.main import app, get_db
-from naccbis.common.models import GameLog
+from naccbis.api import cache as api_cache
+from naccbis.api import formats, pagination, queries, schemas
+from naccbis.api.database import create_async_session
+from naccbis.api.main import app, cache, get_db
+from naccbis.common import utils
+from naccbis.common.models import (
+    BattersOverall,
+    GameLog,
+    LeaguePitchingConference,
+    LeaguePitchingOverall,
+    PitchersOverall,
+    TeamOffenseOverall,
+    TeamPitchingConference,
+    TeamPitchingOverall,
+)
 from naccbis.common.settings import Settings
 
 NACCBIS_DB_URL = "postgresql:///naccbisdb_test"
 
 test_settings = Settings(app_name="naccbis-tests", db_url=NACCBIS_DB_URL)
-TestingSessionLocal = create_session(test_settings)
+# every test client has its own event loop, so connections can't be pooled
+TestingSessionLocal = create_async_session(test_settings, poolclass=NullPool)
+
+
+class SyncSession:
+    """Run the methods of the sync session of an AsyncSession in the event
+    loop of the test client
+    """
+
+    def __init__(self, session: AsyncSession, client: TestClient) -> None:
+        self.session = session
+        self.client = client
+
+    def __getattr__(self, name: str) -> Any:
+        method = getattr(self.session.sync_session, name)
+
+        def call(*args, **kwargs):
+            assert self.client.portal is not None
+            return self.client.portal.call(
+                self.session.run_sync, lambda _: method(*args, **kwargs)
+            )
+
+        return call
 
 
 @pytest.fixture
-def db(db_conn) -> Iterator[Session]:
-    """Create a session that does a rollback after each test"""
-    db_conn.begin()
-    session = TestingSessionLocal(bind=db_conn)
-    yield session
-    session.rollback()
-    session.close()
+def session() -> Iterator[AsyncSession]:
+    yield TestingSessionLocal()
 
 
 @pytest.fixture
-def client(db: Session) -> Iterator[TestClient]:
-    def override_get_db():
-        try:
-            yield db
-        finally:
-            db.close()
+def client(session: AsyncSession) -> Iterator[TestClient]:
+    """Create a client whose requests share a session that does a rollback
+    after each test
+    """
+
+    async def override_get_db():
+        yield session
 
     app.dependency_overrides[get_db] = override_get_db
 
     with TestClient(app) as test_client:
         yield test_client
+        assert test_client.portal is not None
+        test_client.portal.call(session.rollback)
+        test_client.portal.call(session.close)
+
+
+@pytest.fixture
+def db(session: AsyncSession, client: TestClient) -> SyncSession:
+    return SyncSession(session, client)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(monkeypatch) -> Iterator[None]:
+    """Start each test with an empty cache that checks the data versions on
+    every request
+    """
+    cache.clear()
+    monkeypatch.setattr(cache, "version_interval", 0)
+    yield
+    cache.clear()
+
+
+def test_response_cache_lru():
+    response_cache = api_cache.ResponseCache(maxsize=2)
+    response_cache.put("a", 1, None)
+    response_cache.put("b", 2, None)
+    assert response_cache.get("a") == 1
+    response_cache.put("c", 3, None)
+    assert response_cache.get("b") is api_cache.MISSING
+    assert response_cache.get("a") == 1
+    assert response_cache.get("c") == 3
+
+
+def test_response_cache_ttl(monkeypatch):
+    now = 100.0
+    monkeypatch.setattr(api_cache.time, "monotonic", lambda: now)
+    response_cache = api_cache.ResponseCache(ttl=10)
+    response_cache.put("current", 1, response_cache.season_ttl(None))
+    response_cache.put("completed", 2, response_cache.season_ttl(2015))
+    now = 109.0
+    assert response_cache.get("current") == 1
+    now = 110.0
+    assert response_cache.get("current") is api_cache.MISSING
+    assert response_cache.get("completed") == 2
+
+
+def test_response_cache_versions():
+    response_cache = api_cache.ResponseCache()
+    assert response_cache.versions_stale()
+    response_cache.set_versions({2018: 2, 2019: 1})
+    assert not response_cache.versions_stale()
+    assert response_cache.version(2018) == 2
+    assert response_cache.version(2020) == 0
+    version = response_cache.version(None)
+    response_cache.set_versions({2018: 1, 2019: 2})
+    assert response_cache.version(None) != version
+
+
+def test_leaderboard_reflected_once_created(client: TestClient, db: SyncSession):
+    def get_leaderboard(name: str) -> Any:
+        assert client.portal is not None
+        return client.portal.call(db.session.run_sync, queries.get_leaderboard, name)
+
+    assert get_leaderboard("test_leaderboard") is None
+    db.execute(text("CREATE TABLE test_leaderboard (season integer)"))
+    table = get_leaderboard("test_leaderboard")
+    assert table is not None
+    assert get_leaderboard("test_leaderboard") is table
+
+    db.execute(text("ALTER TABLE test_leaderboard ADD COLUMN team text"))
+    cache.set_versions({2019: 1})
+    assert list(get_leaderboard("test_leaderboard").c.keys()) == ["season", "team"]
+    cache.clear()
+    assert get_leaderboard("test_leaderboard") is not table
 
 
 def test_ping(client: TestClient):
@@ -52,10 +162,10 @@ def test_player(client: TestClient):
     print(response.json())
 
 
-def test_game_log(client: TestClient, db: Session):
+def test_game_log(client: TestClient, db: SyncSession):
     game_log1 = GameLog(
         game_num=25,
-        date="2018-04-21",
+        date=date(2018, 4, 21),
         season=2018,
         team="Wisconsin Lutheran",
         opponent="Dominican",
@@ -67,7 +177,7 @@ def test_game_log(client: TestClient, db: Session):
     )
     game_log2 = GameLog(
         game_num=15,
-        date="2018-04-08",
+        date=date(2018, 4, 8),
         season=2018,
         team="Edgwood",
         opponent="Wisconsin Lutheran",
@@ -78,7 +188,7 @@ def test_game_log(client: TestClient, db: Session):
         conference=True,
     )
     db.add_all([game_log1, game_log2])
-    db.commit()
+    db.flush()
     response = client.get(
         "/game_log/",
         params={"team": "Wisconsin Lutheran", "season": "2018"},
@@ -98,3 +208,391 @@ def test_game_log(client: TestClient, db: Session):
             "conference": True,
         }
     ]
+
+
+def test_team_offense_precomputed(client: TestClient, db: SyncSession):
+    # there are no league totals for 2019, the stored metrics are served as is
+    stats: dict[str, Any] = {
+        column.name: 1 for column in TeamOffenseOverall.__table__.columns
+    }
+    stats.update(name="Concordia", season=2019, woba=0.35, rar=12.5)
+    db.add(TeamOffenseOverall(**stats))
+    db.flush()
+    response = client.get("/team_offense", params={"season": "2019"})
+    assert response.status_code == 200
+    [result] = response.json()
+    assert result["woba"] == 0.35
+    assert result["rar"] == 12.5
+
+
+def test_batters_leaderboard(client: TestClient, db: SyncSession):
+    stats: dict[str, Any] = {
+        column.name: 1 for column in BattersOverall.__table__.columns
+    }
+    stats.update(fname="Jon", lname="Doe", team="MSOE", season=2019, yr="SR")
+    stats.update(pos="C", woba=0.4)
+    db.execute(text("INSERT INTO player_id VALUES ('Jon', 'Doe', 'MSOE', 2019)"))
+    db.add(BattersOverall(**stats))
+    db.flush()
+    db.execute(
+        text(
+            "INSERT INTO batters_leaderboard_overall "
+            "SELECT *, 'doejo01' FROM batters_overall WHERE season = 2019"
+        )
+    )
+    db.execute(text("UPDATE batters_overall SET woba = 0.1"))
+    db.flush()
+    response = client.get("/batters/", params={"season": "2019"})
+    assert response.status_code == 200
+    [result] = response.json()
+    assert result["lname"] == "Doe"
+    assert result["woba"] == 0.4
+
+
+def test_cached_until_version_bump(client: TestClient, db: SyncSession):
+    stats: dict[str, Any] = {
+        column.name: 1 for column in TeamOffenseOverall.__table__.columns
+    }
+    stats.update(name="Concordia", season=2019, woba=0.35)
+    db.add(TeamOffenseOverall(**stats))
+    db.flush()
+    params = {"season": "2019"}
+    assert client.get("/team_offense", params=params).json()[0]["woba"] == 0.35
+
+    db.execute(text("UPDATE team_offense_overall SET woba = 0.4"))
+    db.flush()
+    assert client.get("/team_offense", params=params).json()[0]["woba"] == 0.35
+
+    db.execute(text("INSERT INTO data_versions (season, version) VALUES (2019, 1)"))
+    db.flush()
+    assert client.get("/team_offense", params=params).json()[0]["woba"] == 0.4
+
+
+@pytest.mark.parametrize(
+    "if_none_match, expected",
+    [
+        (None, False),
+        ('W/"abc"', True),
+        ('"abc"', True),
+        ('W/"xyz", W/"abc"', True),
+        ("*", True),
+        ('W/"xyz"', False),
+    ],
+)
+def test_etag_matches(if_none_match, expected):
+    assert api_cache.etag_matches(if_none_match, 'W/"abc"') == expected
+
+
+def test_conditional_request(client: TestClient, db: SyncSession):
+    params = {"season": "2019"}
+    response = client.get("/league_offense", params=params)
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == f"public, max-age={cache.max_age}"
+    tag = response.headers["etag"]
+
+    response = client.get(
+        "/league_offense", params=params, headers={"If-None-Match": tag}
+    )
+    assert response.status_code == 304
+    assert response.headers["etag"] == tag
+    assert response.content == b""
+
+    # other parameters and other data versions are other responses
+    response = client.get("/league_offense", headers={"If-None-Match": tag})
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-cache"
+    db.execute(text("INSERT INTO data_versions (season, version) VALUES (2019, 1)"))
+    db.flush()
+    response = client.get(
+        "/league_offense", params=params, headers={"If-None-Match": tag}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != tag
+
+
+@pytest.mark.parametrize(
+    "path, params",
+    [
+        ("/player/doejo01", {}),
+        ("/league_offense", {}),
+        ("/batters/", {"team": "MSOE"}),
+    ],
+)
+def test_etag_changes_after_version_bump(
+    client: TestClient,
+    db: SyncSession,
+    monkeypatch,
+    path: str,
+    params: dict[str, str],
+):
+    def get_etag() -> str:
+        # any ETag matches *, so the endpoint doesn't run
+        response = client.get(path, params=params, headers={"If-None-Match": "*"})
+        assert response.status_code == 304
+        return response.headers["etag"]
+
+    def bump(season: int) -> None:
+        assert client.portal is not None
+        client.portal.call(
+            db.session.run_sync,
+            lambda s: utils.bump_data_version(s.connection(), season),
+        )
+
+    bump(2018)
+    tags = {get_etag()}
+    bump(2019)
+    tags.add(get_etag())
+    # the sum of the versions is the same as after the first bump
+    db.execute(text("UPDATE data_versions SET version = 0 WHERE season = 2018"))
+    tags.add(get_etag())
+    assert len(tags) == 3
+    # so is the way the body is rendered
+    monkeypatch.setattr(cache, "validate", not cache.validate)
+    tags.add(get_etag())
+    assert len(tags) == 4
+
+
+def test_pitchers_pages(client: TestClient, db: SyncSession, monkeypatch):
+    monkeypatch.setattr(queries, "get_leaderboard", lambda db, name: None)
+    stats: dict[str, Any] = {
+        column.name: 1 for column in PitchersOverall.__table__.columns
+    }
+    stats.update(season=2019, yr="SR", pos="P")
+    for fname, team in [("Al", "MSOE"), ("Bo", "AUR"), ("Cy", "MSOE")]:
+        db.execute(
+            text(f"INSERT INTO player_id VALUES ('{fname}', 'Doe', '{team}', 2019)")
+        )
+        db.add(
+            PitchersOverall(**{**stats, "fname": fname, "lname": "Doe", "team": team})
+        )
+    db.flush()
+
+    params = {"season": "2019", "limit": "2", "fields": "era, so"}
+    response = client.get("/pitchers/", params=params)
+    assert response.status_code == 200
+    assert [row["team"] for row in response.json()] == ["AUR", "MSOE"]
+    assert response.json()[0].keys() == {
+        "fname",
+        "lname",
+        "team",
+        "season",
+        "era",
+        "so",
+    }
+
+    next_page = response.links["next"]["url"]
+    response = client.get(next_page)
+    assert response.status_code == 200
+    assert [row["fname"] for row in response.json()] == ["Cy"]
+    assert "next" not in response.links
+
+
+def test_game_log_pages(client: TestClient, db: SyncSession):
+    db.add_all(
+        [
+            GameLog(game_num=i, date=date(2018, 4, i), season=2018, team="MSOE")
+            for i in range(1, 6)
+        ]
+    )
+    db.flush()
+    params = {"season": "2018", "limit": "3", "fields": "date"}
+    response = client.get("/game_log/", params=params)
+    assert response.json() == [
+        {"game_num": i, "date": f"2018-04-0{i}", "season": 2018, "team": "MSOE"}
+        for i in range(1, 4)
+    ]
+    response = client.get(response.links["next"]["url"])
+    assert [row["game_num"] for row in response.json()] == [4, 5]
+
+
+@pytest.mark.parametrize(
+    "params, status",
+    [
+        ({"cursor": "not a cursor"}, 400),
+        ({"cursor": "WzEsIDJd"}, 400),
+        ({"cursor": pagination.encode_cursor(["2019", "MSOE", "Doe", "Jon"])}, 400),
+        ({"cursor": pagination.encode_cursor([2019, "MSOE", "Doe", 1])}, 400),
+        ({"cursor": pagination.encode_cursor([True, "MSOE", "Doe", "Jon"])}, 400),
+        ({"cursor": pagination.encode_cursor([2019, "MSOE", "Doe", "Jon"])}, 200),
+        ({"fields": "pa,nope"}, 422),
+        ({"limit": "0"}, 422),
+    ],
+)
+def test_invalid_page(client: TestClient, params, status):
+    response = client.get("/batters/", params=params)
+    assert response.status_code == status
+
+
+def test_project():
+    assert pagination.project(schemas.GameLogSchema, None) is schemas.GameLogSchema
+    schema = pagination.project(schemas.GameLogSchema, ["game_num", "date", "ra"])
+    assert schema is pagination.project(
+        schemas.GameLogSchema, ("game_num", "date", "ra")
+    )
+    assert list(schema.__fields__) == ["game_num", "date", "ra"]
+    assert schema.parse_obj(
+        {"game_num": 1, "date": "2018-04-01", "ra": 2.0}
+    ).dict() == {
+        "game_num": 1,
+        "date": date(2018, 4, 1),
+        "ra": 2,
+    }
+    with pytest.raises(ValidationError):
+        schema.parse_obj({"game_num": 1, "date": "2018-04-01", "ra": None})
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, formats.JSON),
+        ("*/*", formats.JSON),
+        ("text/html, */*;q=0.8", formats.JSON),
+        ("application/vnd.apache.arrow.stream", formats.ARROW),
+        ("text/csv;q=0.5, application/vnd.apache.arrow.stream", formats.ARROW),
+        ("text/csv, application/json;q=0.9", formats.CSV),
+        ("text/csv;q=0, application/*", formats.JSON),
+    ],
+)
+def test_negotiate(accept, expected):
+    assert formats.negotiate(accept) == expected
+
+
+@pytest.fixture
+def game_logs(db: SyncSession) -> None:
+    db.add_all(
+        [
+            GameLog(
+                game_num=i,
+                date=date(2018, 4, i),
+                season=2018,
+                team="MSOE",
+                opponent="Aurora",
+                result="W",
+                rs=i,
+                ra=i % 2,
+                home=i % 2 == 0,
+                conference=True,
+            )
+            for i in range(1, 4)
+        ]
+    )
+    db.flush()
+
+
+@pytest.mark.usefixtures("game_logs")
+def test_game_log_formats(client: TestClient, monkeypatch):
+    monkeypatch.setattr(formats, "BATCH_SIZE", 2)
+    params = {"season": "2018"}
+    expected = pd.DataFrame(client.get("/game_log/", params=params).json())
+    expected["date"] = pd.to_datetime(expected["date"]).dt.date
+
+    response = client.get(
+        "/game_log/", params=params, headers={"Accept": formats.ARROW}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == formats.ARROW
+    assert response.headers["vary"] == "Accept"
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.num_rows == 3
+    pd.testing.assert_frame_equal(table.to_pandas(), expected)
+
+    response = client.get("/game_log/", params=params, headers={"Accept": formats.CSV})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(formats.CSV)
+    result = pd.read_csv(io.StringIO(response.text), parse_dates=["date"])
+    result["date"] = result["date"].dt.date
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.usefixtures("game_logs")
+def test_formats_are_cached_separately(client: TestClient):
+    params = {"season": "2018", "limit": "2"}
+    json_response = client.get("/game_log/", params=params)
+    csv_response = client.get(
+        "/game_log/", params=params, headers={"Accept": formats.CSV}
+    )
+    assert csv_response.headers["etag"] != json_response.headers["etag"]
+    assert "next" in csv_response.links
+    assert len(csv_response.text.splitlines()) == 3
+
+    headers = {"Accept": formats.CSV, "If-None-Match": csv_response.headers["etag"]}
+    assert client.get("/game_log/", params=params, headers=headers).status_code == 304
+    headers["Accept"] = formats.JSON
+    assert client.get("/game_log/", params=params, headers=headers).status_code == 200
+
+
+def test_json_values():
+    ints = pd.Series([1.0, None, 3.0])
+    assert formats.json_values(ints, int) == [1, None, 3]
+    assert formats.json_values(pd.Series([1, 2]), float) == [1.0, 2.0]
+    assert formats.json_values(pd.Series([0.5, float("nan")]), float) == [0.5, None]
+    assert formats.json_values(pd.Series(["a", None]), str) == ["a", None]
+
+
+@pytest.fixture
+def stats(db: SyncSession) -> None:
+    batter: dict[str, Any] = {
+        column.name: 1 for column in BattersOverall.__table__.columns
+    }
+    batter.update(team="MSOE", season=2019, yr="SR", pos=None, woba=0.35)
+    pitcher: dict[str, Any] = {
+        column.name: 2 for column in PitchersOverall.__table__.columns
+    }
+    pitcher.update(team="MSOE", season=2019, yr="SR", pos="P", ip=10.1, era=1 / 7)
+    for fname, lname in [("Jon", "Doe"), ("José", "Núñez")]:
+        db.execute(
+            text(
+                "INSERT INTO player_id VALUES (:fname, :lname, 'MSOE', 2019)"
+            ).bindparams(fname=fname, lname=lname)
+        )
+        db.add(BattersOverall(**{**batter, "fname": fname, "lname": lname}))
+        db.add(PitchersOverall(**{**pitcher, "fname": fname, "lname": lname}))
+    team: dict[str, Any] = {
+        column.name: 2 for column in TeamOffenseOverall.__table__.columns
+    }
+    team.update(name="MSOE", season=2019, avg=1 / 3, woba=None)
+    db.add(TeamOffenseOverall(**team))
+    models: list[Any] = [
+        TeamPitchingOverall,
+        TeamPitchingConference,
+        LeaguePitchingOverall,
+        LeaguePitchingConference,
+    ]
+    for model in models:
+        row: dict[str, Any] = {column.name: 3 for column in model.__table__.columns}
+        row.update(season=2019, era=2 / 3)
+        if "name" in row:
+            row["name"] = "MSOE"
+        db.add(model(**row))
+    db.flush()
+
+
+@pytest.mark.usefixtures("stats", "game_logs")
+@pytest.mark.parametrize(
+    "path, params",
+    [
+        ("/batters/", {"season": "2019"}),
+        ("/batters/", {"season": "2019", "fields": "pa,woba,pos", "limit": "1"}),
+        ("/team_offense", {"season": "2019"}),
+        ("/team_pitching", {"season": "2019"}),
+        ("/team_pitching", {"season": "2019", "split": "conference"}),
+        ("/league_pitching", {"season": "2019"}),
+        ("/league_pitching", {"season": "2019", "split": "conference"}),
+        ("/pitchers/", {"season": "2019"}),
+        ("/pitchers/", {"season": "2019", "fields": "era,ip"}),
+        ("/game_log/", {"season": "2018"}),
+        ("/game_log/", {"fields": "ra,home", "limit": "2"}),
+    ],
+)
+def test_json_matches_response_model(
+    client: TestClient, monkeypatch, path: str, params: dict[str, str]
+):
+    monkeypatch.setattr(queries, "get_leaderboard", lambda db, name: None)
+    direct = client.get(path, params=params)
+    cache.clear()
+    monkeypatch.setattr(cache, "validate", True)
+    validated = client.get(path, params=params)
+    assert direct.status_code == validated.status_code == 200
+    assert direct.json()
+    assert direct.headers["content-type"] == validated.headers["content-type"]
+    assert direct.content == validated.content
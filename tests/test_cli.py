@@ -46,6 +46,9 @@ class TestClean:
         assert "-S, --stat" in result.output
         assert "-s, --split" in result.output
         assert "--load" in result.output
+        assert "--force" in result.output
+        assert "--advanced" in result.output
+        assert "-j, --jobs" in result.output
         assert "-v, --verbose" in result.output
 
 
@@ -62,6 +65,7 @@ class TestScrape:
         assert "-S, --stat" in result.output
         assert "-s, --split" in result.output
         assert "-o, --output" in result.output
+        assert "-j, --jobs" in result.output
         assert "-v, --verbose" in result.output
 
     def test_cli_inseason_help(self, cli_runner):
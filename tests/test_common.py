@@ -1,9 +1,16 @@
 """ This module provides unit tests for common """
 
 
+import timeit
+from datetime import date
+
+import numpy as np
+import pandas as pd
 import pytest
+from pandas.testing import assert_frame_equal
+from sqlalchemy import create_engine
 
-from naccbis.common import models, splits, utils  # noqa
+from naccbis.common import metrics, models, splits, utils  # noqa
 
 
 class TestUtils:
@@ -45,6 +52,52 @@ class TestUtils:
     def test_season_to_year(self, season, expected):
         assert utils.season_to_year(season) == expected
 
+    @pytest.mark.parametrize(
+        "today, expected",
+        [(date(2017, 4, 1), False), (date(2017, 7, 1), True), (date(2018, 1, 1), True)],
+    )
+    def test_season_completed(self, today, expected):
+        assert utils.season_completed(2017, today) == expected
+
+
+class TestLoadData:
+    def test_db_load_data_sqlite(self):
+        data = pd.DataFrame({"name": ["Smith", "", None], "hr": [3.0, None, 12.0]})
+        with create_engine("sqlite://").connect() as conn:
+            utils.db_load_data(data, "stats", conn, index=False, chunksize=2)
+            result = pd.read_sql_table("stats", conn)
+        assert_frame_equal(result, data)
+
+    def test_db_load_data_replace_partition(self):
+        data = pd.DataFrame({"season": [2016, 2016, 2017], "hr": [1, 2, 3]})
+        update = pd.DataFrame({"season": [2017, 2017], "hr": [4, 5]})
+        with create_engine("sqlite://").connect() as conn:
+            utils.db_load_data(data, "stats", conn, replace_partition=["season"])
+            utils.db_load_data(update, "stats", conn, replace_partition=["season"])
+            utils.db_load_data(update, "stats", conn, replace_partition=["season"])
+            result = pd.read_sql_table("stats", conn)
+        assert result["season"].tolist() == [2016, 2016, 2017, 2017]
+        assert result["hr"].tolist() == [1, 2, 4, 5]
+
+
+def process_season(season: int) -> None:
+    if season == 2017:
+        raise ValueError("Bad season")
+
+
+class TestRunSeasons:
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_run_seasons(self, jobs):
+        summary = utils.run_seasons(process_season, [2016, 2017, 2018], jobs)
+        assert summary == {2016: True, 2017: False, 2018: True}
+        assert list(summary) == [2016, 2017, 2018]
+
+    def test_print_summary(self, capsys):
+        utils.print_summary({2016: True, 2017: False})
+        output = capsys.readouterr().out
+        assert "2016: success" in output
+        assert "2017: FAILED" in output
+
 
 class TestSplits:
     def test_split_overall(self):
@@ -63,3 +116,196 @@ class TestSplits:
     def test_gamelog_split_to_str(self):
         split = splits.GameLogSplit("hitting")
         assert str(split) == "hitting"
+
+
+@pytest.fixture
+def league_totals() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "ab": [5612, 5390, 5877],
+            "h": [1587, 1462, 1701],
+            "x2b": [281, 270, 312],
+            "x3b": [34, 27, 41],
+            "hr": [96, 131, 88],
+            "bb": [572, 531, 604],
+            "hbp": [101, 88, 117],
+            "sf": [47, 52, 41],
+            "sh": [66, 58, 79],
+            "gdp": [101, 93, 112],
+            "sb": [212, 178, 240],
+            "cs": [63, 71, 58],
+            "r": [911, 842, 987],
+            "pa": [6398, 6119, 6718],
+        },
+        index=pd.Index([2015, 2016, 2017], name="season"),
+    )
+
+
+def woba_weights_apply(data, target):
+    """The row by row implementation of woba_weights, used as a baseline"""
+    data = data.copy()
+    data["x1b"] = data["h"] - data["x2b"] - data["x3b"] - data["hr"]
+    lw = data.loc[:, "lw_hbp":"lw_out"]
+    lw = (lw.T - lw["lw_out"]).T
+    lw.drop(columns=["lw_sb", "lw_cs", "lw_out"], inplace=True)
+    lw.columns = ["hbp", "bb", "x1b", "x2b", "x3b", "hr"]
+    totals = data[["hbp", "bb", "x1b", "x2b", "x3b", "hr"]]
+    acc = totals.mul(lw).apply(np.sum, axis=1)
+    raw = acc / data["pa"]
+    scale = target / raw
+    ww = (lw.T * scale).T
+    ww.columns = ["ww_hbp", "ww_bb", "ww_x1b", "ww_x2b", "ww_x3b", "ww_hr"]
+    ww["woba_scale"] = scale
+    return ww
+
+
+def multi_season_loop(data, totals, func):
+    """The season by season implementation of multi_season, used as a baseline"""
+    totals = totals.set_index("season") if totals.index.name != "season" else totals
+    frames = [func(group, totals.loc[name]) for name, group in data.groupby("season")]
+    return pd.concat(frames)
+
+
+@pytest.fixture
+def league_weights(league_totals) -> pd.DataFrame:
+    totals = league_totals.join(metrics.linear_weights(league_totals))
+    weights = metrics.woba_weights(totals, metrics.obp(totals))
+    totals = totals.join(weights)
+    totals["woba"] = metrics.woba(totals, weights)
+    totals["lg_wsb"] = metrics.lg_wsb(totals, totals)
+    totals["lg_r_pa"] = totals["r"] / totals["pa"]
+    totals["rep_level"] = [-0.021, -0.018, -0.025]
+    return totals
+
+
+@pytest.fixture
+def batters() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    size = 60
+    h = rng.integers(0, 60, size)
+    return pd.DataFrame(
+        {
+            "name": [f"Player {i}" for i in range(size)],
+            "season": rng.choice([2015, 2016, 2017], size),
+            "pa": h * 4 + 5,
+            "ab": h * 3 + 4,
+            "h": h,
+            "x2b": h // 5,
+            "x3b": h // 20,
+            "hr": h // 10,
+            "bb": rng.integers(0, 20, size),
+            "hbp": rng.integers(0, 5, size),
+            "sb": rng.integers(0, 10, size),
+            "cs": rng.integers(0, 4, size),
+        }
+    )
+
+
+class TestMetrics:
+    def test_linear_weights(self, league_totals):
+        expected = league_totals.apply(metrics.linear_weights_incr, axis=1)
+        result = metrics.linear_weights(league_totals)
+        assert_frame_equal(result, expected, check_exact=False, atol=1e-4)
+
+    def test_woba_weights(self, league_totals):
+        totals = league_totals.join(metrics.linear_weights(league_totals))
+        obp = metrics.obp(totals)
+        expected = woba_weights_apply(totals, obp)
+        assert_frame_equal(metrics.woba_weights(totals, obp), expected)
+
+    def test_woba_weights_many_seasons(self, league_totals):
+        totals = league_totals.join(metrics.linear_weights(league_totals))
+        totals = pd.concat([totals] * 1000, ignore_index=True)
+        obp = metrics.obp(totals)
+        expected = woba_weights_apply(totals, obp)
+        assert_frame_equal(metrics.woba_weights(totals, obp), expected)
+
+    @pytest.mark.benchmark
+    def test_woba_weights_throughput(self, league_totals):
+        totals = league_totals.join(metrics.linear_weights(league_totals))
+        totals = pd.concat([totals] * 1000, ignore_index=True)
+        obp = metrics.obp(totals)
+        # the best of a few runs of each in the same process, so a slow or busy
+        # machine slows both down, and a wide margin against the baseline
+        baseline = min(
+            timeit.repeat(lambda: woba_weights_apply(totals, obp), number=1, repeat=3)
+        )
+        elapsed = min(
+            timeit.repeat(lambda: metrics.woba_weights(totals, obp), number=1, repeat=3)
+        )
+        assert elapsed < baseline / 10
+
+    @pytest.mark.parametrize(
+        "func",
+        [metrics.season_offensive_metrics, metrics.season_offensive_metrics_rar],
+    )
+    def test_multi_season(self, batters, league_weights, func):
+        expected = multi_season_loop(batters, league_weights, func)
+        result = metrics.multi_season(batters, league_weights, func)
+        assert_frame_equal(result, expected)
+
+        totals = league_weights.reset_index()
+        assert_frame_equal(metrics.multi_season(batters, totals, func), expected)
+
+    def test_multi_season_missing_season(self, batters, league_weights):
+        with pytest.raises(KeyError):
+            metrics.multi_season(
+                batters,
+                league_weights.drop(index=2016),
+                metrics.season_offensive_metrics,
+            )
+
+    def test_advanced_offensive_metrics(self, batters, league_weights):
+        bench = batters.drop(columns="name").groupby("season").sum()
+        expected = multi_season_loop(
+            bench, league_weights, metrics.season_offensive_metrics
+        )
+        result = metrics.advanced_offensive_metrics(bench, league_weights)
+        assert_frame_equal(result, expected)
+
+    def test_fill_season_offensive_metrics(self, batters, league_weights):
+        columns = metrics.SEASON_OFFENSIVE_METRICS
+        expected = metrics.multi_season(
+            batters, league_weights, metrics.season_offensive_metrics_rar
+        )
+        result = metrics.fill_season_offensive_metrics(batters, league_weights)
+        assert_frame_equal(result[columns], expected[columns].loc[batters.index])
+
+        # precomputed rows are kept and seasons without totals are left empty
+        partial = result.copy()
+        partial.loc[partial["season"] != 2015, columns] = np.nan
+        partial.loc[partial["season"] == 2015, columns] = 1.0
+        result = metrics.fill_season_offensive_metrics(
+            partial, league_weights.drop(index=2017)
+        )
+        seasons = result["season"]
+        assert (result.loc[seasons == 2015, columns] == 1.0).all(axis=None)
+        assert_frame_equal(
+            result.loc[seasons == 2016, columns],
+            expected.loc[expected["season"] == 2016, columns],
+        )
+        assert result.loc[seasons == 2017, columns].isna().all(axis=None)
+
+    @pytest.mark.parametrize("pitching", [False, True])
+    def test_base_runs(self, league_totals, pitching):
+        runs = metrics.base_runs(league_totals, pitching=pitching)
+        # the multiplier calibrates Base Runs to actual runs scored
+        np.testing.assert_allclose(runs.bsr, league_totals["r"])
+        np.testing.assert_allclose(
+            runs.bsr,
+            runs.a * runs.b * runs.bmult / (runs.b * runs.bmult + runs.c) + runs.d,
+        )
+
+        if pitching:
+            bmult = metrics.bsr_pitch_bmult(league_totals)
+            bsr = metrics.bsr_pitch(league_totals, bmult)
+        else:
+            bmult = metrics.bsr_bmult(league_totals)
+            bsr = metrics.bsr(league_totals, bmult)
+        np.testing.assert_array_equal(bmult, runs.bmult)
+        np.testing.assert_array_equal(bsr, runs.bsr)
+        assert bsr.index.equals(league_totals.index)
+
+    def test_bsr_single_season(self, league_totals):
+        season = league_totals.loc[2016]
+        assert metrics.bsr(season, 1.1) == metrics.bsr(league_totals, 1.1)[2016]
@@ -1,6 +1,8 @@
 """ This module provides scraping unit tests """
 
 
+import time
+
 import numpy as np
 import pandas as pd
 import pytest
@@ -19,6 +21,7 @@ from naccbis.scraping import (
     TeamOffenseScraper,
     TeamPitchingScraper,
 )
+from naccbis.scraping.ScrapeCache import CachedPage, PageCache, url_season
 from naccbis.scraping.ScrapeFunctions import TeamScrapeUrl
 
 
@@ -113,7 +116,7 @@ def mock_requests_get(monkeypatch):
     def mock_response(*args, **kwargs):
         return MockResponse()
 
-    monkeypatch.setattr(requests, "get", mock_response)
+    monkeypatch.setattr(requests.Session, "get", mock_response)
 
 
 class TestScrapeFunctions:
@@ -209,6 +212,91 @@ class TestScrapeFunctions:
         expected = BeautifulSoup(html, "html.parser")
         assert ScrapeFunctions.get_soup("https://fake.com", 0) == expected
 
+    def test_get_soup_parsed_page(self, mock_requests_get):
+        page = ScrapeFunctions.get_soup("https://fake.com", 0)
+        assert isinstance(page, ScrapeFunctions.ParsedPage)
+        assert page.h1.text == "Hello World!"
+
+    @pytest.mark.parametrize("parser", ["html.parser", "lxml"])
+    def test_parsed_page_tables(self, html_table, parser):
+        if parser == "lxml":
+            pytest.importorskip("lxml")
+        page = ScrapeFunctions.ParsedPage(html_table, parser)
+        assert page.catalogue is page.catalogue
+        assert len(page.tables) == 1
+        assert ScrapeFunctions.find_table(page, ["Col 1", "col 3"]) == [0]
+        soup = BeautifulSoup(html_table, "html.parser")
+        assert_frame_equal(
+            ScrapeFunctions.scrape_table(soup, 1),
+            ScrapeFunctions.scrape_table(page, 1),
+        )
+
+    def test_table_catalogue(self, html_table):
+        html = html_table + html_table.replace("Col 4", "Col 5")
+        catalogue = ScrapeFunctions.TableCatalogue(BeautifulSoup(html, "html.parser"))
+        assert len(catalogue.tables) == 2
+        assert catalogue.tables[1].headers == ["Col 1", "Col 2", "Col 3", "Col 5"]
+        assert catalogue.find(["col 1", "COL 2"]) == [0, 1]
+        assert catalogue.find(["Col 5"]) == [1]
+        assert catalogue.find(["Col 6"]) == []
+        assert catalogue.find(["col 2", "col 1"]) is catalogue.find(["Col 1", "Col 2"])
+
+    def test_configure_parser(self, monkeypatch):
+        monkeypatch.setattr(ScrapeFunctions, "PARSER", "html.parser")
+        with pytest.raises(ValueError):
+            ScrapeFunctions.configure_parser("fake-parser")
+        assert ScrapeFunctions.PARSER == "html.parser"
+
+    def test_shared_pages(self, monkeypatch):
+        fetched: list[str] = []
+
+        def mock_get_html(url, backoff=None):
+            fetched.append(url)
+            return f"<h1>{url}</h1>"
+
+        monkeypatch.setattr(ScrapeFunctions, "get_html", mock_get_html)
+        with ScrapeFunctions.shared_pages() as store:
+            first = ScrapeFunctions.get_soup("https://fake.com/a")
+            assert ScrapeFunctions.get_soup("https://fake.com/a") is first
+            ScrapeFunctions.get_soup("https://fake.com/b")
+        assert fetched == ["https://fake.com/a", "https://fake.com/b"]
+        assert (store.fetched, store.reused) == (2, 1)
+
+        # pages are no longer shared outside of the context
+        assert ScrapeFunctions.get_soup("https://fake.com/a") is not first
+        assert len(fetched) == 3
+
+    def test_rate_limiter(self, monkeypatch):
+        delays: list[float] = []
+        monkeypatch.setattr(ScrapeFunctions, "sleep", delays.append)
+        limiter = ScrapeFunctions.RateLimiter(interval=1.0)
+        limiter.wait("https://naccsports.org/sports/bsb/2017-18/leaders")
+        limiter.wait("https://naccsports.org/sports/bsb/2017-18/teams")
+        limiter.wait("https://naccsports.org/sports/bsb/2017-18/teams/aurora")
+        limiter.wait("https://fake.com")
+        assert len(delays) == 2
+        assert 0 < delays[0] <= 1.0
+        assert 1.0 < delays[1] <= 2.0
+
+    def test_rate_limiter_override_interval(self, monkeypatch):
+        delays: list[float] = []
+        monkeypatch.setattr(ScrapeFunctions, "sleep", delays.append)
+        limiter = ScrapeFunctions.RateLimiter(interval=1.0)
+        limiter.wait("https://fake.com", 0)
+        limiter.wait("https://fake.com", 0)
+        assert delays == []
+
+    def test_create_session(self):
+        session = ScrapeFunctions.create_session(pool_size=4, retries=2)
+        adapter = session.get_adapter("https://naccsports.org")
+        assert adapter._pool_maxsize == 4
+        assert adapter.max_retries.total == 2
+        assert 503 in adapter.max_retries.status_forcelist
+        assert session.headers["User-Agent"] == ScrapeFunctions.HEADERS["User-Agent"]
+
+    def test_get_session_is_shared(self):
+        assert ScrapeFunctions.get_session() is ScrapeFunctions.get_session()
+
     def test_skip_team_is_true(self):
         html = """
         <tr class="totals">
@@ -232,6 +320,157 @@ class TestScrapeFunctions:
         assert not ScrapeFunctions.skip_team(soup)
 
 
+def make_stats_table(
+    headers: list[str], num_rows: int, header_rows: int = 1, footer_rows: int = 0
+) -> str:
+    """Build the HTML of a stats table shaped like the ones on naccsports.org"""
+    caption = f"<tr><td colspan='{len(headers)}'>Caption</td></tr>"
+    header = "".join(f"<th>{x}</th>" for x in headers)
+    html = [caption] * (header_rows - 1) + [f"<tr>{header}</tr>"]
+    for i in range(num_rows + footer_rows):
+        cells = "".join(f"<td> {i}.{j} </td>" for j in range(len(headers)))
+        html.append(f"<tr>{cells}</tr>")
+    return f"<table>{''.join(html)}</table>"
+
+
+def scrape_table_concat(
+    soup: BeautifulSoup, tbl_num: int, first_row: int = 2, skip_rows: int = 0
+) -> pd.DataFrame:
+    """The previous implementation of scrape_table, kept as a baseline"""
+    table = soup.find_all("table")[tbl_num - 1]
+    headers = [x.text.strip() for x in table.find_all("th")]
+    html_rows = table.find_all("tr")
+    rows = html_rows[first_row - 1 : len(html_rows) - skip_rows]
+    df = pd.DataFrame(columns=headers)
+    for row in rows:
+        row_data = [x.text.strip() for x in row.find_all("td")]
+        d = pd.DataFrame(pd.Series(row_data, index=headers)).T
+        df = pd.concat([df, d], ignore_index=True)
+    return df
+
+
+class TestScrapeTableBulk:
+    """Compare scrape_table against the row by row implementation it replaced.
+    scripts/benchmark_scrape_table.py times the two on recorded pages.
+    """
+
+    NUM_ROWS = 300
+
+    @pytest.mark.parametrize(
+        "headers, header_rows, first_row, skip_rows",
+        [
+            # team page hitting table with totals and opponents rows
+            (IndividualOffenseScraper.HITTING_COLS, 1, 2, 2),
+            # Coach's View with a second header row and a totals footer
+            (IndividualPitchingScraper.COACHES_VIEW_COLS, 2, 3, 3),
+            # game log table
+            (GameLogScraper.HITTING_COLS, 1, 2, 0),
+        ],
+        ids=["team", "coaches_view", "game_log"],
+    )
+    def test_scrape_table_bulk(self, headers, header_rows, first_row, skip_rows):
+        html = make_stats_table(headers, self.NUM_ROWS, header_rows, skip_rows)
+        soup = BeautifulSoup(html, "html.parser")
+
+        expected = scrape_table_concat(soup, 1, first_row, skip_rows)
+        df = ScrapeFunctions.scrape_table(soup, 1, first_row, skip_rows)
+        assert len(df) == self.NUM_ROWS
+        assert_frame_equal(expected, df)
+
+
+class TestPageCache:
+    URL = "https://naccsports.org/sports/bsb/2016-17/leaders"
+    INSEASON_URL = "https://naccsports.org/sports/bsb/2099-00/leaders"
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        cache = PageCache(tmp_path, ttl=60)
+        ScrapeFunctions.configure_cache(cache)
+        yield cache
+        ScrapeFunctions.configure_cache(None)
+
+    @pytest.mark.parametrize(
+        "url, expected",
+        [
+            ("https://naccsports.org/sports/bsb/2016-17/leaders", 2017),
+            ("https://naccsports.org/sports/bsb/2016-17", 2017),
+            ("https://naccsports.org/sports/bsb/2016-17/teams/aurora", 2017),
+            ("https://naccsports.org/sports/bsb/", None),
+        ],
+    )
+    def test_url_season(self, url, expected):
+        assert url_season(url) == expected
+
+    def test_get_put(self, cache):
+        assert cache.get(self.URL) is None
+        page = CachedPage(self.URL, "<html></html>", time.time(), etag='"abc"')
+        cache.put(page)
+        assert cache.get(self.URL) == page
+
+    def test_is_fresh(self, cache):
+        now = time.time()
+        during_season = time.mktime((2017, 4, 1, 0, 0, 0, 0, 0, -1))
+        assert cache.is_fresh(CachedPage(self.URL, "", now - 10**6))
+        assert not cache.is_fresh(CachedPage(self.URL, "", during_season))
+        assert cache.is_fresh(CachedPage(self.INSEASON_URL, "", now))
+        assert not cache.is_fresh(CachedPage(self.INSEASON_URL, "", now - 120))
+
+    def test_validators(self):
+        page = CachedPage(self.URL, "", 0, etag='"abc"', last_modified="yesterday")
+        assert page.validators() == {
+            "If-None-Match": '"abc"',
+            "If-Modified-Since": "yesterday",
+        }
+        assert CachedPage(self.URL, "", 0).validators() == {}
+
+    def test_get_soup_cache_hit(self, cache, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError("Fresh pages should not be fetched")
+
+        monkeypatch.setattr(requests.Session, "get", fail)
+        cache.put(CachedPage(self.URL, "<h1>Cached</h1>", time.time()))
+        soup = ScrapeFunctions.get_soup(self.URL, 0)
+        assert soup.h1.text == "Cached"
+
+    def test_get_soup_not_modified(self, cache, monkeypatch):
+        requests_made = []
+
+        def not_modified(self, url, headers=None, **kwargs):
+            requests_made.append(headers)
+            response = requests.Response()
+            response.status_code = 304
+            return response
+
+        monkeypatch.setattr(requests.Session, "get", not_modified)
+        cache.put(CachedPage(self.INSEASON_URL, "<h1>Cached</h1>", 0, etag='"abc"'))
+        soup = ScrapeFunctions.get_soup(self.INSEASON_URL, 0)
+        assert soup.h1.text == "Cached"
+        assert requests_made == [{"If-None-Match": '"abc"'}]
+        assert cache.is_fresh(cache.get(self.INSEASON_URL))
+
+    def test_get_soup_stores_response(self, cache, monkeypatch):
+        def ok(self, url, headers=None, **kwargs):
+            response = requests.Response()
+            response.status_code = 200
+            response.headers["ETag"] = '"xyz"'
+            response._content = b"<h1>Fresh</h1>"
+            return response
+
+        monkeypatch.setattr(requests.Session, "get", ok)
+        soup = ScrapeFunctions.get_soup(self.URL, 0)
+        assert soup.h1.text == "Fresh"
+        cached = cache.get(self.URL)
+        assert cached.text == "<h1>Fresh</h1>"
+        assert cached.etag == '"xyz"'
+
+    def test_get_soup_offline(self, cache):
+        cache.offline = True
+        cache.put(CachedPage(self.INSEASON_URL, "<h1>Replayed</h1>", 0))
+        assert ScrapeFunctions.get_soup(self.INSEASON_URL, 0).h1.text == "Replayed"
+        with pytest.raises(RuntimeError):
+            ScrapeFunctions.get_soup(self.URL, 0)
+
+
 class TestBaseScraper:
     def test_init_scrapers(self):
         scrapers = [
@@ -245,6 +484,29 @@ class TestBaseScraper:
         for scraper in scrapers:
             assert isinstance(scraper, BaseScraper)
 
+    @pytest.mark.parametrize("max_workers", [1, 4])
+    def test_scrape_teams(self, max_workers):
+        scraper = IndividualOffenseScraper(
+            "2018", Split("overall"), "csv", max_workers=max_workers
+        )
+        teams = [
+            TeamScrapeUrl(team="Aurora", id="AUR", url="teams/aurora"),
+            TeamScrapeUrl(team="Benedictine", id="BEN", url="teams/benedictineil"),
+            TeamScrapeUrl(team="Edgewood", id="EDG", url="teams/edgewood"),
+        ]
+
+        def scrape_team(team):
+            if team.id == "BEN":
+                return None
+            return pd.DataFrame({"team": [team.id, team.id]})
+
+        expected = pd.DataFrame({"team": ["AUR", "AUR", "EDG", "EDG"]})
+        assert_frame_equal(expected, scraper._scrape_teams(teams, scrape_team))
+
+    def test_scrape_teams_empty(self):
+        scraper = IndividualOffenseScraper("2018", Split("overall"), "csv")
+        assert scraper._scrape_teams([], lambda team: None).empty
+
     def test_base_scraper_export_db_not_connected(self):
         scraper = IndividualOffenseScraper("2018", Split("overall"), "sql", conn=None)
         scraper._runnable = False